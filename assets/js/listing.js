@@ -0,0 +1,68 @@
+// assets/js/listing.js — lazy-loads older episodes into index.html.
+// build_site.py writes listing/page-<n>.json (page 0 = oldest, items oldest first) and
+// renders the newest pages inline; #listing-more carries the next older page number.
+(function () {
+  var script = document.currentScript;
+  var root = script.dataset.pages;
+  var more = document.getElementById("listing-more");
+  var list = document.querySelector(".episode-list");
+  if (!more || !list || !("IntersectionObserver" in window)) return;  // the archive link stays
+  var loading = false;
+  var MARGIN = 600;  // px below the viewport at which the next page starts loading
+
+  function el(tag, cls, text) {
+    var e = document.createElement(tag);
+    if (cls) e.className = cls;
+    if (text) e.textContent = text;
+    return e;
+  }
+
+  function card(ep) {
+    var li = el("li", "episode-card");
+    if (ep.cover) {
+      var img = el("img", "episode-cover");
+      img.src = ep.cover; img.alt = ep.title || ""; img.loading = "lazy"; img.decoding = "async";
+      li.appendChild(img);
+    }
+    var head = el("div", "episode-head"), title = el("strong", "episode-title"), a = el("a", null, ep.title);
+    a.href = ep.url;
+    title.appendChild(a); head.appendChild(title);
+    if (ep.description) head.appendChild(el("div", "episode-desc", ep.description));
+    li.appendChild(head);
+    if (ep.audio_url) {
+      var wrap = el("div", "episode-audio"), audio = el("audio"), src = el("source");
+      audio.controls = true; audio.preload = "none"; audio.setAttribute("playsinline", "");
+      src.src = ep.audio_url; src.type = "audio/mpeg";
+      audio.appendChild(src); wrap.appendChild(audio); li.appendChild(wrap);
+    }
+    return li;
+  }
+
+  function next() {
+    var n = parseInt(more.dataset.next, 10);
+    if (loading || !(n >= 0)) return;
+    loading = true;
+    fetch(root + "page-" + n + ".json").then(function (r) {
+      if (!r.ok) throw new Error(r.status);
+      return r.json();
+    }).then(function (items) {
+      items.slice().reverse().forEach(function (ep) { list.appendChild(card(ep)); });
+      more.dataset.next = n - 1;
+      if (n - 1 < 0) { observer.disconnect(); more.remove(); return true; }
+    }).catch(function () { observer.disconnect(); return true; })  // leave the archive link
+      .then(function (done) {
+        loading = false;
+        // the observer only fires on changes: a short page leaves #listing-more in range
+        if (!done && near()) next();
+      });
+  }
+
+  function near() {
+    return more.getBoundingClientRect().top < window.innerHeight + MARGIN;
+  }
+
+  var observer = new IntersectionObserver(function (entries) {
+    if (entries.some(function (e) { return e.isIntersecting; })) next();
+  }, { rootMargin: MARGIN + "px 0px" });
+  observer.observe(more);
+})();
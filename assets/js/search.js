@@ -0,0 +1,98 @@
+// assets/js/search.js — client for the sharded index written by chengyu/search.py.
+// Fetches manifest.json, then only the t-<key>.json shards of the query terms and
+// the docs-<n>.json chunks of the hits. Han queries match per character (all must
+// hit); Latin words match as prefixes, toned or toneless pinyin alike.
+(function () {
+  var script = document.currentScript;
+  var root = script.dataset.index;
+  var input = document.getElementById(script.dataset.input || "q");
+  var list = document.getElementById(script.dataset.results || "results");
+  var HAN = /[㐀-䶿一-鿿豈-﫿]/;
+  var cache = {};
+
+  function get(name) {
+    if (!cache[name]) {
+      cache[name] = fetch(root + name).then(function (r) { return r.ok ? r.json() : null; })
+                                      .catch(function () { return null; });
+    }
+    return cache[name];
+  }
+  function toneless(s) { return s.normalize("NFD").replace(/[̀-ͯ]/g, ""); }
+  function shardKey(t) {
+    if (HAN.test(t[0])) return "u" + (t.codePointAt(0) >> 6).toString(16).padStart(3, "0");
+    var head = toneless(t).toLowerCase().replace(/[^a-z0-9]/g, "").slice(0, 2);
+    return head ? (head + "__").slice(0, 2) : "__";
+  }
+  function tokens(q) {
+    var out = [];
+    (q.toLowerCase().match(/\p{L}+/gu) || []).forEach(function (w) {
+      if (HAN.test(w[0])) Array.from(w).forEach(function (c) { if (HAN.test(c)) out.push(c); });
+      else if (w.length > 1) out.push(w);
+    });
+    return out.filter(function (t, i) { return out.indexOf(t) === i; });
+  }
+
+  // doc id -> best score of any indexed term starting with `tok` (exact Han match for characters)
+  function hits(tok, manifest) {
+    var key = shardKey(tok);
+    if (manifest.shards.indexOf(key) < 0) return Promise.resolve({});
+    return get("t-" + key + ".json").then(function (shard) {
+      var best = {};
+      Object.keys(shard || {}).forEach(function (term) {
+        if (HAN.test(tok) ? term !== tok : term.lastIndexOf(tok, 0) !== 0) return;
+        var bonus = term === tok ? 2 : 1;
+        shard[term].forEach(function (p) { best[p[0]] = Math.max(best[p[0]] || 0, p[1] * bonus); });
+      });
+      return best;
+    });
+  }
+
+  function search(q) {
+    var toks = tokens(q);
+    if (!toks.length) { list.innerHTML = ""; return Promise.resolve(); }
+    return get("manifest.json").then(function (manifest) {
+      return Promise.all(toks.map(function (t) { return hits(t, manifest); })).then(function (per) {
+        var total = {};
+        Object.keys(per[0]).forEach(function (id) {
+          if (per.every(function (h) { return id in h; })) {
+            total[id] = per.reduce(function (s, h) { return s + h[id]; }, 0);
+          }
+        });
+        var ids = Object.keys(total).map(Number)
+          .sort(function (a, b) { return total[b] - total[a] || b - a; }).slice(0, 30);
+        var chunks = ids.map(function (id) { return Math.floor(id / manifest.doc_chunk); })
+          .filter(function (c, i, a) { return a.indexOf(c) === i; });
+        return Promise.all(chunks.map(function (c) { return get("docs-" + c + ".json"); })).then(function (rows) {
+          var byId = {};
+          rows.forEach(function (r) { (r || []).forEach(function (d) { byId[d[0]] = d; }); });
+          render(ids.map(function (id) { return byId[id]; }).filter(Boolean), q);
+        });
+      });
+    });
+  }
+
+  function render(docs, q) {
+    list.innerHTML = "";
+    if (!docs.length) {
+      list.innerHTML = '<li class="muted">No episodes match “' + q.replace(/[<&]/g, "") + '”.</li>';
+      return;
+    }
+    docs.forEach(function (d) {
+      var li = document.createElement("li"), a = document.createElement("a"), p = document.createElement("div");
+      a.href = d[2]; a.textContent = d[1];
+      p.className = "muted"; p.textContent = d[3] + " · " + d[6];
+      li.appendChild(a); li.appendChild(p); list.appendChild(li);
+    });
+  }
+
+  var timer;
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      history.replaceState(null, "", input.value ? "?q=" + encodeURIComponent(input.value) : location.pathname);
+      search(input.value);
+    }, 150);
+  });
+  var initial = new URLSearchParams(location.search).get("q");
+  if (initial) { input.value = initial; search(initial); }
+})();
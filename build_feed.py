@@ -9,6 +9,9 @@ from email.utils import format_datetime
 import yaml
 import markdown
 
+from chengyu.catalog import parse_front_matter
+from chengyu.mp3info import duration_seconds, format_duration
+
 ROOT = Path(__file__).resolve().parent
 POSTS_DIR = ROOT / "_posts"
 EPISODES_DIR = ROOT / "episodes"
@@ -51,24 +54,6 @@ def abs_url(site_url: str, baseurl: str, path: str) -> str:
         path = "/" + path
     return f"{site_url}{baseurl}{path}"
 
-def parse_front_matter(md_path: Path):
-    """Return (front_matter_dict, body_md_str)."""
-    text = md_path.read_text(encoding="utf-8")
-    if not text.startswith("---"):
-        return {}, text
-    end = text.find("\n---", 3)
-    if end == -1:
-        return {}, text
-    fm_text = text[4:end]
-    body = text[end+4:]
-    if body.startswith("\n"):
-        body = body[1:]
-    try:
-        fm = yaml.safe_load(fm_text) or {}
-    except Exception:
-        fm = {}
-    return fm, body
-
 def md_file_to_folder(md_path: Path) -> str:
     date = md_path.name[:10]
     slug = md_path.stem[11:]
@@ -102,6 +87,21 @@ def file_size_bytes_from_audio_url(audio_url: str, folder: str) -> int | None:
             return None
     return None
 
+def audio_duration(fm: dict, audio_url: str, folder: str) -> str | None:
+    """itunes:duration (HH:MM:SS): front matter first, else parse a repo-hosted MP3."""
+    if fm.get("audio_duration") is not None:
+        try:
+            return format_duration(float(fm["audio_duration"]))
+        except Exception:
+            pass
+    m = re.search(r"/episodes/.*\.mp3$", audio_url or "")
+    if m and (ROOT / m.group(0).lstrip("/")).exists():
+        try:
+            return format_duration(duration_seconds(ROOT / m.group(0).lstrip("/")))
+        except Exception:
+            return None
+    return None
+
 def compute_pub_dt(md_path: Path, fm: dict) -> datetime:
     """
     Return a timezone-aware UTC datetime for this episode.
@@ -234,7 +234,7 @@ def main():
 
         title = fm.get("title", md.stem)
         desc_short = fm.get("description", "")  # used as bold intro at top of notes
-        cover = fm.get("cover_image")
+        cover = fm.get("cover_image_large") or fm.get("cover_image")  # 3000 px derivative when present
         audio_url = fm.get("audio_url", "")
 
         date = md.name[:10]
@@ -284,15 +284,25 @@ def main():
         if audio_abs:
             length_attr = f' length="{enclosure_len}"' if (enclosure_len is not None) else ""
             item.append(f'    <enclosure url="{audio_abs}" type="audio/mpeg"{length_attr} />')
+            duration = audio_duration(fm, audio_url, folder)
+            if duration:
+                item.append(f"    <itunes:duration>{duration}</itunes:duration>")
 
         # keep a short itunes:summary from description only
         if desc_short:
             item.append(f"    <itunes:summary>{html.escape(desc_short)}</itunes:summary>")
 
-        # podcast:transcript
+        # podcast:transcript (timed WebVTT first, apps pick the first they support) + podcast:chapters
+        ep_dir = EPISODES_DIR / folder
+        if (ep_dir / "transcript.vtt").exists():
+            vtt_abs = abs_url(cfg["site_url"], cfg["baseurl"], f"/episodes/{folder}/transcript.vtt")
+            item.append(f'    <podcast:transcript url="{vtt_abs}" type="text/vtt" />')
         if tx:
             tx_abs = abs_url(cfg["site_url"], cfg["baseurl"], f"/episodes/{folder}/transcript.txt")
             item.append(f'    <podcast:transcript url="{tx_abs}" type="text/plain" />')
+        if (ep_dir / "chapters.json").exists():
+            ch_abs = abs_url(cfg["site_url"], cfg["baseurl"], f"/episodes/{folder}/chapters.json")
+            item.append(f'    <podcast:chapters url="{ch_abs}" type="application/json+chapters" />')
 
         item.append("  </item>")
         items_data.append((pub_dt, "\n".join(item)))
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# build_site.py — render the Pages site (episode pages, index, archive) without Jekyll
+# Requirements: PyYAML, Markdown  (pip install pyyaml markdown)
+#
+# Python equivalents of _layouts/default.html, _layouts/post.html and
+# _includes/cover-picture.html, so the output matches the Jekyll build. Incremental:
+#   - every page has an input key (sha256 of this file, _config.yml and the
+#     page's own inputs) recorded in _site/.build-manifest.json; a page whose
+#     key is unchanged and whose output still exists is not re-rendered;
+#   - static files (episodes/, assets/, podcast.xml) are hardlinked, not copied;
+#   - outputs of posts that disappeared are removed;
+#   - the search index under search/ is updated per episode (chengyu/search.py);
+#   - the episode list is paginated into listing/page-<n>.json (page 0 = oldest, so
+#     publishing only touches the newest page); index.html embeds the newest
+#     episodes and assets/js/listing.js loads older pages on scroll.
+# Build time scales with the change set (restore _site from a cache between runs).
+#
+#   python build_site.py            # incremental build into _site/
+#   python build_site.py --clean    # from scratch
+
+import os, sys, json, html, shutil, hashlib, argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from urllib.parse import quote
+import yaml
+import markdown
+
+from chengyu import search
+from chengyu.catalog import parse_front_matter, repo_audio_path
+from chengyu.mp3info import duration_seconds
+
+ROOT = Path(__file__).resolve().parent
+POSTS_DIR = ROOT / "_posts"
+OUT_DIR = ROOT / "_site"
+MANIFEST = ".build-manifest.json"
+STATIC = ["assets", "episodes", "podcast.xml"]  # copied (hardlinked) verbatim
+PAGE_SIZE = 12  # episodes per listing/page-<n>.json
+
+TEMPLATE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+# ---------- config / helpers ----------
+
+def load_config() -> dict:
+    cfg_path = ROOT / "_config.yml"
+    data = {}
+    if cfg_path.exists():
+        try:
+            data = yaml.safe_load(cfg_path.read_text(encoding="utf-8")) or {}
+        except Exception:
+            data = {}
+    return {
+        "title":       data.get("title", "Chengyu Bites"),
+        "description": data.get("description", ""),
+        "author":      data.get("author", "Chengyu Bites"),
+        "site_url":    (data.get("url", "") or "").rstrip("/"),
+        "baseurl":     (data.get("baseurl", "") or "").rstrip("/"),
+        "cover_image": data.get("cover_image"),
+        "logo":        data.get("logo") or data.get("cover_image"),
+        "future":      bool(data.get("future", False)),
+        "page_size":   int(data.get("listing_page_size") or PAGE_SIZE),
+        "year":        datetime.now(timezone.utc).year,  # footer
+    }
+
+def relative_url(cfg: dict, path: str) -> str:
+    if not path or path.startswith(("http://", "https://", "//")):
+        return path or ""
+    return cfg["baseurl"] + ("" if path.startswith("/") else "/") + path
+
+def absolute_url(cfg: dict, path: str) -> str:
+    url = relative_url(cfg, path)
+    return url if url.startswith(("http://", "https://")) else cfg["site_url"] + url
+
+def esc(s) -> str:
+    return html.escape(str(s or ""), quote=True)
+
+def post_date(md: Path, fm: dict) -> datetime:
+    """Front-matter date (the formats the publisher and older posts use), else the filename date."""
+    d = fm.get("date")
+    if isinstance(d, datetime):
+        return d if d.tzinfo else d.replace(tzinfo=timezone.utc)
+    for fmt in ("%Y-%m-%d %H:%M:%S %z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            dt = datetime.strptime(str(d).strip(), fmt)
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return datetime.strptime(md.name[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+def load_posts(cfg: dict) -> list:
+    """Posts newest first (like site.posts), future-dated ones skipped unless `future: true`."""
+    now = datetime.now(timezone.utc)
+    posts = []
+    for md in sorted(POSTS_DIR.glob("*.md")):
+        raw = md.read_bytes()
+        fm, body = parse_front_matter(md)
+        date = post_date(md, fm)
+        if not cfg["future"] and date > now:
+            continue
+        y, m, d = md.name[:10].split("-")
+        slug = md.stem[11:]
+        posts.append({"md": md, "raw": raw, "fm": fm, "body": body, "date": date,
+                      "path": f"{y}/{m}/{d}/{slug}.html", "url": f"/{y}/{m}/{d}/{quote(slug)}.html"})
+    posts.sort(key=lambda p: (p["date"], p["md"].name), reverse=True)
+    return posts
+
+def render_markdown(md_text: str) -> str:
+    # kramdown GFM equivalents: tables, raw HTML, hard line breaks
+    return markdown.markdown(md_text or "", extensions=["extra", "sane_lists"])  # kramdown hard_wrap: false
+
+# ---------- templates ----------
+
+SPOTIFY_URL = "https://open.spotify.com/show/6p73RXSwV5Ih6KH112v1S5?si=9EUyeX_MS1q-aC-QD6tYdg"
+SPOTIFY_BADGE = ("https://img.shields.io/badge/Listen%20on-Spotify-1ED760"
+                 "?style=for-the-badge&amp;logo=spotify&amp;logoColor=white")
+
+def layout_default(cfg: dict, page: dict, content: str) -> str:
+    """_layouts/default.html"""
+    title = f"{esc(page['title'])} · {esc(cfg['title'])}" if page.get("title") else esc(cfg["title"])
+    og_image = page.get("cover_image") or cfg["cover_image"]
+    desc = page.get("description") or cfg["description"]
+    head = [
+        '<meta charset="utf-8">',
+        f"<title>{title}</title>",
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        f'<link rel="canonical" href="{esc(absolute_url(cfg, page["url"]))}">',
+    ]
+    if og_image:
+        head += [f'<meta property="og:image" content="{esc(absolute_url(cfg, og_image))}">',
+                 '<meta name="twitter:card" content="summary_large_image">',
+                 f'<meta name="twitter:image" content="{esc(absolute_url(cfg, og_image))}">']
+    head += [f'<meta property="og:title" content="{esc(page.get("title") or cfg["title"])}">',
+             f'<meta property="og:url" content="{esc(absolute_url(cfg, page["url"]))}">']
+    if desc:
+        head += [f'<meta name="description" content="{esc(desc)}">',
+                 f'<meta property="og:description" content="{esc(desc)}">']
+    head += [f'<a href="{SPOTIFY_URL}" target="_blank">',  # where default.html has it (browsers move it to <body>)
+             f'  <img src="{SPOTIFY_BADGE}" alt="Listen on Spotify">',
+             '</a>']
+    head.append(f'<link rel="stylesheet" href="{esc(relative_url(cfg, "/assets/css/site.css"))}">')
+    return f"""<!doctype html>
+<html lang="en">
+  <head>
+    {chr(10).join("    " + h for h in head).lstrip()}
+  </head>
+  <body>
+    <header class="site-header">
+  <a class="brand" href="{esc(relative_url(cfg, "/"))}">
+    <img class="site-logo" src="{esc(relative_url(cfg, cfg["logo"] or ""))}" alt="{esc(cfg["title"])} logo"
+      width="40" height="40" decoding="async" loading="eager" />
+    <span class="site-title">{esc(cfg["title"])}</span>
+  </a>
+  <nav class="site-nav">
+    <a href="{esc(relative_url(cfg, "/search.html"))}">Search</a>
+    <a href="{esc(relative_url(cfg, "/archive/"))}">Archive</a>
+    <a href="{esc(relative_url(cfg, "/podcast.xml"))}">Podcast RSS</a>
+  </nav>
+</header>
+
+    <main class="site-main">
+      {content}
+    </main>
+
+    <footer class="site-footer">
+      <hr>
+      <div class="muted">© {cfg["year"]} {esc(cfg["author"])}</div>
+    </footer>
+  </body>
+</html>
+"""
+
+def _srcset(cfg: dict, entries) -> str:
+    return ", ".join(f"{esc(relative_url(cfg, s['src']))} {s['width']}w" for s in entries)
+
+def cover_picture(cfg: dict, fm: dict, sizes: str = "200px", loading: str = "lazy") -> str:
+    """_includes/cover-picture.html"""
+    title, srcset = esc(fm.get("title")), fm.get("cover_srcset") or []
+    if srcset:
+        sources = []
+        for typ in ("image/avif", "image/webp"):
+            entries = [s for s in srcset if s.get("type") == typ]
+            if entries:
+                sources.append(f'<source type="{typ}" sizes="{esc(sizes)}" srcset="{_srcset(cfg, entries)}">')
+        jpg = [s for s in srcset if s.get("type") == "image/jpeg"]
+        return (f'<picture class="episode-cover-pic">{"".join(sources)}'
+                f'<img class="episode-cover" src="{esc(relative_url(cfg, fm.get("cover_image")))}" alt="{title}" '
+                f'sizes="{esc(sizes)}" width="1500" height="1500" loading="{loading}" decoding="async" '
+                f'srcset="{_srcset(cfg, jpg)}"></picture>')
+    if fm.get("cover_image"):
+        return (f'<img class="episode-cover" src="{esc(relative_url(cfg, fm["cover_image"]))}" alt="{title}" '
+                f'loading="{loading}" decoding="async">')
+    return ""
+
+def audio_player(cfg: dict, audio_url: str) -> str:
+    return ('<div class="episode-audio"><audio controls preload="metadata" playsinline>'
+            f'<source src="{esc(relative_url(cfg, audio_url))}" type="audio/mpeg"></audio></div>')
+
+def episode_card(cfg: dict, post: dict) -> str:
+    """One <li> of the index list (index.html)."""
+    fm = post["fm"]
+    desc = f'<div class="episode-desc">{esc(fm["description"])}</div>' if fm.get("description") else ""
+    audio = audio_player(cfg, fm["audio_url"]) if fm.get("audio_url") else ""
+    return (f'<li class="episode-card">{cover_picture(cfg, fm, "(max-width: 560px) 260px, 200px")}'
+            f'<div class="episode-head"><strong class="episode-title">'
+            f'<a href="{esc(relative_url(cfg, post["url"]))}">{esc(fm.get("title"))}</a></strong>{desc}</div>'
+            f"{audio}</li>")
+
+def render_post(cfg: dict, post: dict) -> str:
+    """_layouts/post.html inside default.html"""
+    fm = post["fm"]
+    desc = f"<p><em>{esc(fm['description'])}</em></p>" if fm.get("description") else ""
+    audio = audio_player(cfg, fm["audio_url"]) if fm.get("audio_url") else ""
+    content = f"""<article class="post episode-card post-card">
+  {cover_picture(cfg, fm, "(max-width: 560px) 260px, 200px", loading="eager")}
+  <header class="episode-head">
+    <h1 class="episode-title" style="margin:0 0 .25rem">{esc(fm.get("title"))}</h1>
+    <p class="muted" style="margin:.1rem 0 .6rem">{post["date"].strftime("%B %d, %Y")}</p>
+    {desc}
+  </header>
+  {audio}
+</article>
+
+<div class="post-content" style="margin-top:1rem;">
+  {render_markdown(post["body"])}
+</div>"""
+    return layout_default(cfg, {**fm, "url": post["url"]}, content)
+
+def post_duration(post: dict):
+    """Seconds: front matter first, else parse a repo-hosted MP3."""
+    fm = post["fm"]
+    try:
+        if fm.get("audio_duration") is not None:
+            return round(float(fm["audio_duration"]), 2)
+        local = repo_audio_path(ROOT, fm)
+        return round(duration_seconds(local), 2) if local else None
+    except Exception:
+        return None
+
+def cover_thumb(fm: dict):
+    """Smallest cover derivative (webp before jpeg), else the cover itself."""
+    for typ in ("image/webp", "image/jpeg"):
+        entries = [s for s in fm.get("cover_srcset") or [] if s.get("type") == typ]
+        if entries:
+            return min(entries, key=lambda s: s["width"])["src"]
+    return fm.get("cover_image")
+
+def listing_item(cfg: dict, post: dict) -> dict:
+    fm = post["fm"]
+    return {
+        "title": fm.get("title"), "date": post["date"].strftime("%Y-%m-%d"),
+        "url": relative_url(cfg, post["url"]), "description": fm.get("description"),
+        "cover": relative_url(cfg, cover_thumb(fm)) if cover_thumb(fm) else None,
+        "audio_url": relative_url(cfg, fm["audio_url"]) if fm.get("audio_url") else None,
+        "duration": post_duration(post),
+    }
+
+def listing_pages(cfg: dict, posts: list) -> list:
+    """Oldest-first pages of listing items; only the last one changes when an episode is added."""
+    chrono = [listing_item(cfg, p) for p in reversed(posts)]
+    size = cfg["page_size"]
+    return [chrono[i:i + size] for i in range(0, len(chrono), size)]
+
+def embedded_pages(cfg: dict, pages: list) -> list:
+    """Indices of the newest pages index.html renders inline: at least page_size episodes."""
+    out, n = [], 0
+    for k in range(len(pages) - 1, -1, -1):
+        if n >= cfg["page_size"]:
+            break
+        out.append(k)
+        n += len(pages[k])
+    return out
+
+def render_index(cfg: dict, posts: list, pages: list) -> str:
+    embed = embedded_pages(cfg, pages)
+    cards = "\n".join(episode_card(cfg, p) for p in posts[:sum(len(pages[k]) for k in embed)])
+    older = min(embed) - 1 if embed else -1
+    more = ""
+    if older >= 0:
+        more = (f'<p id="listing-more" class="muted" data-next="{older}">'
+                f'<a href="{esc(relative_url(cfg, "/archive/"))}">Older episodes</a></p>\n'
+                f'<script src="{esc(relative_url(cfg, "/assets/js/listing.js"))}" '
+                f'data-pages="{esc(relative_url(cfg, "/listing/"))}" defer></script>')
+    return layout_default(cfg, {"title": cfg["title"], "url": "/"},
+                          f'<h2>Episodes</h2>\n\n<ul class="episode-list">\n{cards}\n</ul>\n{more}')
+
+def _archive_list(cfg: dict, posts: list) -> str:
+    out, month = [], None
+    for p in posts:
+        label = p["date"].strftime("%B %Y")
+        if label != month:
+            if month:
+                out.append("</ul>")
+            out.append(f"<h3>{label}</h3>\n<ul class=\"archive-list\">")
+            month = label
+        out.append(f'<li><span class="muted">{p["date"].strftime("%b %d")}</span> '
+                   f'<a href="{esc(relative_url(cfg, p["url"]))}">{esc(p["fm"].get("title"))}</a></li>')
+    if month:
+        out.append("</ul>")
+    return "\n".join(out)
+
+def render_archive(cfg: dict, posts: list, years: list) -> str:
+    links = " · ".join(f'<a href="{esc(relative_url(cfg, f"/archive/{y}/"))}">{y}</a>' for y in years)
+    return layout_default(cfg, {"title": "Archive", "url": "/archive/"},
+                          f"<h2>Archive</h2>\n<p>{links}</p>\n{_archive_list(cfg, posts)}")
+
+def render_archive_year(cfg: dict, year: int, posts: list) -> str:
+    return layout_default(cfg, {"title": f"Archive {year}", "url": f"/archive/{year}/"},
+                          f"<h2>{year}</h2>\n{_archive_list(cfg, posts)}")
+
+def render_search(cfg: dict) -> str:
+    content = f"""<h2>Search</h2>
+<input id="q" type="search" placeholder="对牛弹琴 · dui niu · ears" autocomplete="off" autofocus
+  style="width:100%;padding:.5rem;font-size:1.1rem">
+<ul id="results" class="archive-list"></ul>
+<script src="{esc(relative_url(cfg, "/assets/js/search.js"))}" data-index="{esc(relative_url(cfg, "/search/"))}" defer></script>"""
+    return layout_default(cfg, {"title": "Search", "url": "/search.html"}, content)
+
+# ---------- incremental build ----------
+
+def _key(*parts) -> str:
+    h = hashlib.sha256(TEMPLATE_VERSION.encode())
+    for p in parts:
+        h.update(b"\0")
+        h.update(p if isinstance(p, bytes) else json.dumps(p, sort_keys=True, ensure_ascii=False,
+                                                           default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def _listing_inputs(posts: list) -> list:
+    keep = ("title", "description", "cover_image", "cover_srcset", "audio_url")
+    return [[p["url"], p["date"].isoformat(), {k: p["fm"].get(k) for k in keep}] for p in posts]
+
+def _link(src: Path, dest: Path) -> bool:
+    """Hardlink src to dest unless it's already that file. Returns True if dest changed."""
+    if dest.exists():
+        if os.path.samefile(src, dest):
+            return False
+        a, b = src.stat(), dest.stat()
+        if a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns:
+            return False  # an earlier copy (cross-device fallback or restored cache)
+        dest.unlink()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+    return True
+
+class Builder:
+    def __init__(self, out: Path, cfg: dict, clean: bool = False):
+        self.out, self.cfg = out, cfg
+        if clean:
+            shutil.rmtree(out, ignore_errors=True)
+        out.mkdir(parents=True, exist_ok=True)
+        try:
+            self.old = json.loads((out / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.old = {}
+        self.pages, self.static = {}, []
+        self.rendered = self.skipped = self.linked = 0
+
+    def page(self, rel: str, inputs, render):
+        key = _key(self.cfg, inputs)
+        self.pages[rel] = key
+        dest = self.out / rel
+        if self.old.get("pages", {}).get(rel) == key and dest.exists():
+            self.skipped += 1
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + ".part")
+        tmp.write_text(render(), encoding="utf-8")
+        os.replace(tmp, dest)
+        self.rendered += 1
+
+    def copy_static(self, names):
+        for name in names:
+            src = ROOT / name
+            files = [src] if src.is_file() else sorted(p for p in src.rglob("*") if p.is_file()) if src.is_dir() else []
+            for f in files:
+                rel = f.relative_to(ROOT).as_posix()
+                self.static.append(rel)
+                self.linked += _link(f, self.out / rel)
+
+    def finish(self) -> int:
+        """Drop outputs of the previous build that this one no longer produces; write the manifest."""
+        current = set(self.pages) | set(self.static)
+        stale = [rel for rel in [*self.old.get("pages", {}), *self.old.get("static", [])] if rel not in current]
+        for rel in stale:
+            p = self.out / rel
+            if p.exists():
+                p.unlink()
+            for d in p.parents:  # prune emptied dirs
+                if d == self.out or any(d.iterdir()):
+                    break
+                d.rmdir()
+        (self.out / MANIFEST).write_text(json.dumps(
+            {"template": TEMPLATE_VERSION, "pages": self.pages, "static": sorted(self.static)},
+            ensure_ascii=False, indent=1), encoding="utf-8")
+        return len(stale)
+
+# ---------- main build ----------
+
+def build(out: Path = OUT_DIR, clean: bool = False) -> Builder:
+    cfg = load_config()
+    posts = load_posts(cfg)
+    b = Builder(out, cfg, clean=clean)
+
+    for p in posts:
+        b.page(p["path"], [p["url"], p["raw"]], lambda p=p: render_post(cfg, p))
+
+    pages = listing_pages(cfg, posts)
+    for k, items in enumerate(pages):
+        b.page(f"listing/page-{k}.json", items, lambda items=items: json.dumps(items, ensure_ascii=False))
+    manifest = {"page_size": cfg["page_size"], "pages": len(pages), "total": len(posts)}
+    b.page("listing/manifest.json", manifest, lambda: json.dumps(manifest))
+    embed = embedded_pages(cfg, pages)
+    b.page("index.html", [_listing_inputs(posts[:sum(len(pages[k]) for k in embed)]), len(pages)],
+           lambda: render_index(cfg, posts, pages))
+
+    listing = _listing_inputs(posts)
+    years = sorted({p["date"].year for p in posts}, reverse=True)
+    b.page("archive/index.html", [listing, years], lambda: render_archive(cfg, posts, years))
+    for y in years:
+        in_year = [p for p in posts if p["date"].year == y]
+        b.page(f"archive/{y}/index.html", _listing_inputs(in_year), lambda y=y, ps=in_year: render_archive_year(cfg, y, ps))
+
+    b.page("search.html", [], lambda: render_search(cfg))
+
+    b.copy_static(STATIC)
+    removed = b.finish()
+    idx = search.update(out / "search", ROOT, [
+        {"folder": p["md"].stem, "url": relative_url(cfg, p["url"]), "date": p["date"].isoformat(),
+         "fm": p["fm"], "body": p["body"]} for p in posts])
+    print(f"Site: {b.rendered} page(s) rendered, {b.skipped} unchanged, "
+          f"{b.linked} static file(s) linked, {removed} stale output(s) removed → {out}/")
+    print(f"Search: {idx['changed']} episode(s) re-indexed, {idx['shards_written']} of {idx['shards']} shard(s) written")
+    return b
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render the Pages site incrementally (see header).")
+    ap.add_argument("--out", type=Path, default=OUT_DIR)
+    ap.add_argument("--clean", action="store_true", help="rebuild everything")
+    a = ap.parse_args(argv)
+    build(a.out.resolve(), clean=a.clean)
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print("Failed to build site:", e)
+        sys.exit(1)
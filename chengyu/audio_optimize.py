@@ -0,0 +1,160 @@
+# chengyu/audio_optimize.py
+"""
+Post-TTS audio pass: a smaller MP3 with proper tags.
+
+    out = optimize(mp3, title="对牛弹琴 (duì niú tán qín)", show="Chengyu Bites",
+                   cues=cues, cover=thumb_jpeg, bitrate=48)
+    out["mp3"], out["cues"], out["stats"]
+
+1) trim    leading/trailing silence, whole frames at a time, judged by the
+           Layer III global_gain (mp3info.frame_gains; nothing is decoded).
+           TRIM_PAD s of room tone stay at each end and the cues move with
+           the audio.
+2) encode  mono at `bitrate` kbps through a pluggable encoder: a name from
+           ENCODERS ("ffmpeg", "lame"; must be on PATH) or any callable
+           (mp3 bytes, kbps) -> mp3 bytes. Skipped when the encoder is
+           missing, the input is already mono at or below the bitrate, or the
+           result isn't smaller.
+3) tag     ID3v2.3: TIT2 title, TPE1/TALB show, TCON Podcast, TYER, TLEN,
+           APIC (the 300 px cover JPEG) and CTOC/CHAP chapter frames built
+           from the cues' sections (chengyu.chapters).
+
+Everything stays in memory (encoders run on pipes); an episode is ~1.5 MB of
+TTS output going in and roughly a third of that coming out at 48 kbps. The
+publisher reads audio_bytes/audio_duration off the result as usual.
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from . import chapters, metrics, mp3info
+
+DEFAULT_BITRATE = 48      # kbps, mono speech
+TRIM_PAD = 0.3            # seconds of room tone kept before the first / after the last loud frame
+QUIET_STEPS = 20          # global_gain steps (1.5 dB each) below the speech level that count as silence
+ENCODE_TIMEOUT = 120
+
+Encoder = Callable[[bytes, int], bytes]
+
+# argv per encoder for (kbps); input and output MP3 on stdin/stdout
+ENCODERS: Dict[str, Callable[[int], List[str]]] = {
+    "ffmpeg": lambda kbps: ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+                            "-map_metadata", "-1", "-ac", "1", "-c:a", "libmp3lame", "-b:a", f"{kbps}k",
+                            "-write_xing", "0", "-id3v2_version", "0", "-f", "mp3", "pipe:1"],
+    "lame": lambda kbps: ["lame", "--quiet", "--mp3input", "-m", "m", "--cbr", "-b", str(kbps), "-t", "-", "-"],
+}
+
+def _pipe(argv: Callable[[int], List[str]]) -> Encoder:
+    def encode(mp3: bytes, kbps: int) -> bytes:
+        cmd = argv(kbps)
+        p = subprocess.run(cmd, input=mp3, capture_output=True, timeout=ENCODE_TIMEOUT)
+        if p.returncode != 0:
+            raise RuntimeError(f"{cmd[0]} exited with {p.returncode}: "
+                               f"{p.stderr.decode('utf-8', 'replace').strip()[-300:]}")
+        return p.stdout
+    return encode
+
+def resolve_encoder(encoder: Union[str, Encoder, None]) -> Tuple[Optional[Encoder], str]:
+    """(encode function, name); (None, reason) when it can't run here."""
+    if callable(encoder):
+        return encoder, getattr(encoder, "__name__", "custom")
+    if not encoder:
+        return None, "none"
+    if encoder not in ENCODERS:
+        raise ValueError(f"unknown encoder {encoder!r}; known: {sorted(ENCODERS)}")
+    if shutil.which(ENCODERS[encoder](0)[0]) is None:
+        return None, f"{encoder} not found"
+    return _pipe(ENCODERS[encoder]), encoder
+
+# ---------- trimming ----------
+
+def trim(frames: bytes, pad: float = TRIM_PAD) -> Tuple[bytes, float]:
+    """(frames, seconds cut from the start): bare MPEG frames without the silent head and tail."""
+    gains = mp3info.frame_gains(frames)
+    if not gains:
+        return frames, 0.0
+    speech = sorted(g for _, _, g in gains)[len(gains) * 9 // 10]  # loud end of the level distribution
+    loud = [k for k, (_, _, g) in enumerate(gains) if g > speech - QUIET_STEPS]
+    info = mp3info.mp3_info(frames)
+    frame_s = info.duration / len(gains)
+    keep = int(round(pad / frame_s))
+    a = max(0, loud[0] - keep)
+    b = min(len(gains), loud[-1] + 1 + keep)
+    start, end = gains[a][0], gains[b - 1][0] + gains[b - 1][1]
+    return frames[start:end], a * frame_s
+
+# ---------- ID3v2.3 ----------
+
+def _syncsafe(n: int) -> bytes:
+    return bytes((n >> s) & 0x7F for s in (21, 14, 7, 0))
+
+def _frame(fid: str, data: bytes) -> bytes:
+    return fid.encode("ascii") + len(data).to_bytes(4, "big") + b"\0\0" + data
+
+def _ms(t: float) -> bytes:
+    return int(round(t * 1000)).to_bytes(4, "big")
+
+def _text(fid: str, s: str) -> bytes:
+    try:
+        data = b"\0" + s.encode("latin-1")
+    except UnicodeEncodeError:
+        data = b"\1" + s.encode("utf-16")  # with BOM; v2.3 has no UTF-8
+    return _frame(fid, data)
+
+def id3_tag(*, title: str, show: str, year: str = "", duration: Optional[float] = None,
+            cover: Optional[bytes] = None, sections: Sequence[Tuple[str, float, float]] = ()) -> bytes:
+    """An ID3v2.3 tag; `sections` are (title, start s, end s) chapters."""
+    frames = [_text("TIT2", title), _text("TPE1", show), _text("TALB", show), _text("TCON", "Podcast")]
+    if year:
+        frames.append(_text("TYER", year))
+    if duration:
+        frames.append(_text("TLEN", str(int(duration * 1000))))
+    if cover:
+        frames.append(_frame("APIC", b"\0image/jpeg\0\3\0" + cover))  # 3 = front cover
+    if sections:
+        ids = [f"chp{i}".encode("ascii") for i in range(len(sections[:255]))]
+        frames.append(_frame("CTOC", b"toc\0" + b"\3" + bytes([len(ids)])  # top-level, ordered
+                             + b"".join(i + b"\0" for i in ids)))
+        for cid, (name, start, end) in zip(ids, sections):
+            frames.append(_frame("CHAP", cid + b"\0" + _ms(start) + _ms(end) + b"\xff" * 8  # no byte offsets
+                                 + _text("TIT2", name)))
+    body = b"".join(frames)
+    return b"ID3\3\0\0" + _syncsafe(len(body)) + body
+
+# ---------- the stage ----------
+
+def optimize(src: Union[bytes, str, Path], *, title: str, show: str, cues: Optional[List[dict]] = None,
+             cover: Optional[bytes] = None, date: str = "", bitrate: int = DEFAULT_BITRATE,
+             encoder: Union[str, Encoder, None] = "ffmpeg", trim_silence: bool = True) -> dict:
+    """{"mp3": bytes, "cues": shifted cues (or None), "stats": {...}}; see the module docstring."""
+    buf = src if isinstance(src, (bytes, bytearray)) else Path(src).read_bytes()
+    with metrics.span("audio:optimize", bitrate=bitrate) as sp:
+        frames, _ = mp3info.audio_frames(buf)
+        lead = 0.0
+        if trim_silence:
+            frames, lead = trim(frames)
+        info = mp3info.mp3_info(frames)
+        encode, used = resolve_encoder(encoder)
+        if encode and bitrate and (info.channels > 1 or info.bitrate > bitrate * 1000):
+            encoded, _ = mp3info.audio_frames(encode(frames, bitrate))
+            if len(encoded) < len(frames):
+                frames = encoded
+            else:
+                used = f"{used} (not smaller, kept input)"
+        elif encode:
+            used = f"{used} (input already {info.bitrate // 1000} kbps, {info.channels} ch)"
+        if not encode:
+            print(f"Audio: no re-encode ({used}); trimming and tagging only")
+        duration = mp3info.mp3_info(frames).duration
+        if cues:
+            cues = chapters.shift(cues, -lead, duration)
+        parts = [(name, start, min(end, duration)) for name, start, end in chapters.sections(cues)] if cues else ()
+        out = id3_tag(title=title, show=show, year=str(date)[:4], duration=duration, cover=cover,
+                      sections=parts) + frames
+        stats = {"bytes_in": len(buf), "bytes_out": len(out), "seconds_in": round(mp3info.duration_seconds(buf), 2),
+                 "seconds_out": round(duration, 2), "trimmed_start_s": round(lead, 2), "encoder": used}
+        sp.add(bytes_in=len(buf), bytes_out=len(out))
+        sp.set(encoder=used, trimmed_s=round(stats["seconds_in"] - duration, 2))
+    return {"mp3": out, "cues": cues, "stats": stats}
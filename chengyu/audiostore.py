@@ -0,0 +1,60 @@
+# chengyu/audiostore.py
+"""
+Content-addressed audio store on GitHub Releases.
+
+Every MP3 is an asset named `<sha256>.mp3` on one long-lived release
+(tag `audio-store`), so:
+- the same bytes are uploaded once, whichever episode or retry puts them;
+- URLs are immutable (new audio = new name), safe for podcast-app caching;
+- nothing audio-sized is committed to git, so clones and Pages checkouts
+  stop growing with the episode count.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from . import github
+
+STORE_TAG = "audio-store"
+
+def sha256_of(src: Union[bytes, str, Path]) -> str:
+    if isinstance(src, (bytes, bytearray)):
+        return hashlib.sha256(src).hexdigest()
+    h = hashlib.sha256()
+    with open(src, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ReleaseStore:
+    def __init__(self, repo: str, tag: str = STORE_TAG, gh: Optional[github.GitHub] = None):
+        self.repo, self.tag = repo, tag
+        self._gh = gh
+        self._release = None
+        self._lock = threading.Lock()
+
+    @property
+    def gh(self) -> github.GitHub:
+        return self._gh or github.client()
+
+    def release(self) -> dict:
+        with self._lock:
+            if self._release is None:
+                self._release, _ = self.gh.create_or_get_release(
+                    self.repo, self.tag, name="Audio store",
+                    body="Content-addressed episode audio (assets named by sha256). Managed by chengyu.audiostore.")
+            return self._release
+
+    def url_for(self, sha256: str, ext: str = "mp3") -> str:
+        return f"https://github.com/{self.repo}/releases/download/{self.tag}/{sha256}.{ext}"
+
+    def put(self, src: Union[bytes, str, Path], *, ext: str = "mp3", content_type: str = "audio/mpeg",
+            progress=None) -> dict:
+        """Upload unless already stored. Returns {"sha256","url","asset"}."""
+        digest = sha256_of(src)
+        asset = self.gh.upload_asset(self.release(), src, name=f"{digest}.{ext}",
+                                     content_type=content_type, progress=progress)
+        return {"sha256": digest, "url": asset.get("browser_download_url") or self.url_for(digest, ext),
+                "asset": asset}
@@ -0,0 +1,77 @@
+# chengyu/catalog.py
+# Episode catalog derived from post front matter, plus the one shared
+# front-matter parser/writer (publisher, feed builder and maintenance scripts).
+# Audio fields per episode:
+#   audio_url       where players fetch it (repo path or absolute store URL)
+#   audio_bytes     enclosure length
+#   audio_duration  seconds (float); the feed renders itunes:duration from it
+#   audio_sha256    content address when the file lives in the audio store
+
+import hashlib
+from pathlib import Path
+from typing import Optional, Union
+
+import yaml
+
+def split_front_matter(text: str):
+    """Return (front_matter_dict, body_md_str)."""
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    fm_text = text[4:end]
+    body = text[end+4:]
+    if body.startswith("\n"):
+        body = body[1:]
+    try:
+        fm = yaml.safe_load(fm_text) or {}
+    except Exception:
+        fm = {}
+    return fm, body
+
+def parse_front_matter(md_path: Path):
+    return split_front_matter(Path(md_path).read_text(encoding="utf-8"))
+
+def render_post(fm: dict, body: str) -> str:
+    return "---\n" + yaml.safe_dump(fm, allow_unicode=True, sort_keys=False) + "---\n\n" + body
+
+def write_front_matter(md_path: Path, fm: dict, body: str):
+    Path(md_path).write_text(render_post(fm, body), encoding="utf-8")
+
+def post_folder(md_path: Path) -> str:
+    """_posts/YYYY-MM-DD-slug.md -> YYYY-MM-DD-slug (the episodes/ folder name)."""
+    return Path(md_path).stem
+
+def audio_fields(src: Union[bytes, str, Path], *, sha256: bool = False) -> dict:
+    """audio_bytes / audio_duration (and optionally audio_sha256) for an MP3."""
+    from .mp3info import mp3_info
+
+    buf = src if isinstance(src, (bytes, bytearray)) else Path(src).read_bytes()
+    out = {"audio_bytes": len(buf)}
+    try:
+        out["audio_duration"] = round(mp3_info(buf).duration, 2)
+    except ValueError:
+        pass
+    if sha256:
+        out["audio_sha256"] = hashlib.sha256(buf).hexdigest()
+    return out
+
+def repo_audio_path(root: Path, fm: dict) -> Optional[Path]:
+    """Local file behind a repo-hosted audio URL (/episodes/.../*.mp3), if it exists."""
+    for key in ("audio_repo_url", "audio_url"):
+        url = fm.get(key) or ""
+        if url.startswith("/episodes/") and url.endswith(".mp3"):
+            p = Path(root) / url.lstrip("/")
+            if p.exists():
+                return p
+    return None
+
+def load(root: Union[str, Path] = ".") -> list:
+    """One dict per post (sorted by file name): folder, post path, front matter, body."""
+    root = Path(root)
+    out = []
+    for md in sorted((root / "_posts").glob("*.md")):
+        fm, body = parse_front_matter(md)
+        out.append({"folder": post_folder(md), "post": md, "fm": fm, "body": body})
+    return out
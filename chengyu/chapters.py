@@ -0,0 +1,134 @@
+# chengyu/chapters.py
+"""
+Chapters and timed transcripts from the script's own structure.
+
+The script is cut at its [break Ns] tags into cues. tts.tts_episode()
+synthesises each cue separately and joins the MP3 frames with real silence
+for the breaks, so every cue's start/end is known exactly from frame headers.
+Nothing is decoded or force-aligned afterwards.
+
+Cues are labelled with the script's fixed sections (see gen.py's prompt):
+
+    Intro       "Welcome to …" + teaser
+    The idiom   first cue naming the chengyu
+    Characters  first "字 (pinyin) …" cue after that
+    Origin      the cue that leads into the first 1.5 s break ("Here's the story…")
+    Examples    after the story's closing 1.5 s break
+    Closing     the last cue naming the chengyu
+
+A section whose marker isn't found merges into the one before. From the cues:
+
+    chapters_json()  Podcasting 2.0 JSON chapters   (episodes/<folder>/chapters.json)
+    webvtt()         WebVTT transcript              (episodes/<folder>/transcript.vtt)
+    sections()       (title, start, end) per chapter (ID3 CHAP frames, chengyu.audio_optimize)
+
+A cue is a dict: text, pause (s of silence after it), section, start, end (s).
+"""
+
+import re
+import json
+from typing import List, Tuple
+
+_BREAK = re.compile(r"\[break\s*([0-9.]+)\s*s\]")
+_SENTENCE = re.compile(r"""(?:(?<=[.!?。！？])|(?<=[.!?。！？]['"’”]))\s+""")
+STORY_PAUSE = 1.5
+VTT_MAX_CHARS = 140  # longer cues are split at sentences, timed by length within the cue
+
+def split_script(script: str) -> List[dict]:
+    """Cues between [break] tags; a tag's length becomes the preceding cue's pause."""
+    cues, pos = [], 0
+    for m in _BREAK.finditer(script or ""):
+        text = " ".join(script[pos:m.start()].split())
+        pause = float(m.group(1))
+        if text:
+            cues.append({"text": text, "pause": pause})
+        elif cues:
+            cues[-1]["pause"] += pause
+        pos = m.end()
+    tail = " ".join((script or "")[pos:].split())
+    if tail:
+        cues.append({"text": tail, "pause": 0.0})
+    return cues
+
+def label_sections(cues: List[dict], chengyu: str) -> List[dict]:
+    """Set cue["section"] in place (see module docstring); returns cues."""
+    def first(pred, after=-1):
+        return next((i for i, c in enumerate(cues) if i > after and pred(c)), None)
+
+    ch = "".join((chengyu or "").split())
+    reveal = first(lambda c: ch and ch in c["text"], after=0)
+    chars = first(lambda c: ch and re.search(re.escape(ch[0]) + r"\s*[（(]", c["text"]) and ch not in c["text"],
+                  after=reveal if reveal is not None else 0)
+    story = [i for i, c in enumerate(cues) if c["pause"] >= STORY_PAUSE]
+    origin = story[0] if story else None
+    examples = story[1] + 1 if len(story) > 1 else None
+    named = [i for i, c in enumerate(cues) if ch and ch in c["text"]]
+    closing = named[-1] if named and examples is not None and named[-1] >= examples else None
+
+    starts, last = [], -1
+    for title, i in (("Intro", 0), ("The idiom", reveal), ("Characters", chars), ("Origin", origin),
+                     ("Examples", examples), ("Closing", closing)):
+        if i is not None and i > last and i < len(cues):
+            starts.append((i, title))
+            last = i
+    section = starts[0][1] if starts else "Episode"
+    marks = dict(starts)
+    for i, c in enumerate(cues):
+        section = marks.get(i, section)
+        c["section"] = section
+    return cues
+
+def sections(cues: List[dict]) -> List[Tuple[str, float, float]]:
+    """(title, start, end) per section; a section runs until the next one starts."""
+    out: List[list] = []
+    for c in cues:
+        if not out or c.get("section") != out[-1][0]:
+            if out:
+                out[-1][2] = c["start"]
+            out.append([c.get("section"), c["start"], c["end"]])
+        out[-1][2] = max(out[-1][2], c["end"] + c.get("pause", 0.0))
+    return [tuple(s) for s in out]
+
+def shift(cues: List[dict], by: float, duration: float) -> List[dict]:
+    """Copies of `cues` moved by `by` seconds and clamped to [0, duration] (after trimming)."""
+    clamp = lambda t: round(min(max(t + by, 0.0), duration), 3)
+    return [dict(c, start=clamp(c["start"]), end=clamp(c["end"])) for c in cues]
+
+def chapters_json(cues: List[dict], title: str = "") -> bytes:
+    """Podcasting 2.0 JSON chapters (application/json+chapters)."""
+    chapters = [{"startTime": round(start, 2), "title": name} for name, start, _ in sections(cues)]
+    doc = {"version": "1.2.0", "chapters": chapters}
+    if title:
+        doc["title"] = title
+    return json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _ts(t: float) -> str:
+    ms = int(round(t * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+def _esc(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _lines(c: dict):
+    """(start, end, text) for a cue, long ones split into sentences (timed by share of characters)."""
+    if len(c["text"]) <= VTT_MAX_CHARS:
+        yield c["start"], c["end"], c["text"]
+        return
+    parts = [p for p in _SENTENCE.split(c["text"]) if p.strip()]
+    total = sum(len(p) for p in parts) or 1
+    t = c["start"]
+    for p in parts:
+        d = (c["end"] - c["start"]) * len(p) / total
+        yield t, t + d, p
+        t += d
+
+def webvtt(cues: List[dict]) -> bytes:
+    out = ["WEBVTT", ""]
+    prev = None
+    for c in cues:
+        if c.get("section") != prev:
+            out += [f"NOTE {c['section']}", ""]
+            prev = c.get("section")
+        for start, end, text in _lines(c):
+            out += [f"{_ts(start)} --> {_ts(end)}", _esc(text), ""]
+    return "\n".join(out).encode("utf-8")
@@ -0,0 +1,452 @@
+# chengyu/cli.py
+"""
+`python -m chengyu <command>`: one entry point for the pipeline and the
+maintenance jobs that used to live in notebooks.
+
+    generate          one episode for one show (checkpointed; --resume RUN_ID)
+    shows             several shows/episodes at once (scripts/run_shows.py)
+    publish           publish locally staged episode dirs in one commit
+    backfill-covers   regenerate covers for existing posts
+    backfill-release  sync per-episode releases with the catalog (chengyu/releases.py)
+    optimize-audio    trim, re-encode and tag repo MP3s (chengyu/audio_optimize.py)
+    remove            delete episodes: posts, episode dirs, releases and tags
+    scan              integrity check of episodes/ vs front matter (--prune)
+    feed              build podcast.xml (build_feed.py)
+    site              render _site/ (build_site.py)
+    import-budget     check that `import chengyu.cli` stays cheap
+
+Only the standard library and chengyu.config are imported here; every command
+imports what it needs (openai, PIL, requests, yaml) when it runs, so `--help`,
+cron probes and feed/site builds start without paying for the SDKs.
+`import-budget` enforces that (CI runs it).
+"""
+
+import os
+import sys
+import argparse
+import datetime
+import subprocess
+from pathlib import Path
+
+from .config import POOL_SIZES, settings
+
+HEAVY = ("openai", "PIL", "requests", "yaml", "httpx", "markdown")
+IMPORT_BUDGET_MS = float(os.getenv("CHENGYU_IMPORT_BUDGET_MS", "150"))
+
+def _stamp() -> str:
+    return datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+
+def _git(root: Path, *args):
+    from .utils import run_git
+    return run_git(list(args), cwd=root)
+
+def _commit(root: Path, paths, message: str, push: bool):
+    _git(root, "add", "-A", "--", *[str(p) for p in paths])
+    if subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=root).returncode == 0:
+        print("Nothing to commit.")
+        return
+    _git(root, "commit", "-m", message)
+    if push:
+        _git(root, "push", "origin", f"HEAD:{settings.GITHUB_BRANCH}")
+
+def _posts(root: Path, selectors) -> list:
+    """Catalog entries matching folder names / globs (all when `selectors` is empty)."""
+    import fnmatch
+    from . import catalog
+    eps = catalog.load(root)
+    if not selectors:
+        return eps
+    return [ep for ep in eps if any(fnmatch.fnmatch(ep["folder"], s) or ep["folder"] == s for s in selectors)]
+
+def _episode_data(root: Path, ep: dict) -> dict:
+    """{"chengyu","pinyin","gloss","script",...} from metadata.json, falling back to the post."""
+    import json
+    from .search import idiom_of
+    meta_path = root / "episodes" / ep["folder"] / "metadata.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    chengyu, pinyin = idiom_of(ep["fm"], meta)
+    return {**meta, "chengyu": chengyu, "pinyin": pinyin,
+            "gloss": meta.get("gloss") or ep["fm"].get("description") or "",
+            "script": meta.get("script") or ep["body"]}
+
+# ---------- pipeline ----------
+
+def cmd_generate(a):
+    from . import metrics, shows
+    from .episode import produce_episode
+    from .rundir import RunDir
+
+    show = shows.get(a.show)
+    run = RunDir(Path(a.runs_dir) / show.key, a.resume, resume=bool(a.resume))
+    print(f"Run {run.run_id} ({run.path}); resume with --show {show.key} --resume {run.run_id}")
+    stamp = _stamp()
+    metrics.configure(run.path, report=run.path / f"report-{stamp}.json",
+                      trace=run.path / f"trace-{stamp}.json" if a.trace else None,
+                      run_id=run.run_id, resumed=bool(a.resume), show=show.key,
+                      commit_mode=show.commit_mode, audio_mode=show.audio_mode)
+    produce_episode(show, run)
+    return 0
+
+def cmd_shows(a):
+    from . import metrics, scheduler, shows
+
+    registry = shows.load()
+    keys = a.show or list(registry)
+    missing = [k for k in keys if k not in registry]
+    if missing:
+        raise SystemExit(f"unknown show(s) {missing}; registry has {sorted(registry)}")
+    resume = dict(r.split("=", 1) for r in a.resume)
+
+    root = Path(a.runs_dir)
+    stamp = _stamp()
+    metrics.configure(root, report=root / f"batch-report-{stamp}.json",
+                      trace=root / f"batch-trace-{stamp}.json" if a.trace else None,
+                      shows=keys, episodes=a.episodes)
+
+    pools = scheduler.Pools(**{name: getattr(a, name) for name in POOL_SIZES})
+    outcomes = scheduler.run([registry[k] for k in keys], episodes=a.episodes, concurrency=a.concurrency,
+                             pools=pools, runs_dir=root, resume=resume,
+                             dry_run=a.dry_run or settings.DRY_RUN)
+
+    for o in outcomes:
+        status = "✔" if o.ok else "✘"
+        detail = (o.result or {}).get("folder", "dry run") if o.ok else o.error
+        print(f"{status} {o.show:<12} {o.run_id}  {o.seconds:6.0f}s  {detail}")
+    failed = [o for o in outcomes if not o.ok]
+    for o in failed:
+        print(f"  resume: --resume {o.show}={o.run_id}")
+    return 1 if failed else 0
+
+def _staged_derivatives(d: Path) -> list:
+    import re
+    from .cover_derivatives import DERIVATIVES, MIME
+    fmts = {"jpg": "JPEG", "jpeg": "JPEG", "webp": "WEBP", "avif": "AVIF"}
+    names = {px: name for name, px, _ in DERIVATIVES}
+    out = []
+    for f in sorted(d.glob("cover-*.*")):
+        m = re.fullmatch(r"cover-(\d+)\.(\w+)", f.name)
+        if not m or m.group(2).lower() not in fmts:
+            continue
+        px, fmt = int(m.group(1)), fmts[m.group(2).lower()]
+        out.append({"name": names.get(px, f"w{px}"), "width": px, "format": fmt, "type": MIME[fmt],
+                    "filename": f.name, "bytes": f.read_bytes(), "quality": None})
+    return out
+
+def load_staged_episode(d: Path) -> dict:
+    """A staged episode dir (see scripts/publish_episodes.py) as a publish_episodes() entry."""
+    import re, json
+    meta = json.loads((d / "metadata.json").read_text(encoding="utf-8"))
+    cover = next((d / n for n in ("cover.jpeg", "cover.jpg", "cover.png") if (d / n).exists()), None)
+    if cover is None:
+        raise SystemExit(f"{d}: no cover.jpeg/cover.jpg/cover.png")
+    m = re.match(r"(\d{4}-\d{2}-\d{2})", d.name)
+    body = d / "body.md"
+    audio = d / "audio.mp3"
+    return {
+        "data": meta,
+        "date": meta.get("date") or (m.group(1) if m else None),
+        "body_md": body.read_text(encoding="utf-8") if body.exists() else "",
+        "cover_bytes": cover.read_bytes(),
+        "cover_ext": cover.suffix.lstrip("."),
+        "cover_derivatives": _staged_derivatives(d),
+        "audio_mp3": audio if audio.exists() else None,  # streamed from disk
+    }
+
+def cmd_publish(a):
+    from .publisher import publish_episodes
+
+    episodes = [load_staged_episode(d) for d in sorted(a.dirs)]
+    results = publish_episodes(
+        episodes,
+        show_name=settings.SHOW_NAME,
+        repo=settings.REPO,
+        branch=settings.GITHUB_BRANCH,
+        site_url=settings.SITE_URL,
+        baseurl=settings.BASEURL,
+        publish_time_utc=settings.PUBLISH_TIME_UTC,
+        upload_audio_to_release=a.release,
+        write_audio_to_repo=not a.no_repo_audio,
+        audio_url_preference=a.prefer,
+        dry_run=a.dry_run,
+        commit_mode=a.commit_mode,
+        mirror_dir=settings.MIRROR_DIR or None,
+        max_uploads=a.max_uploads,
+    )
+    for r in results:
+        print(r["folder"], "->", r["audio_url"] or "(no audio)")
+    return 0
+
+# ---------- maintenance (in a checkout) ----------
+
+def cmd_backfill_covers(a):
+    from . import catalog
+    from .cover_flow import make_cover_bytes
+
+    root, touched = Path(a.root), []
+    for ep in _posts(root, a.episodes):
+        ep_dir = root / "episodes" / ep["folder"]
+        if ep["fm"].get("cover_image") and not a.force:
+            continue
+        print(f"Cover: {ep['folder']}")
+        data = _episode_data(root, ep)
+        blob, ext = make_cover_bytes(data, out_format="JPEG", max_bytes=a.max_bytes, attempts=a.attempts)
+        if a.dry_run:
+            print(f"  {len(blob)} bytes (dry run)")
+            continue
+        ep_dir.mkdir(parents=True, exist_ok=True)
+        (ep_dir / f"cover.{ext}").write_bytes(blob)
+        fm = dict(ep["fm"], cover_image=f"/episodes/{ep['folder']}/cover.{ext}")
+        fm.pop("cover_srcset", None)  # derivatives belong to the old cover
+        catalog.write_front_matter(ep["post"], fm, ep["body"])
+        touched += [ep_dir, ep["post"]]
+    if touched and a.commit:
+        _commit(root, touched, f"Backfill covers ({len(touched) // 2})", a.push)
+    return 0
+
+def cmd_backfill_release(a):
+    from . import releases
+
+    root = Path(a.root)
+    rels = releases.fetch(settings.REPO)
+    ops = releases.plan(_posts(root, a.episodes), rels, root=root, prune=a.prune and not a.episodes)
+    print(f"{len(rels)} release(s); {len(ops)} operation(s)" + (" (dry run)" if a.dry_run else ""))
+    done = releases.execute(ops, repo=settings.REPO, parallel=a.parallel, per_minute=a.per_minute,
+                            dry_run=a.dry_run)
+    if a.dry_run:
+        return 0
+    touched = releases.apply(root, done, prefer=a.prefer)
+    if touched and a.commit:
+        _commit(root, touched, f"Backfill release audio ({len(touched)})", a.push)
+    return 1 if any("error" in op.result for op in done) else 0
+
+def cmd_optimize_audio(a):
+    import json
+    from . import catalog, mp3info
+    from .audio_optimize import optimize
+
+    root, touched, saved = Path(a.root), [], 0
+    for ep in _posts(root, a.episodes):
+        src = catalog.repo_audio_path(root, ep["fm"])
+        if src is None:
+            continue
+        buf = src.read_bytes()
+        info = mp3info.mp3_info(buf)
+        if buf[:3] == b"ID3" and info.channels == 1 and info.bitrate <= a.bitrate * 1000 and not a.force:
+            continue  # optimised before: don't re-encode twice
+        ep_dir = root / "episodes" / ep["folder"]
+        data = _episode_data(root, ep)
+        thumb = min((s for s in ep["fm"].get("cover_srcset") or [] if s.get("type") == "image/jpeg"),
+                    key=lambda s: s.get("width", 0), default=None)
+        cover = root / thumb["src"].lstrip("/") if thumb else None
+        # published chapters.json/transcript.vtt are timed against the current audio: keep its start
+        chapters_path = ep_dir / "chapters.json"
+        cues = None
+        if chapters_path.exists():
+            marks = json.loads(chapters_path.read_text(encoding="utf-8")).get("chapters", [])
+            ends = [c["startTime"] for c in marks[1:]] + [info.duration]
+            cues = [{"section": c["title"], "start": c["startTime"], "end": e} for c, e in zip(marks, ends)]
+        out = optimize(buf, title=str(ep["fm"].get("title") or data["chengyu"]),
+                       show=data.get("show") or settings.SHOW_NAME, cues=cues,
+                       cover=cover.read_bytes() if cover and cover.exists() else None,
+                       date=ep["folder"][:10], bitrate=a.bitrate, encoder=a.encoder,
+                       trim_silence=cues is None and not (ep_dir / "transcript.vtt").exists())
+        st = out["stats"]
+        print(f"{ep['folder']}: {st['bytes_in'] / 1e3:,.0f} → {st['bytes_out'] / 1e3:,.0f} kB, "
+              f"{st['seconds_in']:.1f} → {st['seconds_out']:.1f} s ({st['encoder']})"
+              + (" (dry run)" if a.dry_run else ""))
+        if a.dry_run:
+            continue
+        src.write_bytes(out["mp3"])
+        catalog.write_front_matter(ep["post"], dict(ep["fm"], **catalog.audio_fields(out["mp3"])), ep["body"])
+        saved += st["bytes_in"] - st["bytes_out"]
+        touched += [src, ep["post"]]
+    print(f"{len(touched) // 2} file(s) optimised, {saved / 1e6:.2f} MB saved"
+          + ("; run backfill-release to re-upload the release copies" if touched else ""))
+    if touched and a.commit:
+        _commit(root, touched, f"Optimise episode audio ({len(touched) // 2}, -{saved / 1e6:.1f} MB)", a.push)
+    return 0
+
+def cmd_remove(a):
+    import shutil
+    from . import releases
+
+    root = Path(a.root)
+    targets = _posts(root, a.episodes) if a.episodes else _posts(root, [])[-a.last:]
+    if not targets:
+        print("No matching posts.")
+        return 1
+    for ep in targets:
+        print(f"Remove {ep['folder']}" + (" (dry run)" if a.dry_run else ""))
+
+    if settings.GITHUB_TOKEN or os.getenv("GH_TOKEN"):
+        ops = releases.plan(targets, releases.fetch(settings.REPO), root=root, create=False,
+                            remove=[ep["folder"] for ep in targets])
+        done = releases.execute(ops, repo=settings.REPO, parallel=a.parallel, per_minute=a.per_minute,
+                                dry_run=a.dry_run)
+        if any("error" in op.result for op in done):
+            print("Some releases could not be deleted; posts are kept so the command can be re-run.")
+            return 1
+    else:
+        print("No GITHUB_TOKEN; releases and tags are left alone.")
+    if a.dry_run:
+        return 0
+
+    paths = []
+    for ep in targets:
+        ep_dir = root / "episodes" / ep["folder"]
+        shutil.rmtree(ep_dir, ignore_errors=True)
+        ep["post"].unlink(missing_ok=True)
+        paths += [ep_dir, ep["post"]]
+    if a.commit:
+        names = ", ".join(ep["folder"] for ep in targets)
+        _commit(root, paths, f"Remove episode(s): {names}", a.push)
+    return 0
+
+def cmd_scan(a):
+    import json
+    from . import integrity
+
+    root = Path(a.root)
+    report = integrity.scan(root, workers=a.workers)
+    for f in report.findings:
+        size = f" {f.bytes / 1e3:,.0f} kB" if f.bytes else ""
+        print(f"{'✂' if f.prunable else '!'} {f.kind:<17} {f.path}{size}  {f.detail}".rstrip())
+    print(f"{report.files} file(s), {report.total_bytes / 1e6:.1f} MB scanned; "
+          f"{len(report.findings)} finding(s); pruning saves {report.savings / 1e6:.2f} MB")
+    if a.json:
+        Path(a.json).write_text(json.dumps(report.as_dict(), ensure_ascii=False, indent=1), encoding="utf-8")
+    if not a.prune or a.dry_run:
+        return 0
+    changed = integrity.prune(root, report)
+    if changed and a.commit:
+        _commit(root, changed, f"Prune {len(changed)} redundant episode asset(s) "
+                               f"({report.savings / 1e6:.2f} MB)", a.push)
+    return 0
+
+# ---------- builds ----------
+
+def _run_root_script(root: Path, name: str, argv=()):
+    import runpy
+    sys.argv = [name, *argv]
+    sys.path.insert(0, str(root))
+    runpy.run_path(str(root / name), run_name="__main__")
+
+def cmd_feed(a):
+    return _run_root_script(Path(a.root), "build_feed.py")
+
+def cmd_site(a):
+    return _run_root_script(Path(a.root), "build_site.py", ["--clean"] if a.clean else [])
+
+def import_cost(module: str = "chengyu.cli"):
+    """(milliseconds, heavy modules pulled in) for importing `module` in a fresh interpreter."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                       capture_output=True, text=True, check=True)
+    us = 0
+    for line in p.stderr.splitlines():  # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            us = int(parts[1])
+    return us / 1000, [m for m in p.stdout.strip().split(",") if m]
+
+def cmd_import_budget(a):
+    ms, heavy = import_cost()
+    print(f"import chengyu.cli: {ms:.1f} ms (budget {a.budget_ms:g} ms); heavy modules: {heavy or 'none'}")
+    return 1 if heavy or ms > a.budget_ms else 0
+
+# ---------- argument parsing ----------
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m chengyu", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True, metavar="command")
+
+    def add(name, fn, help_):
+        p = sub.add_parser(name, help=help_, description=help_)
+        p.set_defaults(fn=fn)
+        return p
+
+    def checkout(p, selectable=True):
+        p.add_argument("--root", default=".", help="repo checkout (default: cwd)")
+        if selectable:
+            p.add_argument("episodes", nargs="*", help="episode folders or globs (default: all)")
+        p.add_argument("--dry-run", action="store_true", default=settings.DRY_RUN)
+        p.add_argument("--commit", action="store_true", help="commit the changes")
+        p.add_argument("--push", action="store_true", help="push after committing")
+
+    p = add("generate", cmd_generate, "produce one episode for one show")
+    p.add_argument("--show", help="show key from the registry (default: the first show)")
+    p.add_argument("--resume", metavar="RUN_ID", help="continue a previous run from its checkpoints")
+    p.add_argument("--runs-dir", default=settings.RUNS_DIR)
+    p.add_argument("--trace", action="store_true", help="also write a Chrome trace into the run dir")
+
+    p = add("shows", cmd_shows, "episodes for several shows in one process, sharing resource pools")
+    p.add_argument("--show", action="append", help="show key (repeatable; default: every show)")
+    p.add_argument("--episodes", type=int, default=1, help="episodes per show")
+    p.add_argument("--concurrency", type=int, help="episodes in flight (default: 2 per show)")
+    for name, n in POOL_SIZES.items():
+        p.add_argument(f"--{name}", type=int, default=n, help=f"{name} pool size (default {n})")
+    p.add_argument("--resume", action="append", default=[], metavar="SHOW=RUN_ID",
+                   help="continue a failed run as one of that show's episodes")
+    p.add_argument("--runs-dir", default=settings.RUNS_DIR)
+    p.add_argument("--dry-run", action="store_true", help="everything but the commit")
+    p.add_argument("--trace", action="store_true", help="also write a Chrome trace")
+
+    p = add("publish", cmd_publish, "publish staged episode dirs in one commit")
+    p.add_argument("dirs", nargs="+", type=Path, help="staged episode directories")
+    p.add_argument("--release", action="store_true", help="upload MP3s as release assets")
+    p.add_argument("--no-repo-audio", action="store_true", help="don't commit MP3s to the repo")
+    p.add_argument("--prefer", choices=("repo", "release"), default="repo", help="audio_url source")
+    p.add_argument("--commit-mode", choices=("git", "api"), default=settings.COMMIT_MODE)
+    p.add_argument("--max-uploads", type=int, default=4, help="concurrent release uploads")
+    p.add_argument("--dry-run", action="store_true", default=settings.DRY_RUN)
+
+    p = add("backfill-covers", cmd_backfill_covers, "generate covers for posts without one (--force: all)")
+    checkout(p)
+    p.add_argument("--force", action="store_true", help="replace existing covers")
+    p.add_argument("--attempts", type=int, default=4)
+    p.add_argument("--max-bytes", type=int, default=None, help="JPEG byte budget")
+
+    def concurrency(p):
+        p.add_argument("--parallel", type=int, default=4, help="concurrent release operations")
+        p.add_argument("--per-minute", type=float, default=60, help="mutating GitHub requests per minute")
+
+    p = add("backfill-release", cmd_backfill_release,
+            "sync per-episode releases with the catalog: create missing ones, upload missing assets")
+    checkout(p)
+    concurrency(p)
+    p.add_argument("--prune", action="store_true", help="also delete episode releases with no post")
+    p.add_argument("--prefer", choices=("repo", "release"), default="repo", help="audio_url source")
+
+    p = add("optimize-audio", cmd_optimize_audio,
+            "trim silence, re-encode mono at a speech bitrate and write ID3 tags for repo MP3s")
+    checkout(p)
+    p.add_argument("--bitrate", type=int, default=settings.AUDIO_BITRATE or 48, help="kbps (default %(default)s)")
+    p.add_argument("--encoder", default=settings.AUDIO_ENCODER, help="ffmpeg | lame | '' (tags only)")
+    p.add_argument("--force", action="store_true", help="also files that look optimised already")
+
+    p = add("remove", cmd_remove, "delete episodes (posts, episode dirs, releases, tags)")
+    checkout(p)
+    concurrency(p)
+    p.add_argument("--last", type=int, default=1, help="without folders: remove the newest N")
+
+    p = add("scan", cmd_scan, "check episodes/ against front matter; report orphaned, duplicate, mismatched assets")
+    checkout(p, selectable=False)
+    p.add_argument("--prune", action="store_true", help="delete orphaned/unreferenced assets, fix audio_bytes")
+    p.add_argument("--workers", type=int, help="hashing threads")
+    p.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+
+    p = add("feed", cmd_feed, "build podcast.xml")
+    p.add_argument("--root", default=".")
+
+    p = add("site", cmd_site, "render _site/ incrementally")
+    p.add_argument("--root", default=".")
+    p.add_argument("--clean", action="store_true")
+
+    p = add("import-budget", cmd_import_budget, "fail if importing the CLI is slow or pulls in SDKs")
+    p.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    return ap
+
+def main(argv=None) -> int:
+    a = build_parser().parse_args(argv)
+    return a.fn(a) or 0
@@ -13,10 +13,22 @@ class Settings:
     IMAGE_MODEL: str = os.getenv("IMAGE_MODEL", "gpt-image-1")
     #IMAGE_SIZE: int = int(os.getenv("IMAGE_SIZE", "1024"))  # 1024 or 2048 are safe
     IMAGE_SIZE = "1024x1024"   # supported: "1024x1024", "1024x1536", "1536x1024", "auto"
+    IMAGE_TIMEOUT: float = float(os.getenv("IMAGE_TIMEOUT", "120"))   # seconds per image request
+    COVER_DEADLINE: float = float(os.getenv("COVER_DEADLINE", "420"))  # seconds before offline cover fallback
+    COVER_PARALLEL: int = int(os.getenv("COVER_PARALLEL", "1"))  # >1: speculative concurrent cover attempts
+    COVER_MODE: str = os.getenv("COVER_MODE", "retry")           # "retry" | "ladder" (low-quality drafts, then final render)
 
 
     REPO: str = os.getenv("REPO", "kohlenberg/chengyudaily")
     GITHUB_BRANCH: str = os.getenv("GITHUB_BRANCH", "main")
+    COMMIT_MODE: str = os.getenv("COMMIT_MODE", "git")   # "git" (clone+push) | "api" (Git Data API)
+    MIRROR_DIR: str = os.getenv("MIRROR_DIR", "")        # persistent repo mirror shared by dedupe/publish ("" = temp clones)
+    RUNS_DIR: str = os.getenv("RUNS_DIR", ".runs")       # checkpointed pipeline runs (generate_episode.py --resume)
+    AUDIO_MODE: str = os.getenv("AUDIO_MODE", "repo")    # "repo" (repo copy + per-episode release) | "offload" (audio store only)
+    AUDIO_BITRATE: int = int(os.getenv("AUDIO_BITRATE", "0"))  # kbps mono re-encode + trim + ID3 tags (0 = TTS MP3 as is)
+    AUDIO_ENCODER: str = os.getenv("AUDIO_ENCODER", "ffmpeg")   # "ffmpeg" | "lame" | "" (trim + tags only)
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")   # HTTP caches (ETag'd release listings)
+    SHOWS_FILE: str = os.getenv("SHOWS_FILE", "shows.yml")  # show registry (chengyu/shows.py); absent = one show from env
 
     SITE_URL: str = os.getenv("SITE_URL", "https://kohlenberg.github.io")
     BASEURL: str = os.getenv("BASEURL", "/chengyudaily")
@@ -27,5 +39,8 @@ class Settings:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
 
+# default slots per shared resource pool (chengyu.scheduler); `python -m chengyu shows --llm N ...` overrides
+POOL_SIZES = {"llm": 4, "image": 2, "speech": 2, "git": 2}
+
 # export a ready-to-use instance
 settings = Settings()
@@ -1,12 +1,30 @@
+# chengyu/cover.py
+# Offline cover renderer (no image API). Used directly and as the automatic
+# fallback in cover_flow when image generation fails or times out.
+# Static layers (background, frame, show name) are rendered once per
+# (show, size) and cached; per episode only idiom, pinyin and gloss are drawn.
+
 import io, textwrap
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
+BG     = (14, 17, 22)      # "#0e1116"
+FRAME  = (58, 66, 84)
+SHOW   = (180, 200, 255)
+CN     = (255, 255, 255)
+PINYIN = (200, 220, 255)
+GLOSS  = (160, 180, 220)
+
+@lru_cache(maxsize=32)
 def _ensure_font(size: int):
     for cand in [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc",
         "/System/Library/Fonts/PingFang.ttc",
         "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
         "/Library/Fonts/Arial Unicode.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
     ]:
         try:
             return ImageFont.truetype(cand, size)
@@ -14,32 +32,52 @@ def _ensure_font(size: int):
             pass
     return ImageFont.load_default()
 
-def draw_cover_png(show_name: str, chengyu: str, pinyin: str, gloss: str) -> bytes:
-    W = H = 3000
-    bg = "#0e1116"
-    img = Image.new("RGB", (W, H), bg)
+@lru_cache(maxsize=4)
+def _template(show_name: str, size: int) -> Image.Image:
+    """Background + frame + show name. Cached: never mutate, copy() first."""
+    k = size / 3000
+    img = Image.new("RGB", (size, size), BG)
     d = ImageDraw.Draw(img)
+    inset, width = int(90 * k), max(1, int(6 * k))
+    d.rectangle([inset, inset, size - inset, size - inset], outline=FRAME, width=width)
+    d.text((int(150 * k), int(180 * k)), show_name, font=_ensure_font(int(120 * k)), fill=SHOW)
+    return img
 
-    font_show = _ensure_font(120)
-    font_cn   = _ensure_font(440)
-    font_py   = _ensure_font(150)
-    font_gl   = _ensure_font(90)
+def render_cover_image(show_name: str, chengyu: str, pinyin: str, gloss: str, size: int = 3000) -> Image.Image:
+    """Episode cover as a PIL RGB image (size px square)."""
+    k = size / 3000
+    img = _template(show_name, size).copy()
+    d = ImageDraw.Draw(img)
 
-    d.text((150, 180), show_name, font=font_show, fill=(180,200,255))
+    font_cn = _ensure_font(int(440 * k))
+    font_py = _ensure_font(int(150 * k))
+    font_gl = _ensure_font(int(90 * k))
 
     bbox_cn = d.textbbox((0,0), chengyu, font=font_cn)
     w_cn = bbox_cn[2]-bbox_cn[0]; h_cn = bbox_cn[3]-bbox_cn[1]
-    x_cn = (W - w_cn)//2; y_cn = (H - h_cn)//2 - 140
-    d.text((x_cn, y_cn), chengyu, font=font_cn, fill=(255,255,255))
+    x_cn = (size - w_cn)//2; y_cn = (size - h_cn)//2 - int(140 * k)
+    d.text((x_cn, y_cn), chengyu, font=font_cn, fill=CN)
 
     bbox_py = d.textbbox((0,0), pinyin, font=font_py)
     w_py = bbox_py[2]-bbox_py[0]
-    x_py = (W - w_py)//2; y_py = y_cn + h_cn + 60
-    d.text((x_py, y_py), pinyin, font=font_py, fill=(200,220,255))
+    x_py = (size - w_py)//2; y_py = y_cn + h_cn + int(60 * k)
+    d.text((x_py, y_py), pinyin, font=font_py, fill=PINYIN)
 
     gloss_wrapped = textwrap.fill(gloss, width=30)
-    d.multiline_text((150, H-520), gloss_wrapped, font=font_gl, fill=(160,180,220), spacing=12)
+    d.multiline_text((int(150 * k), size - int(520 * k)), gloss_wrapped, font=font_gl, fill=GLOSS,
+                     spacing=int(12 * k))
+    return img
 
+def draw_cover(show_name: str, chengyu: str, pinyin: str, gloss: str,
+               size: int = 1500, out_format: str = "JPEG") -> bytes:
+    """Fast encode: JPEG without optimize passes, or PNG at compress_level=1."""
+    img = render_cover_image(show_name, chengyu, pinyin, gloss, size=size)
     buf = io.BytesIO()
-    img.save(buf, "PNG", optimize=True)
+    if out_format.upper() == "PNG":
+        img.save(buf, "PNG", compress_level=1)
+    else:
+        img.save(buf, "JPEG", quality=85, subsampling=2)
     return buf.getvalue()
+
+def draw_cover_png(show_name: str, chengyu: str, pinyin: str, gloss: str) -> bytes:
+    return draw_cover(show_name, chengyu, pinyin, gloss, size=3000, out_format="PNG")
@@ -0,0 +1,93 @@
+# chengyu/cover_derivatives.py
+# One composite in, every served size out:
+# - 3000 px JPEG for podcast directories, 1500 px JPEG for the feed/site (cover.jpeg)
+# - 600 / 300 px web sizes as JPEG + WebP (+ AVIF when Pillow can write it)
+# Each encode is held to a byte budget; the result carries srcset entries for front matter.
+
+import io
+from PIL import Image, features
+from chengyu.cover_hybrid import encode_jpeg_budget, fit_quality
+
+JPEG, WEBP, AVIF = "JPEG", "WEBP", "AVIF"
+
+MIME = {JPEG: "image/jpeg", WEBP: "image/webp", AVIF: "image/avif"}
+EXT  = {JPEG: "jpg", WEBP: "webp", AVIF: "avif"}
+
+# (name, px, formats)
+DERIVATIVES = (
+    ("directory", 3000, (JPEG,)),
+    ("feed",      1500, (JPEG,)),
+    ("web",        600, (JPEG, WEBP, AVIF)),
+    ("thumb",      300, (JPEG, WEBP, AVIF)),
+)
+
+# byte budgets per (px, format)
+BUDGETS = {
+    (3000, JPEG): 500_000,
+    (1500, JPEG): 220_000,
+    (600, JPEG): 60_000,  (600, WEBP): 40_000,  (600, AVIF): 30_000,
+    (300, JPEG): 20_000,  (300, WEBP): 14_000,  (300, AVIF): 10_000,
+}
+
+def can_write(fmt: str) -> bool:
+    if fmt == AVIF:
+        Image.init()
+        if "AVIF" in Image.SAVE:
+            return True
+        try:
+            import pillow_avif  # noqa: F401  (plugin registers the AVIF encoder)
+            return True
+        except ImportError:
+            return False
+    if fmt == WEBP:
+        return bool(features.check("webp"))
+    return True
+
+def _save(img: Image.Image, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == WEBP:
+        img.save(buf, "WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, "AVIF", quality=quality, speed=6)
+    return buf.getvalue()
+
+def encode_budget(img: Image.Image, fmt: str, max_bytes: int, q_min: int = 40, q_max: int = 90):
+    """Best quality that fits max_bytes. Returns (bytes, quality)."""
+    if fmt == JPEG:
+        data, info = encode_jpeg_budget(img, max_bytes, q_min=q_min, q_max=q_max)
+        return data, info["quality"]
+    data, q, _ = fit_quality(lambda q: _save(img, fmt, q), max_bytes, q_min, q_max)
+    return data, q
+
+def filename_for(name: str, px: int, fmt: str) -> str:
+    # feed size keeps the historical name so cover_image paths do not change
+    if name == "feed" and fmt == JPEG:
+        return "cover.jpeg"
+    return f"cover-{px}.{EXT[fmt]}"
+
+def make_cover_derivatives(cover: Image.Image, *, derivatives=DERIVATIVES, budgets=None) -> list:
+    """
+    Resize/encode every derivative from ONE decoded composite (ideally composed at
+    the largest size). Returns a list of dicts:
+      {"name","width","format","type","filename","bytes","quality"}
+    """
+    budgets = {**BUDGETS, **(budgets or {})}
+    cover = cover.convert("RGB")
+    out = []
+    for name, px, fmts in derivatives:
+        im = cover if cover.size == (px, px) else cover.resize((px, px), Image.LANCZOS)
+        for fmt in fmts:
+            if not can_write(fmt):
+                continue
+            data, q = encode_budget(im, fmt, budgets.get((px, fmt), 10**9))
+            out.append({
+                "name": name, "width": px, "format": fmt, "type": MIME[fmt],
+                "filename": filename_for(name, px, fmt), "bytes": data, "quality": q,
+            })
+    return out
+
+def pick(derivs: list, name: str, fmt: str = JPEG):
+    for d in derivs:
+        if d["name"] == name and d["format"] == fmt:
+            return d
+    return None
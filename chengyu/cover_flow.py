@@ -1,53 +1,345 @@
 # chengyu/cover_flow.py
-# Utilities to generate a cover with hybrid method + "dark-top" safety.
+# Utilities to generate a cover with hybrid method + background quality gates.
+#
+# Gates run on a downsampled copy of the RAW model background, before any
+# resize, overlay or encode — a rejected attempt costs only the image API call.
+# Each gate takes the gate view (mode "RGB") and returns a short reason string
+# when the background should be rejected, else None.
 
-import io
-from PIL import Image
+import io, time, threading
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeout, wait
+from PIL import Image, ImageChops, ImageFilter
 from chengyu.config import settings
-from chengyu.cover_hybrid import generate_cover_hybrid
+from chengyu import metrics
+from chengyu.cover_hybrid import (generate_background, generate_backgrounds, refine_background,
+                                  compose_cover, encode_cover)
 
-def top_too_dark(img_bytes: bytes, frac: float = 0.18, lum_thresh: int = 35, max_ratio: float = 0.16) -> bool:
-    """Detect a very dark top band."""
-    im = Image.open(io.BytesIO(img_bytes)).convert("L")
+GATE_SIZE = 512   # long edge of the gate view (px)
+COVER_MODES = ("retry", "ladder")
+
+def _gate_view(img: Image.Image, size: int = GATE_SIZE) -> Image.Image:
+    """Cheap RGB copy at ~size px (integer box reduce, no resampling filter)."""
+    im = img.convert("RGB")
+    factor = max(1, min(im.width, im.height) // size)
+    return im.reduce(factor) if factor > 1 else im
+
+# ---- gates
+
+def gate_dark_top(im: Image.Image, frac: float = 0.18, lum_thresh: int = 35, max_ratio: float = 0.16):
+    """Very dark band across the top."""
     h = max(1, int(im.height * frac))
-    roi = im.crop((0, 0, im.width, h))
-    hist = roi.histogram()
+    hist = im.crop((0, 0, im.width, h)).convert("L").histogram()
     dark = sum(hist[:max(0, lum_thresh)])
-    total = roi.width * roi.height
-    return (dark / max(1, total)) > max_ratio
+    if dark / max(1, im.width * h) > max_ratio:
+        return "top too dark"
+    return None
+
+def gate_speckle(im: Image.Image, frac: float = 0.18, delta: int = 70, max_ratio: float = 0.006):
+    """
+    Star-like speckles / granular spray in the top band: isolated pixels off their
+    3×3 median in luminance or saturation (gold flecks on paper barely differ in luminance).
+    """
+    h = max(3, int(im.height * frac))
+    roi = im.crop((0, 0, im.width, h))
+    lum = roi.convert("L")
+    sat = roi.convert("HSV").getchannel("S")
+    diff = ImageChops.lighter(ImageChops.difference(lum, lum.filter(ImageFilter.MedianFilter(3))),
+                              ImageChops.difference(sat, sat.filter(ImageFilter.MedianFilter(3))))
+    hist = diff.histogram()
+    spots = sum(hist[delta:])
+    if spots / max(1, im.width * h) > max_ratio:
+        return "speckled top"
+    return None
+
+def gate_latin_text(im: Image.Image, top: float = 0.42, bottom: float = 0.96, ink: int = 90,
+                    min_transitions: float = 0.06, min_rows: int = 6):
+    """
+    Heuristic for stray Latin lettering below the calligraphy: small dark glyphs
+    give many ink/paper transitions per row over several consecutive rows,
+    whereas washes and brush strokes give few.
+    """
+    y0, y1 = int(im.height * top), int(im.height * bottom)
+    roi = im.crop((0, y0, im.width, y1)).convert("L").point(lambda v: 255 if v < ink else 0)
+    W = roi.width
+    px = roi.tobytes()
+    need = max(4, int(W * min_transitions))
+    run = 0
+    for y in range(roi.height):
+        row = px[y*W:(y+1)*W]
+        trans = sum(1 for a, b in zip(row, row[1:]) if a != b)
+        run = run + 1 if trans >= need else 0
+        if run >= min_rows:
+            return "latin-like text"
+    return None
+
+DEFAULT_GATES = (gate_dark_top, gate_speckle, gate_latin_text)
+
+def check_background(img: Image.Image, gates=DEFAULT_GATES):
+    """Run gates on the raw background; return the first rejection reason or None."""
+    view = _gate_view(img)
+    for gate in gates:
+        reason = gate(view)
+        if reason:
+            return reason
+    return None
+
+def top_too_dark(img_bytes: bytes, frac: float = 0.18, lum_thresh: int = 35, max_ratio: float = 0.16) -> bool:
+    """Detect a very dark top band in encoded image bytes (kept for notebooks/backfills)."""
+    im = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    return gate_dark_top(im, frac=frac, lum_thresh=lum_thresh, max_ratio=max_ratio) is not None
+
+class _Abandoned(Exception):
+    """The selection was given up by make_cover_image (deadline passed); stop spending."""
+
+def _check(cancel: threading.Event | None, end: float | None):
+    """Raise _Abandoned once the caller has cancelled or the deadline has passed."""
+    if (cancel is not None and cancel.is_set()) or (end is not None and time.monotonic() >= end):
+        raise _Abandoned()
+
+def _bg_kwargs(data: dict, quality: str = "medium", end: float | None = None) -> dict:
+    return dict(
+        chengyu=data["chengyu"],
+        pinyin=data["pinyin"],
+        english=data["gloss"],
+        story=data["script"],
+        model=getattr(settings, "IMAGE_MODEL", "gpt-image-1"),
+        size=getattr(settings, "IMAGE_SIZE", "1024x1024"),
+        quality=quality,
+        timeout=getattr(settings, "IMAGE_TIMEOUT", None),
+        deadline=None if end is None else max(1.0, end - time.monotonic()),  # retries stay inside the selection
+    )
+
+# ---- per-rung stats (latency per API call, acceptance rate)
 
-def make_cover_bytes(
+def _rung(stats: dict, name: str) -> dict:
+    return stats.setdefault("rungs", {}).setdefault(name, {"calls": 0, "accepted": 0, "latency_s": []})
+
+def _timed(rung: dict, fn, **kw):
+    t0 = time.perf_counter()
+    try:
+        return fn(**kw)
+    finally:
+        rung["latency_s"].append(round(time.perf_counter() - t0, 3))
+
+def _print_rungs(stats: dict) -> None:
+    for name, r in stats.get("rungs", {}).items():
+        lat = r["latency_s"]
+        avg = sum(lat) / len(lat) if lat else 0.0
+        rate = r["accepted"] / r["calls"] if r["calls"] else 0.0
+        print(f"Cover rung {name}: {r['calls']} image(s), {r['accepted']} accepted ({rate:.0%}), "
+              f"{len(lat)} call(s) avg {avg:.1f}s")
+
+# ---- background sources (yield raw backgrounds, one per attempt)
+
+def _serial_backgrounds(data: dict, attempts: int, quality: str, rung: dict, cancel=None, end=None):
+    for _ in range(attempts):
+        _check(cancel, end)
+        try:
+            bg = _timed(rung, generate_background, **_bg_kwargs(data, quality, end))
+        except Exception as e:
+            # a failed request is a failed attempt, like a rejected one
+            print(f"Background request failed: {e}")
+            bg = None
+        yield bg
+
+def _batched_backgrounds(data: dict, attempts: int, k: int, quality: str, rung: dict, cancel=None, end=None):
+    """k images per request (n=k), request after request, until the budget is spent."""
+    left = attempts
+    while left > 0:
+        _check(cancel, end)
+        n = min(k, left)
+        try:
+            bgs = _timed(rung, generate_backgrounds, **_bg_kwargs(data, quality, end), n=n)
+        except Exception as e:
+            print(f"Background request failed: {e}")
+            bgs = [None] * n
+        for bg in bgs:
+            yield bg
+        left -= n
+
+def _parallel_backgrounds(data: dict, attempts: int, k: int, quality: str, rung: dict, cancel=None, end=None):
+    """
+    Keep up to k single-image requests in flight; yield backgrounds in completion
+    order. When the consumer stops (first acceptable wins), queued requests are
+    cancelled and in-flight ones are abandoned (their results are discarded).
+    """
+    pool = ThreadPoolExecutor(max_workers=k, thread_name_prefix="cover-bg")
+    pending = set()
+    submitted = 0
+    try:
+        while submitted < attempts or pending:
+            while submitted < attempts and len(pending) < k:
+                _check(cancel, end)
+                pending.add(pool.submit(metrics.bind(_timed), rung, generate_background,
+                                        **_bg_kwargs(data, quality, end)))
+                submitted += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    yield fut.result()
+                except Exception as e:
+                    # a failed request is a failed attempt, like a rejected one
+                    print(f"Background request failed: {e}")
+                    yield None
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _pick_background(data: dict, *, attempts: int, gates, parallel: int, batch_n: bool,
+                     quality: str, rung: dict, label: str = "Attempt", cancel=None, end=None):
+    """Draw backgrounds until one passes the gates. Returns (image, accepted)."""
+    k = max(1, min(parallel, attempts))
+    if k == 1:
+        source = _serial_backgrounds(data, attempts, quality, rung, cancel, end)
+    elif batch_n:
+        source = _batched_backgrounds(data, attempts, k, quality, rung, cancel, end)
+    else:
+        source = _parallel_backgrounds(data, attempts, k, quality, rung, cancel, end)
+
+    last = None
+    try:
+        for i, bg in enumerate(source, start=1):
+            if bg is None:
+                continue
+            last = bg
+            rung["calls"] += 1
+            reason = check_background(bg, gates)
+            if reason is None:
+                rung["accepted"] += 1
+                if i > 1:
+                    print(f"Accepted {label.lower()} {i} (gates ok).")
+                return bg, True
+            metrics.event("cover:rejected", attempt=i, stage=label.lower(), reason=reason)
+            print(f"{label} {i}: {reason} → retrying…")
+    finally:
+        source.close()
+    if last is None:
+        raise RuntimeError("All cover background requests failed")
+    return last, False
+
+def _ladder_background(data: dict, *, attempts: int, gates, parallel: int, batch_n: bool,
+                       draft_quality: str, final_quality: str, final_attempts: int, stats, cancel=None, end=None):
+    """Gate cheap drafts; pay for the final-quality render only for a draft that passed."""
+    draft, ok = _pick_background(data, attempts=attempts, gates=gates, parallel=parallel, batch_n=batch_n,
+                                 quality=draft_quality, rung=_rung(stats, f"draft:{draft_quality}"),
+                                 label="Draft", cancel=cancel, end=end)
+    if not ok:
+        print("Warning: no draft passed the gates; rendering final from the last draft.")
+    final_rung = _rung(stats, f"final:{final_quality}")
+    final = None
+    for j in range(1, max(1, final_attempts) + 1):
+        _check(cancel, end)
+        kw = _bg_kwargs(data, final_quality, end)
+        kw.pop("quality")
+        final = _timed(final_rung, refine_background, draft=draft, quality=final_quality, **kw)
+        final_rung["calls"] += 1
+        reason = check_background(final, gates)
+        if reason is None:
+            final_rung["accepted"] += 1
+            break
+        metrics.event("cover:rejected", attempt=j, stage="final", reason=reason)
+        print(f"Final {j}: {reason} → retrying…")
+    else:
+        print("Warning: final render still rejected; using last image.")
+    return final
+
+def _select_background(data: dict, *, attempts, gates, parallel, batch_n, mode,
+                       draft_quality, final_quality, final_attempts, stats, cancel=None, end=None):
+    if mode == "ladder":
+        return _ladder_background(data, attempts=attempts, gates=gates, parallel=parallel, batch_n=batch_n,
+                                  draft_quality=draft_quality, final_quality=final_quality,
+                                  final_attempts=final_attempts, stats=stats, cancel=cancel, end=end)
+    bg, ok = _pick_background(data, attempts=attempts, gates=gates, parallel=parallel, batch_n=batch_n,
+                              quality="medium", rung=_rung(stats, "medium"), cancel=cancel, end=end)
+    if not ok:
+        print("Warning: background still rejected after retries; using last image.")
+    return bg
+
+def offline_cover_image(data: dict, out_size: int = 1500, show_name: str | None = None) -> Image.Image:
+    """Template-cached local render (chengyu.cover); no API involved."""
+    from chengyu.cover import render_cover_image
+    return render_cover_image(show_name or settings.SHOW_NAME, data["chengyu"], data["pinyin"], data["gloss"],
+                              size=out_size)
+
+@metrics.traced("cover")
+def make_cover_image(
     data: dict,
     *,
     attempts: int = 4,
-    out_format: str = "JPEG",   # "JPEG" (smaller) or "PNG"
     pinyin_y: float = 0.50,
-    english_y: float = 0.78
+    english_y: float = 0.78,
+    gates=DEFAULT_GATES,
+    parallel: int = 1,          # >1: speculative attempts, first acceptable wins
+    batch_n: bool = False,      # with parallel>1: one request with n=parallel instead of k requests
+    mode: str = "retry",        # "retry" | "ladder"
+    draft_quality: str = "low",     # ladder: gated drafts
+    final_quality: str = "medium",  # ladder: render for the accepted draft
+    final_attempts: int = 2,
+    stats: dict | None = None,  # filled with per-rung calls / acceptance / latency
+    out_size: int = 1500,
+    fallback: bool = True,      # offline cover on API error / timeout
+    deadline_s: float | None = None,  # default: settings.COVER_DEADLINE
+    show_name: str | None = None,     # offline cover title (default: settings.SHOW_NAME)
 ):
     """
-    Generate cover bytes for an episode dict using hybrid method.
-    Retries a few times if the top is too dark.
+    Generate the composited cover (PIL RGB, out_size px) for an episode dict using hybrid method.
+    Retries a few times if the raw background fails a gate (dark top, speckles, stray Latin).
+    With parallel=k, up to k backgrounds are requested at once (k requests, or
+    one n=k request with batch_n=True); `attempts` stays the total budget.
+    mode="ladder" spends `attempts` on draft-quality images and only renders
+    final_quality for the draft that passed, then upscales to the output size.
+    A failed request counts as a failed attempt. If every attempt fails or the
+    whole selection exceeds deadline_s, the offline renderer is used instead
+    (fallback=False re-raises); an abandoned selection stops before its next
+    attempt and its image calls are bounded by the same deadline.
+    """
+    if mode not in COVER_MODES:
+        raise ValueError(f"unknown cover mode {mode!r}; expected one of {COVER_MODES}")
+    stats = {} if stats is None else stats
+    stats["mode"] = mode
+    deadline_s = getattr(settings, "COVER_DEADLINE", None) if deadline_s is None else deadline_s
+    # daemon thread: an abandoned selection must not hold up interpreter exit; `cancel`
+    # stops it at the next attempt and `end` bounds the image call in flight
+    cancel = threading.Event()
+    end = time.monotonic() + deadline_s if deadline_s else None
+    fut = Future()
+    select = metrics.bind(_select_background)
+
+    def run():
+        try:
+            fut.set_result(select(data, attempts=attempts, gates=gates, parallel=parallel, batch_n=batch_n,
+                                  mode=mode, draft_quality=draft_quality, final_quality=final_quality,
+                                  final_attempts=final_attempts, stats=stats, cancel=cancel, end=end))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="cover-select", daemon=True).start()
+    try:
+        bg = fut.result(timeout=deadline_s or None)
+    except Exception as e:
+        if not fallback:
+            raise
+        why = f"no background within {deadline_s:g}s" if isinstance(e, FutureTimeout) else f"{type(e).__name__}: {e}"
+        print(f"Image generation unavailable ({why}); using offline cover.")
+        stats["fallback"] = "offline"
+        metrics.event("cover:fallback", reason=why)
+        with metrics.span("cover:offline"):
+            return offline_cover_image(data, out_size=out_size, show_name=show_name)
+    finally:
+        cancel.set()
+    _print_rungs(stats)
+
+    with metrics.span("cover:compose", out_size=out_size):
+        return compose_cover(bg, pinyin=data["pinyin"], english=data["gloss"], out_size=out_size,
+                             pinyin_y=pinyin_y, english_y=english_y)
+
+def make_cover_bytes(data: dict, *, out_format: str = "JPEG", max_bytes: int | None = None, **kw):
+    """
+    Generate cover bytes for an episode dict using hybrid method (see make_cover_image).
+    max_bytes: JPEG byte budget (quality/subsampling searched to fit).
     Returns (bytes, 'jpg'|'png').
     """
-    for i in range(1, attempts + 1):
-        cover = generate_cover_hybrid(
-            chengyu=data["chengyu"],
-            pinyin=data["pinyin"],
-            english=data["gloss"],
-            story=data["script"],
-            model=getattr(settings, "IMAGE_MODEL", "gpt-image-1"),
-            size=getattr(settings, "IMAGE_SIZE", "1024x1024"),
-            quality="medium",
-            out_size=1500,
-            out_format=out_format,
-            pinyin_y=pinyin_y,
-            english_y=english_y,
-        )
-        if not top_too_dark(cover):
-            if i > 1:
-                print(f"Accepted attempt {i} (top ok).")
-            return cover, ("jpg" if out_format.upper() == "JPEG" else "png")
-        print(f"Attempt {i}: top too dark → retrying…")
-
-    print("Warning: top remained dark after retries; using last image.")
-    return cover, ("jpg" if out_format.upper() == "JPEG" else "png")
+    cover = make_cover_image(data, **kw)
+    return (encode_cover(cover, out_format=out_format, max_bytes=max_bytes),
+            "jpg" if out_format.upper() == "JPEG" else "png")
@@ -6,7 +6,8 @@
 import io, re, base64
 from typing import Tuple
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
-from openai import OpenAI
+from chengyu import metrics, openai_client
+from chengyu.config import settings
 
 SUPPORTED_SIZES = {"1024x1024", "1024x1536", "1536x1024", "auto"}
 
@@ -138,11 +139,8 @@ def _paper_backdrop(canvas, xy, text, font, stroke_w, anchor="mm",
 
 # ---- image background with characters
 
-def _ai_bg_with_chars(chengyu: str, pinyin: str, english: str, story: str,
-                      model: str, size: str, quality: str = "medium") -> Image.Image:
-    client = OpenAI()
-    size = _norm_size(size)
-    prompt = f"""
+def _bg_prompt(chengyu: str, pinyin: str, english: str, story: str) -> str:
+    return f"""
 Square podcast cover in traditional Chinese ink painting (shui-mo / sumi-e).
 Paint an evocative scene that reflects this idiom.
 
@@ -162,34 +160,85 @@ Layout & rules (strict):
 - Leave room below the characters for small Latin text additions later.
 - No borders, frames, or watermarks.
 """
-    res = client.images.generate(model=model, prompt=prompt, size=size, quality=quality)
-    return Image.open(io.BytesIO(base64.b64decode(res.data[0].b64_json))).convert("RGBA")
+
+def _deadline(deadline: float | None) -> float | None:
+    """Seconds the call may take, retries included: the caller's budget, else COVER_DEADLINE."""
+    return deadline if deadline is not None else (settings.COVER_DEADLINE or None)
+
+def _ai_bgs_with_chars(chengyu: str, pinyin: str, english: str, story: str,
+                       model: str, size: str, quality: str = "medium", n: int = 1,
+                       timeout: float | None = None, deadline: float | None = None) -> list:
+    size = _norm_size(size)
+    prompt = _bg_prompt(chengyu, pinyin, english, story)
+    with metrics.span("image:generate", model=model, quality=quality, n=n) as sp:
+        res = openai_client.images_generate(model=model, prompt=prompt, size=size, quality=quality, n=n,
+                                             timeout=timeout or 300, deadline=_deadline(deadline))
+        raw = [base64.b64decode(d.b64_json) for d in res.data]
+        metrics.usage(getattr(res, "usage", None))
+        sp.add(bytes_in=sum(map(len, raw)))
+    return [Image.open(io.BytesIO(b)).convert("RGBA") for b in raw]
+
+def _ai_bg_with_chars(chengyu: str, pinyin: str, english: str, story: str,
+                      model: str, size: str, quality: str = "medium",
+                      timeout: float | None = None, deadline: float | None = None) -> Image.Image:
+    return _ai_bgs_with_chars(chengyu, pinyin, english, story, model=model, size=size, quality=quality,
+                              timeout=timeout, deadline=deadline)[0]
 
 # ---- main API
 
-def generate_cover_hybrid(
+def generate_background(*, chengyu: str, pinyin: str, english: str, story: str = "",
+                        model: str = "gpt-image-1", size: str = "1024x1024",
+                        quality: str = "medium", timeout: float | None = None,
+                        deadline: float | None = None) -> Image.Image:
+    """Raw model background (RGBA, API size) before any resize or Latin overlay."""
+    return _ai_bg_with_chars(chengyu, pinyin, english, story, model=model, size=size, quality=quality,
+                             timeout=timeout, deadline=deadline)
+
+def generate_backgrounds(*, chengyu: str, pinyin: str, english: str, story: str = "",
+                         model: str = "gpt-image-1", size: str = "1024x1024",
+                         quality: str = "medium", n: int = 2, timeout: float | None = None,
+                         deadline: float | None = None) -> list:
+    """Several raw backgrounds from ONE image request (n>1; gpt-image-1 allows up to 10)."""
+    return _ai_bgs_with_chars(chengyu, pinyin, english, story, model=model, size=size, quality=quality, n=n,
+                              timeout=timeout, deadline=deadline)
+
+def refine_background(draft: Image.Image, *, chengyu: str, pinyin: str, english: str, story: str = "",
+                      model: str = "gpt-image-1", size: str = "1024x1024",
+                      quality: str = "medium", timeout: float | None = None,
+                      deadline: float | None = None) -> Image.Image:
+    """
+    Re-render an accepted draft at a higher quality. The image API has no seed,
+    so the draft is passed as the edit reference to keep its composition.
+    """
+    buf = io.BytesIO(); draft.convert("RGB").save(buf, "PNG")
+    prompt = _bg_prompt(chengyu, pinyin, english, story) + \
+        "\nRe-paint this draft at full detail. Keep its composition, calligraphy and seal placement.\n"
+    with metrics.span("image:edit", model=model, quality=quality) as sp:
+        res = openai_client.images_edit(model=model, image=("draft.png", buf.getvalue(), "image/png"),
+                                        prompt=prompt, size=_norm_size(size), quality=quality,
+                                        timeout=timeout or 300, deadline=_deadline(deadline))
+        raw = base64.b64decode(res.data[0].b64_json)
+        metrics.usage(getattr(res, "usage", None))
+        sp.add(bytes_out=buf.tell(), bytes_in=len(raw))
+    return Image.open(io.BytesIO(raw)).convert("RGBA")
+
+def compose_cover(
+    img: Image.Image,
     *,
-    chengyu: str,
     pinyin: str,
     english: str,
-    story: str = "",
-    model: str = "gpt-image-1",
-    size: str = "1024x1024",
-    quality: str = "medium",
     out_size: int = 1500,
-    out_format: str = "JPEG",
-    jpeg_quality: int = 82,
-    jpeg_subsampling: int = 2,
-    progressive: bool = True,
     pinyin_y: float = 0.50,   # higher, just under the characters
     english_y: float = 0.78
-) -> bytes:
-
-    # background (with characters from the model)
-    img = _ai_bg_with_chars(chengyu, pinyin, english, story, model=model, size=size, quality=quality)
+) -> Image.Image:
+    """Resize a background to out_size and overlay pinyin + English. Returns RGB."""
+    img = img.convert("RGBA")
     if img.size != (out_size, out_size):
         img = img.resize((out_size, out_size), Image.LANCZOS)
     W = H = out_size
+    # type sizes / pads are tuned for 1500 px; scale them for other sizes
+    k = out_size / 1500
+    px = lambda v: max(1, round(v * k))
 
     # overlay canvas
     overlay = Image.new("RGBA", (W,H), (0,0,0,0))
@@ -206,23 +255,97 @@ def generate_cover_hybrid(
 
     # --- Pinyin: auto-fit; local soft paper backdrop + brushy text
     pinyin = (pinyin or "").strip()
-    f_py, sw_py = _fit_single_line(d, pinyin, f_py_picker, max_width=max_w, start=176, min_size=96, stroke_ratio=0.06)
+    f_py, sw_py = _fit_single_line(d, pinyin, f_py_picker, max_width=max_w, start=px(176), min_size=px(96), stroke_ratio=0.06)
     py_xy = (cx, int(H * pinyin_y))
-    _paper_backdrop(overlay, py_xy, pinyin, f_py, stroke_w=sw_py, pad_x=38, pad_y=24, radius=26, blur=20, alpha=82)
+    _paper_backdrop(overlay, py_xy, pinyin, f_py, stroke_w=sw_py, pad_x=px(38), pad_y=px(24), radius=px(26), blur=px(20), alpha=82)
     _draw_brushy_soft_text(overlay, py_xy, pinyin, f_py, ink=ink, stroke_w=sw_py, stroke_fill=paper,
-                           bleed_blur=1.4, bleed_alpha=210, jitter=1)
+                           bleed_blur=1.4*k, bleed_alpha=210, jitter=px(1))
 
     # --- English: sanitize → wrap & auto-fit; local backdrop + brushy text
     en_text = _sanitize_english(english)
     en_wrapped, f_en, sw_en = _wrap_to_width(d, en_text, f_en_picker, max_width=max_w, max_lines=2,
-                                             start=140, min_size=90, stroke_ratio=0.05)
+                                             start=px(140), min_size=px(90), stroke_ratio=0.05)
     en_xy = (cx, int(H * english_y))
-    _paper_backdrop(overlay, en_xy, en_wrapped, f_en, stroke_w=sw_en, pad_x=34, pad_y=22, radius=24, blur=18, alpha=78)
+    _paper_backdrop(overlay, en_xy, en_wrapped, f_en, stroke_w=sw_en, pad_x=px(34), pad_y=px(22), radius=px(24), blur=px(18), alpha=78)
     _draw_brushy_soft_text(overlay, en_xy, en_wrapped, f_en, ink=ink, stroke_w=sw_en, stroke_fill=paper,
-                           bleed_blur=1.3, bleed_alpha=200, jitter=1)
+                           bleed_blur=1.3*k, bleed_alpha=200, jitter=px(1))
 
-    # composite & export
-    out = Image.alpha_composite(img, overlay).convert("RGB")
+    return Image.alpha_composite(img, overlay).convert("RGB")
+
+def fit_quality(encode, max_bytes: int, q_lo: int, q_hi: int):
+    """Binary-search the highest quality whose encode fits max_bytes. Returns (bytes, q, trials)."""
+    seen = {}
+    def enc(q):
+        if q not in seen:
+            seen[q] = encode(q)
+        return seen[q]
+    if len(enc(q_hi)) <= max_bytes:   # common case: top quality already fits
+        return seen[q_hi], q_hi, 1
+    best = None
+    lo, hi = q_lo, q_hi - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        data = enc(mid)
+        if len(data) <= max_bytes:
+            best = (data, mid); lo = mid + 1
+        else:
+            hi = mid - 1
+    if best is None:  # nothing fits: smallest we can do
+        best = (enc(q_lo), q_lo)
+    return best[0], best[1], len(seen)
+
+def encode_jpeg_budget(
+    out: Image.Image,
+    max_bytes: int,
+    *,
+    q_min: int = 40,
+    q_max: int = 92,
+    subsamplings=(0, 1, 2),   # 4:4:4, 4:2:2, 4:2:0
+    progressive: bool = True,
+):
+    """
+    JPEG at the best quality that lands under max_bytes. Searches quality per
+    chroma subsampling on in-memory buffers of the same decoded image; the highest
+    quality wins (ties go to the finer subsampling). Returns (bytes, info) with
+    info = {"quality","subsampling","bytes","trials","fits"}.
+    """
+    rgb = out.convert("RGB")
+    def encode(q, ss, optimize):
+        buf = io.BytesIO()
+        rgb.save(buf, "JPEG", quality=q, subsampling=ss, optimize=optimize, progressive=progressive)
+        return buf.getvalue()
+    # search without Huffman optimization (much faster); the optimized final
+    # encode at the chosen settings is never larger, so it still fits
+    def encoder(ss):
+        return lambda q: encode(q, ss, False)
+    best, trials = None, 0
+    for ss in subsamplings:
+        data, q, n = fit_quality(encoder(ss), max_bytes, q_min, q_max)
+        trials += n
+        fits = len(data) <= max_bytes
+        key = (fits, q if fits else -len(data))
+        if best is None or key > best[0]:
+            best = (key, data, {"quality": q, "subsampling": ss, "bytes": len(data), "fits": fits})
+        if fits and q == q_max:   # finest subsampling at top quality: nothing can beat it
+            break
+    info = {**best[2], "trials": trials}
+    data = encode(info["quality"], info["subsampling"], True)
+    info["bytes"] = len(data)
+    print(f"JPEG budget {max_bytes:,} B → q={info['quality']} subsampling={info['subsampling']} "
+          f"{info['bytes']:,} B ({trials} trials)")
+    return data, info
+
+def encode_cover(
+    out: Image.Image,
+    *,
+    out_format: str = "JPEG",
+    jpeg_quality: int = 82,
+    jpeg_subsampling: int = 2,
+    progressive: bool = True,
+    max_bytes: int | None = None,   # JPEG: search quality/subsampling to fit this budget
+) -> bytes:
+    if max_bytes and out_format.upper() != "PNG":
+        return encode_jpeg_budget(out, max_bytes, progressive=progressive)[0]
     buf = io.BytesIO()
     if out_format.upper() == "PNG":
         out.save(buf, "PNG", optimize=True)
@@ -231,3 +354,31 @@ def generate_cover_hybrid(
         out.save(buf, "JPEG", quality=jpeg_quality, subsampling=jpeg_subsampling,
                  optimize=True, progressive=progressive)
     return buf.getvalue()
+
+def generate_cover_hybrid(
+    *,
+    chengyu: str,
+    pinyin: str,
+    english: str,
+    story: str = "",
+    model: str = "gpt-image-1",
+    size: str = "1024x1024",
+    quality: str = "medium",
+    out_size: int = 1500,
+    out_format: str = "JPEG",
+    jpeg_quality: int = 82,
+    jpeg_subsampling: int = 2,
+    progressive: bool = True,
+    pinyin_y: float = 0.50,   # higher, just under the characters
+    english_y: float = 0.78,
+    max_bytes: int | None = None   # JPEG byte budget; overrides jpeg_quality/jpeg_subsampling
+) -> bytes:
+
+    # background (with characters from the model)
+    img = _ai_bg_with_chars(chengyu, pinyin, english, story, model=model, size=size, quality=quality)
+
+    # composite & export
+    out = compose_cover(img, pinyin=pinyin, english=english, out_size=out_size,
+                        pinyin_y=pinyin_y, english_y=english_y)
+    return encode_cover(out, out_format=out_format, jpeg_quality=jpeg_quality,
+                        jpeg_subsampling=jpeg_subsampling, progressive=progressive, max_bytes=max_bytes)
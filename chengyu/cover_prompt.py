@@ -1,6 +1,6 @@
 # chengyu/cover_prompt.py
 import io, base64
-from openai import OpenAI
+from chengyu import openai_client
 from PIL import Image
 
 SUPPORTED_SIZES = {"1024x1024", "1024x1536", "1536x1024", "auto"}
@@ -10,7 +10,6 @@ def _norm_size(size):
 def generate_cover_direct(*, chengyu: str, pinyin: str, english: str,
                           story: str = "", model: str = "gpt-image-1",
                           size: str = "1024x1024", out_size: int = 3000) -> bytes:
-    client = OpenAI()
     size = _norm_size(size)
     prompt = f"""
 Square podcast cover in traditional Chinese ink painting (shui-mo / sumi-e).
@@ -30,7 +29,7 @@ Background:
 - Keep a calmer vertical band through center for readable text.
 - No extra text, no watermarks, no borders/frames.
 """
-    res = client.images.generate(model=model, prompt=prompt, size=size, quality="medium")
+    res = openai_client.images_generate(model=model, prompt=prompt, size=size, quality="medium")
     img = Image.open(io.BytesIO(base64.b64decode(res.data[0].b64_json))).convert("RGB")
     if img.size != (out_size, out_size):
         img = img.resize((out_size, out_size), Image.LANCZOS)
@@ -1,16 +1,32 @@
-import os, json, tempfile, shutil
+import os, json, tempfile, shutil, threading
+from contextlib import contextmanager
 from pathlib import Path
 from .utils import run, normalize_chengyu
+from . import metrics, mirror
 
-def list_existing_chengyu(repo: str, branch: str = "main") -> set[str]:
-    """Clone shallowly and gather ALL published chengyu (normalized)."""
+@contextmanager
+def _checkout(repo: str, branch: str, mirror_dir: str | None):
     token = os.environ.get("GITHUB_TOKEN")
+    if mirror_dir:
+        # only metadata + posts are needed: skip audio/cover blobs entirely
+        with mirror.worktree(repo, branch, mirror_dir, token=token,
+                             paths=["/episodes/*/metadata.json", "/_posts/"]) as wt:
+            yield wt
+        return
     tmp = tempfile.mkdtemp(prefix="chengyu_seen_")
-    seen = set()
     try:
         repo_url = f"https://{token+'@' if token else ''}github.com/{repo}.git"
         run(["git", "clone", "--depth", "1", "--branch", branch, repo_url, tmp], hide_token=bool(token))
-        root = Path(tmp)
+        yield Path(tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+@metrics.traced("dedupe")
+def list_existing_chengyu(repo: str, branch: str = "main", mirror_dir: str | None = None) -> set[str]:
+    """Gather ALL published chengyu (normalized) from a shallow clone or the shared mirror."""
+    seen = set()
+    with _checkout(repo, branch, mirror_dir) as root:
+        root = Path(root)
 
         for meta in (root / "episodes").glob("*/metadata.json"):
             try:
@@ -34,6 +50,42 @@ def list_existing_chengyu(repo: str, branch: str = "main") -> set[str]:
                                 seen.add(normalize_chengyu(ch))
             except Exception:
                 pass
-        return seen
-    finally:
-        shutil.rmtree(tmp, ignore_errors=True)
+    metrics.add(idioms=len(seen))
+    return seen
+
+class SeenSets:
+    """
+    Published + claimed idioms per target repo, shared by concurrent episodes:
+    each (repo, branch) is read once, and claim() makes sure two episodes in
+    this process never pick the same idiom for the same repo.
+    """
+
+    def __init__(self, mirror_dir: str | None = None, loader=list_existing_chengyu):
+        self.mirror_dir, self._loader = mirror_dir, loader
+        self._sets: dict = {}
+        self._lock = threading.Lock()
+        self._loading: dict = {}
+
+    def get(self, repo: str, branch: str = "main") -> set[str]:
+        """Copy of the normalized idioms published (or claimed) for repo@branch."""
+        key = (repo, branch)
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:  # one checkout per repo, even when its episodes start together
+            if key not in self._sets:
+                seen = self._loader(repo, branch, mirror_dir=self.mirror_dir)
+                with self._lock:
+                    self._sets[key] = set(seen)
+        with self._lock:
+            return set(self._sets[key])
+
+    def claim(self, repo: str, branch: str, chengyu: str) -> bool:
+        """Reserve `chengyu` for repo@branch; False if already published or claimed."""
+        self.get(repo, branch)
+        norm = normalize_chengyu(chengyu)
+        with self._lock:
+            seen = self._sets[(repo, branch)]
+            if norm in seen:
+                return False
+            seen.add(norm)
+            return True
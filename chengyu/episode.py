@@ -0,0 +1,165 @@
+# chengyu/episode.py
+"""
+One episode of one show, end to end:
+
+    idiom → script → cover ∥ audio ∥ body → [audio_opt] → release upload → commit
+
+Every step checkpoints into a RunDir (resume after a failure re-runs only what's
+missing), is a metrics span, and holds a slot of the matching resource pool
+while it runs (see chengyu.scheduler; pools=None means no limits, as in
+scripts/generate_episode.py).
+"""
+
+from contextlib import nullcontext
+from typing import Optional
+
+from . import metrics
+from .audio_optimize import optimize as optimize_audio
+from .audiostore import ReleaseStore
+from .config import settings
+from .cover_derivatives import make_cover_derivatives, pick
+from .cover_flow import COVER_MODES, make_cover_image
+from .dedupe import SeenSets
+from .gen import choose_unique_chengyu, gen_episode_for, script_to_markdown
+from .pipeline import Stage, run as run_stages
+from .publisher import publish_episode, release_audio
+from .rundir import RunDir
+from .shows import Show
+from .tts import tts_episode
+from .utils import normalize_chengyu
+
+def produce_episode(show: Show, run: RunDir, *, pools=None, seen: Optional[SeenSets] = None,
+                    dry_run: Optional[bool] = None) -> dict:
+    """Make and publish one episode; returns publish_episode()'s result (None on a dry run)."""
+    dry_run = settings.DRY_RUN if dry_run is None else dry_run
+    if settings.COVER_MODE not in COVER_MODES:  # fail before any LLM call is paid for
+        raise ValueError(f"COVER_MODE={settings.COVER_MODE!r}; expected one of {COVER_MODES}")
+    seen = seen or SeenSets(mirror_dir=settings.MIRROR_DIR or None)
+
+    def slot(resource: str):
+        return pools.slot(resource, show.key) if pools else nullcontext()
+
+    with metrics.span("episode", show=show.key, run_id=run.run_id):
+        # 0) Unique idiom (claimed against concurrent episodes for the same repo), then its script
+        def idiom_stage():
+            with slot("git"):
+                forbidden = seen.get(show.repo, show.branch)
+            for _ in range(5):
+                with slot("llm"):
+                    cand = choose_unique_chengyu(show.gen_model, forbidden, batch_size=20, max_rounds=20)
+                if seen.claim(show.repo, show.branch, cand):
+                    return cand
+                forbidden.add(normalize_chengyu(cand))  # another episode took it meanwhile
+            raise RuntimeError(f"{show.key}: could not claim an unseen idiom")
+
+        if run.done("idiom"):  # a restored idiom must be claimed like a fresh one
+            restored = run.load("idiom")
+            if not seen.claim(show.repo, show.branch, restored):
+                metrics.event("idiom:taken", idiom=restored)
+                print(f"{restored} was published or claimed since this run started; choosing another")
+                run.discard("idiom")  # the script and everything after it re-run as well
+        idiom = run.stage("idiom", idiom_stage)
+
+        def script_stage():
+            for _ in range(3):
+                with slot("llm"):
+                    data = gen_episode_for(show.name, show.gen_model, idiom, language=show.language)
+                if normalize_chengyu(data["chengyu"]) == normalize_chengyu(idiom):
+                    return data
+                metrics.event("script:mismatch", wanted=idiom, got=data["chengyu"])
+                print(f"Model wrote about {data['chengyu']} instead of {idiom}; retrying")
+            raise RuntimeError(f"Could not get a script for {idiom}")
+
+        data = run.stage("script", script_stage, after=("idiom",))
+
+        # 1–3) Cover, audio and body depend only on `data`: run them concurrently
+        def cover_stage():
+            with slot("image"):
+                # hybrid + background gates → one 3000 px composite
+                return make_cover_image(
+                    data, attempts=4,  # fast-ish; tweak attempts if needed
+                    parallel=settings.COVER_PARALLEL, mode=settings.COVER_MODE,
+                    out_size=3000, show_name=show.name,
+                )
+
+        def audio_stage():
+            # per-cue synthesis: the cues carry the timings for chapters.json / transcript.vtt;
+            # each request holds its own speech slot
+            return tts_episode(data["script"], data["chengyu"], show.tts_model, show.voice,
+                               slot=lambda: slot("speech"))
+
+        def body_stage():
+            with slot("llm"):
+                return script_to_markdown(data["chengyu"], data["pinyin"], data["gloss"], data["teaser"],
+                                          data["script"], show.gen_model, language=show.language)
+
+        def audio_opt_stage(audio, cover_derivs):
+            # trim, mono re-encode, ID3 tags + chapters; the cues move with the trimmed audio
+            thumb = pick(cover_derivs, "thumb")
+            return optimize_audio(audio["mp3"] if isinstance(audio, dict) else audio,
+                                  title=f"{data['chengyu']} ({data['pinyin']})", show=show.name,
+                                  cues=audio.get("cues") if isinstance(audio, dict) else None,
+                                  cover=thumb["bytes"] if thumb else None, date=run.date,
+                                  bitrate=show.audio_bitrate, encoder=settings.AUDIO_ENCODER)
+
+        stages = run_stages([
+            Stage("cover", run.wrap("cover", cover_stage, kind="image", after=("script",)),
+                  timeout=settings.COVER_DEADLINE + 60),  # falls back offline at the deadline
+            Stage("cover_derivs", run.wrap("cover_derivs", lambda cover: make_cover_derivatives(cover),
+                                           kind="derivs", after=("cover",)),
+                  deps=("cover",), timeout=180),
+            Stage("audio", run.wrap("audio", audio_stage, kind="audio", ext="mp3", after=("script",)),
+                  timeout=600),
+            Stage("body", run.wrap("body", body_stage, kind="text", after=("script",)), timeout=300),
+        ] + ([
+            Stage("audio_opt", run.wrap("audio_opt", audio_opt_stage, kind="audio", ext="mp3",
+                                        after=("audio", "cover_derivs")),
+                  deps=("audio", "cover_derivs"), timeout=300, fatal=False),  # failure: publish the TTS MP3
+        ] if show.audio_bitrate else []),
+            inputs=run.restored(["cover", "cover_derivs", "audio", "body", "audio_opt"]))
+        cover_derivs, body_md = stages["cover_derivs"], stages["body"]
+        audio_key = "audio_opt" if stages.results.get("audio_opt") else "audio"
+        audio_mp3 = run.path / f"{audio_key}.mp3"  # checkpointed copy: streamed by the publisher
+        audio = stages[audio_key]
+        cues = audio.get("cues") if isinstance(audio, dict) else None  # None: checkpoint from before cues
+        cover_bytes, cover_ext = pick(cover_derivs, "feed")["bytes"], "jpg"
+
+        # 4) Release upload (its own checkpoint: a failed push doesn't re-upload)
+        offload = show.audio_mode == "offload"  # MP3 only in the content-addressed release store
+
+        def release_stage():
+            with slot("git"):
+                return release_audio(repo=show.repo, data=data, date=run.date, audio_mp3=audio_mp3,
+                                     audio_store=ReleaseStore(show.repo) if offload else None)
+
+        release = run.stage("release", release_stage, after=("script", audio_key))
+
+        # 5) Publish
+        def commit_stage():
+            with slot("git"):
+                return publish_episode(
+                    show_name=show.name,
+                    repo=show.repo,
+                    branch=show.branch,
+                    site_url=show.site_url,
+                    baseurl=show.baseurl,
+                    publish_time_utc=show.publish_time_utc,
+                    data=data,
+                    body_md=body_md,
+                    cover_bytes=cover_bytes,
+                    cover_ext=cover_ext,                 # "jpg" or "png"
+                    cover_derivatives=cover_derivs,      # 3000/600/300 px + WebP/AVIF, srcset in front matter
+                    audio_mp3=audio_mp3,
+                    audio_release=release,               # uploaded in step 4
+                    audio_cues=cues,                     # -> chapters.json + transcript.vtt
+                    write_audio_to_repo=not offload,     # << don't store MP3 in repo (optional)
+                    dry_run=dry_run,
+                    commit_mode=show.commit_mode,        # "api": no clone, commit through the Git Data API
+                    mirror_dir=settings.MIRROR_DIR or None,  # reuse the dedupe mirror instead of a second clone
+                    date=run.date,                       # a resumed run keeps its original episode date
+                )
+
+        if dry_run:
+            commit_stage()  # never checkpoint a commit that didn't happen
+            return None
+        return run.stage("commit", commit_stage, after=("script", "cover_derivs", "body", "release"))
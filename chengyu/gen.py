@@ -1,7 +1,9 @@
 # chengyu/gen.py
 import re, json
-from openai import OpenAI
 from .utils import normalize_chengyu
+from . import metrics, openai_client
+
+CHAT_DEADLINE = 240  # seconds per call, retries included (inside the pipeline's stage timeouts)
 
 SYSTEM = (
     "You create short, conversational podcast episodes about Chinese 成语. "
@@ -11,29 +13,31 @@ SYSTEM = (
 # -------- A) pick a batch of candidate idioms --------
 def pick_new_chengyu(model: str, batch_size: int = 20) -> list[str]:
     """Ask the model for a diverse list of idioms (characters only)."""
-    client = OpenAI()
     prompt = f"""
 Return a JSON object with a single key "list" whose value is an array of {batch_size}
 well-known, mutually distinct Chinese 成语 (use CHINESE CHARACTERS only). No commentary.
 Example:
 {{ "list": ["画蛇添足","井底之蛙","对牛弹琴"] }}
 """
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=0.8,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role":"system","content":"Return JSON only."},
-            {"role":"user","content":prompt}
-        ]
-    )
+    with metrics.span("llm:pick", model=model, batch_size=batch_size) as sp:
+        resp = openai_client.chat(
+            deadline=CHAT_DEADLINE,
+            model=model,
+            temperature=0.8,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role":"system","content":"Return JSON only."},
+                {"role":"user","content":prompt}
+            ]
+        )
+        metrics.usage(resp.usage)
+        sp.add(bytes_in=len(resp.choices[0].message.content or ""))
     data = json.loads(resp.choices[0].message.content)
     lst = data.get("list") or []
     return [s for s in lst if isinstance(s, str) and s.strip()]
 
 # -------- B) generate full episode for a specific idiom --------
-def gen_episode_for(show_name: str, model: str, chengyu: str) -> dict:
-    client = OpenAI()
+def gen_episode_for(show_name: str, model: str, chengyu: str, language: str = "English") -> dict:
     STRUCT = f"""
 Create a short, conversational episode for this EXACT Chinese 成语: {chengyu}
 
@@ -59,21 +63,43 @@ Return JSON with keys:
   "script": "<full episode script with [break] tags>"
 }}
 """
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=0.7,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": STRUCT}
-        ]
-    )
+    if language != "English":
+        STRUCT += _in_language(language)
+    with metrics.span("llm:episode", model=model, chengyu=chengyu) as sp:
+        resp = openai_client.chat(
+            deadline=CHAT_DEADLINE,
+            model=model,
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": SYSTEM},
+                {"role": "user", "content": STRUCT}
+            ]
+        )
+        metrics.usage(resp.usage)
+        sp.add(bytes_in=len(resp.choices[0].message.content or ""))
     data = json.loads(resp.choices[0].message.content)
     for k in ("chengyu","pinyin","gloss","teaser","script"):
         assert isinstance(data.get(k), str) and data[k].strip()
     return data
 
+def _in_language(language: str) -> str:
+    """Prompt addendum for shows that explain idioms in another language."""
+    return (f"\nLanguage: write every explanation, the intro/sign-off, the gloss and the teaser in {language}. "
+            f"Chinese characters, pinyin and the Mandarin example lines stay as they are; "
+            f"example translations are in {language} instead of English. "
+            f"Keep the section headings and JSON keys exactly as specified.\n")
+
 # -------- C) strict unique wrapper (no duplicates ever) --------
+def choose_unique_chengyu(model: str, forbidden: set[str], batch_size: int = 20, max_rounds: int = 20) -> str:
+    """Idiom choice alone (batch-pick → local filter), so it can be checkpointed before the script exists."""
+    forbid_norm = {normalize_chengyu(x) for x in forbidden}
+    for _ in range(max_rounds):
+        for cand in pick_new_chengyu(model, batch_size=batch_size):
+            if normalize_chengyu(cand) not in forbid_norm:
+                return cand
+    raise RuntimeError("Failed to find an unseen idiom")
+
 def gen_unique_episode_strict(show_name: str, model: str, forbidden: set[str],
                               batch_size: int = 20, max_rounds: int = 20) -> dict:
     """Never return a duplicate: batch-pick → local filter → generate for chosen idiom → re-check."""
@@ -92,9 +118,9 @@ def gen_unique_episode_strict(show_name: str, model: str, forbidden: set[str],
     raise RuntimeError(last_err or "Failed to find an unseen idiom")
 
 # -------- D) pretty Markdown formatting --------
-def script_to_markdown(chengyu: str, pinyin: str, gloss: str, teaser: str, script: str, model: str) -> str:
+def script_to_markdown(chengyu: str, pinyin: str, gloss: str, teaser: str, script: str, model: str,
+                       language: str = "English") -> str:
     """Format the raw script into structured Markdown (no top-level H1)."""
-    client = OpenAI()
     cleaned = re.sub(r"\[break\s*[0-9.]+s\]", " ", script or "")
 
     SYS = ("You are a precise formatter. Turn a 成语 podcast script "
@@ -132,15 +158,21 @@ Output exactly:
 ## Closing
 (Repeat {chengyu} and give a one-line meaning/sign-off.)
 """
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=0.3,
-        messages=[
-            {"role":"system","content":SYS},
-            {"role":"user","content":INSTR},
-            {"role":"user","content":cleaned}
-        ]
-    )
+    if language != "English":
+        INSTR += _in_language(language)
+    with metrics.span("llm:markdown", model=model) as sp:
+        resp = openai_client.chat(
+            deadline=CHAT_DEADLINE,
+            model=model,
+            temperature=0.3,
+            messages=[
+                {"role":"system","content":SYS},
+                {"role":"user","content":INSTR},
+                {"role":"user","content":cleaned}
+            ]
+        )
+        metrics.usage(resp.usage)
+        sp.add(bytes_in=len(resp.choices[0].message.content or ""))
     md = resp.choices[0].message.content.strip()
     # Strip accidental code fences
     return re.sub(r"^```(?:markdown|md)?\s*|\s*```$", "", md, flags=re.S|re.I)
@@ -0,0 +1,244 @@
+# chengyu/github.py
+"""
+Shared GitHub REST client.
+
+- One pooled requests.Session per process (keep-alive across API and upload hosts).
+- Retries with backoff on connection errors, 5xx and rate limits (429, or 403 with
+  an exhausted x-ratelimit-remaining / Retry-After); honours Retry-After and
+  x-ratelimit-reset when GitHub sends them.
+- Every attempt is a metrics span ("github:<METHOD>": status, bytes each way).
+- Release assets stream from a file path (or bytes) with an optional progress
+  callback. A retried upload first looks for an asset with the same name: a
+  matching size (and sha256 digest, when GitHub reports one) is reused instead
+  of uploaded again; a mismatching leftover is deleted first.
+"""
+
+import io
+import os
+import time
+import random
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+
+Progress = Callable[[int, int], None]  # (bytes_sent, total)
+
+def token() -> str:
+    tok = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+    if not tok:
+        raise RuntimeError("GITHUB_TOKEN (or GH_TOKEN) not set")
+    return tok
+
+class GitHubError(RuntimeError):
+    def __init__(self, what: str, r: requests.Response):
+        super().__init__(f"{what} failed: {r.status_code} {r.text[:500]}")
+        self.status_code = r.status_code
+
+class _Reader:
+    """File-like body that reports progress; requests streams it in blocks."""
+
+    def __init__(self, fh, total: int, progress: Optional[Progress]):
+        self._fh, self._total, self._progress, self._sent = fh, total, progress, 0
+
+    def __len__(self):
+        return self._total
+
+    def close(self):
+        self._fh.close()
+
+    def read(self, n: int = -1) -> bytes:
+        chunk = self._fh.read(n)
+        if chunk and self._progress:
+            self._sent += len(chunk)
+            self._progress(self._sent, self._total)
+        return chunk
+
+def _sha256(src: Union[bytes, str, Path]) -> str:
+    if isinstance(src, (bytes, bytearray)):
+        return hashlib.sha256(src).hexdigest()
+    h = hashlib.sha256()
+    with open(src, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _size(src: Union[bytes, str, Path]) -> int:
+    return len(src) if isinstance(src, (bytes, bytearray)) else os.path.getsize(src)
+
+def _open(src: Union[bytes, str, Path]):
+    if isinstance(src, (bytes, bytearray)):
+        return io.BytesIO(src)
+    return open(src, "rb")
+
+class GitHub:
+    RETRY_STATUS = (500, 502, 503, 504)
+
+    def __init__(self, tok: Optional[str] = None, *, api_url: Optional[str] = None,
+                 retries: int = 5, backoff: float = 1.0, max_sleep: float = 60.0, pool: int = 8):
+        self.api_url = (api_url or API_URL).rstrip("/")
+        self.retries, self.backoff, self.max_sleep = retries, backoff, max_sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"token {tok or token()}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        })
+
+    # ---------- transport ----------
+
+    def _delay(self, r: Optional[requests.Response], attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the response is final."""
+        if r is not None:
+            rate_limited = r.status_code == 429 or (
+                r.status_code == 403 and (r.headers.get("x-ratelimit-remaining") == "0"
+                                          or "Retry-After" in r.headers))
+            if not rate_limited and r.status_code not in self.RETRY_STATUS:
+                return None
+            if "Retry-After" in r.headers:
+                try:
+                    return min(self.max_sleep, float(r.headers["Retry-After"]))
+                except ValueError:
+                    pass
+            if r.headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in r.headers:
+                return min(self.max_sleep, max(1.0, float(r.headers["x-ratelimit-reset"]) - time.time()))
+        return min(self.max_sleep, self.backoff * 2 ** (attempt - 1)) * (0.5 + random.random() / 2)
+
+    def request(self, method: str, url: str, *, body: Optional[Callable[[], object]] = None,
+                timeout: float = 60, **kw) -> requests.Response:
+        """
+        `url`: absolute, or a path under the API root. `body`: factory for a fresh
+        request body per attempt (streams cannot be replayed).
+        """
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.api_url}/{url.lstrip('/')}"
+        for attempt in range(1, self.retries + 1):
+            data = body() if body else None
+            with metrics.span(f"github:{method}", path=url.split("?")[0].replace(self.api_url, ""),
+                              attempt=attempt) as sp:
+                try:
+                    r = self.session.request(method, url, data=data, timeout=timeout, **kw)
+                    err = None
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    r, err = None, e
+                finally:
+                    if hasattr(data, "close"):
+                        data.close()
+                if r is not None:
+                    sent = r.request.body
+                    sp.set(status=r.status_code)
+                    sp.add(bytes_out=len(sent) if hasattr(sent, "__len__") else 0, bytes_in=len(r.content))
+                else:
+                    sp.set(status=type(err).__name__)
+            wait = self._delay(r, attempt)
+            if wait is None:
+                return r
+            if attempt == self.retries:
+                if err:
+                    raise err
+                return r
+            print(f"GitHub {method} {url.split('?')[0]}: "
+                  f"{err or r.status_code}; retry {attempt}/{self.retries - 1} in {wait:.1f}s")
+            time.sleep(wait)
+        raise AssertionError("unreachable")
+
+    def json(self, method: str, url: str, what: str, *, ok=(200, 201), **kw):
+        r = self.request(method, url, **kw)
+        if r.status_code not in ok:
+            raise GitHubError(what, r)
+        return r.json() if r.content else None
+
+    # ---------- releases ----------
+
+    def create_or_get_release(self, repo: str, tag: str, name: str, body: str = ""):
+        """Create the release, or fetch it if the tag already has one. Returns (release, created)."""
+        r = self.request("POST", f"repos/{repo}/releases", json={
+            "tag_name": tag, "name": name, "body": body, "draft": False, "prerelease": False})
+        if r.status_code in (200, 201):
+            return r.json(), True
+        if r.status_code == 422 and "already_exists" in r.text:
+            return self.json("GET", f"repos/{repo}/releases/tags/{tag}", "Get release", timeout=30), False
+        raise GitHubError("Create release", r)
+
+    def upload_asset(self, release: dict, src: Union[bytes, str, Path], *, name: str,
+                     content_type: str = "application/octet-stream", reuse: bool = True,
+                     progress: Optional[Progress] = None, timeout: float = 300) -> dict:
+        """
+        Stream `src` (path or bytes) as a release asset. With `reuse`, an existing
+        asset of the same name is checked first (see module docstring).
+        """
+        size = _size(src)
+        url = release["upload_url"].split("{")[0]
+        for attempt in (1, 2):
+            if reuse:
+                done = self._existing_asset(release, name, src, size)
+                if done:
+                    return done
+            r = self.request("POST", url, params={"name": name}, timeout=timeout,
+                             body=lambda: _Reader(_open(src), size, progress),
+                             headers={"Content-Type": content_type, "Content-Length": str(size)})
+            if r.status_code in (200, 201):
+                return r.json()
+            # an interrupted attempt can leave a half-uploaded asset holding the name
+            if not (reuse and attempt == 1 and r.status_code == 422 and "already_exists" in r.text):
+                break
+        raise GitHubError(f"Upload asset {name}", r)
+
+    def _existing_asset(self, release: dict, name: str, src, size: int) -> Optional[dict]:
+        """A complete, identical asset named `name`, or None (deleting a stale one on the way)."""
+        assets_url = release.get("assets_url") or f"{release['url']}/assets"
+        page = 1
+        while True:
+            batch = self.json("GET", assets_url, "List assets", params={"per_page": 100, "page": page}, timeout=30)
+            for a in batch:
+                if a["name"] != name:
+                    continue
+                if a.get("state", "uploaded") == "uploaded" and a["size"] == size:
+                    if a.get("digest") in (None, f"sha256:{_sha256(src)}"):
+                        print(f"✔ Asset {name} already uploaded ({size} bytes); skipping.")
+                        return a
+                print(f"Replacing stale asset {name} ({a.get('state')}, {a['size']} bytes)")
+                self.json("DELETE", a["url"], "Delete asset", ok=(204, 404), timeout=30)
+                return None
+            if len(batch) < 100:
+                return None
+            page += 1
+
+    def delete_asset(self, repo: str, asset_id: int):
+        self.json("DELETE", f"repos/{repo}/releases/assets/{asset_id}", "Delete asset",
+                  ok=(204, 404), timeout=30)
+
+    def delete_release(self, repo: str, release: dict, pace: Optional[Callable[[], None]] = None):
+        """
+        Delete a release and its tag ref (the releases API leaves the tag behind).
+        `pace()` runs before each of the two requests (chengyu.releases rate pacing).
+        """
+        pace = pace or (lambda: None)
+        pace()
+        self.json("DELETE", f"repos/{repo}/releases/{release['id']}", "Delete release",
+                  ok=(204, 404), timeout=30)
+        pace()
+        self.json("DELETE", f"repos/{repo}/git/refs/tags/{release['tag_name']}", "Delete tag",
+                  ok=(204, 404, 422), timeout=30)
+
+_client: Optional[GitHub] = None
+_client_lock = threading.Lock()
+
+def client(api_url: Optional[str] = None) -> GitHub:
+    """Process-wide client (shared connection pool). A custom api_url gets its own instance."""
+    global _client
+    if api_url and api_url.rstrip("/") != API_URL.rstrip("/"):
+        return GitHub(api_url=api_url)
+    with _client_lock:
+        if _client is None:
+            _client = GitHub()
+        return _client
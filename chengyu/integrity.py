@@ -0,0 +1,182 @@
+# chengyu/integrity.py
+"""
+Integrity scan of episodes/ against _posts front matter and metadata.json.
+
+Every file under episodes/ is hashed once, in parallel (mmap + sha256 on a
+thread pool; hashlib releases the GIL on large buffers). Each post's
+references are then checked against the files on disk:
+
+    orphan-folder      episodes/<folder> with no post                          prunable
+    unreferenced       a file nothing points at (cover.png next to cover.jpg)  prunable
+    size-mismatch      audio_bytes differs from the repo MP3                   fixable
+    missing            cover_image / cover_srcset / repo audio_url not on disk
+    duplicate-file     identical bytes stored under two paths
+    duplicate-idiom    two posts for the same chengyu
+    metadata-mismatch  metadata.json chengyu differs from the post title
+
+Findings carry the bytes pruning them would save. prune() deletes the prunable
+files and fixes audio_bytes in front matter; the caller commits the result
+(`python -m chengyu scan --prune --commit`).
+"""
+
+import os
+import mmap
+import json
+import shutil
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import catalog
+from .search import idiom_of
+from .utils import normalize_chengyu
+
+# written by the publisher for every episode; referenced by convention, not front matter
+CONVENTIONAL = {"metadata.json", "transcript.txt", "transcript.vtt", "chapters.json"}
+PRUNABLE = {"orphan-folder", "unreferenced", "size-mismatch"}
+
+@dataclass
+class Finding:
+    kind: str
+    path: str              # repo-relative, posix
+    bytes: int = 0         # saved by pruning (prunable kinds) / involved (the rest)
+    detail: str = ""
+
+    @property
+    def prunable(self) -> bool:
+        return self.kind in PRUNABLE
+
+@dataclass
+class Report:
+    files: int
+    total_bytes: int
+    findings: List[Finding]
+
+    @property
+    def savings(self) -> int:
+        return sum(f.bytes for f in self.findings if f.kind in ("orphan-folder", "unreferenced"))
+
+    def as_dict(self) -> dict:
+        return {"files": self.files, "total_bytes": self.total_bytes, "savings_bytes": self.savings,
+                "findings": [dict(asdict(f), prunable=f.prunable) for f in self.findings]}
+
+def sha256_file(path: Path) -> Tuple[int, str]:
+    """(size, sha256) of a file, read through mmap."""
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            return 0, hashlib.sha256(b"").hexdigest()
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return size, hashlib.sha256(mm).hexdigest()
+
+def hash_tree(base: Path, root: Path, workers: Optional[int] = None) -> Dict[str, Tuple[int, str]]:
+    """{repo-relative path: (size, sha256)} for every file under `base`."""
+    files = sorted(p for p in base.rglob("*") if p.is_file())
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 2),
+                            thread_name_prefix="hash") as pool:
+        hashed = pool.map(sha256_file, files)
+        return {p.relative_to(root).as_posix(): h for p, h in zip(files, hashed)}
+
+def _local(url) -> Optional[str]:
+    """Repo path behind a site-relative URL (/episodes/...), else None."""
+    url = str(url or "")
+    return url.lstrip("/") if url.startswith("/episodes/") else None
+
+def scan(root=".", workers: Optional[int] = None) -> Report:
+    root = Path(root)
+    files = hash_tree(root / "episodes", root, workers) if (root / "episodes").exists() else {}
+    by_folder: Dict[str, List[str]] = defaultdict(list)
+    loose: List[str] = []  # files directly under episodes/, outside any episode folder
+    for rel in files:
+        parts = rel.split("/")
+        if len(parts) >= 3:
+            by_folder[parts[1]].append(rel)
+        else:
+            loose.append(rel)
+
+    findings: List[Finding] = []
+    referenced = set()
+    idioms: Dict[str, str] = {}
+    for ep in catalog.load(root):
+        folder, fm = ep["folder"], ep["fm"]
+        post = ep["post"].relative_to(root).as_posix()
+        refs = {_local(fm.get(k)) for k in ("cover_image", "audio_url", "audio_repo_url")}
+        refs |= {_local(s.get("src")) for s in fm.get("cover_srcset") or []}
+        refs.discard(None)
+        refs |= {f"episodes/{folder}/{name}" for name in CONVENTIONAL if f"episodes/{folder}/{name}" in files}
+        for rel in sorted(refs):
+            if rel not in files:
+                findings.append(Finding("missing", rel, detail=f"referenced by {post}"))
+        referenced |= refs
+
+        audio = _local(fm.get("audio_repo_url")) or _local(fm.get("audio_url"))
+        if audio in files and fm.get("audio_bytes") is not None and int(fm["audio_bytes"]) != files[audio][0]:
+            findings.append(Finding("size-mismatch", post, detail=f"audio_bytes {fm['audio_bytes']} but "
+                                                                  f"{audio} is {files[audio][0]}"))
+
+        meta_rel = f"episodes/{folder}/metadata.json"
+        meta = {}
+        if meta_rel in files:
+            try:
+                meta = json.loads((root / meta_rel).read_text(encoding="utf-8"))
+            except ValueError:
+                findings.append(Finding("missing", meta_rel, detail="metadata.json is not valid JSON"))
+        title_idiom, _ = idiom_of(fm)
+        if meta.get("chengyu") and normalize_chengyu(meta["chengyu"]) != normalize_chengyu(title_idiom):
+            findings.append(Finding("metadata-mismatch", meta_rel,
+                                    detail=f"{meta['chengyu']} vs title {title_idiom}"))
+        key = normalize_chengyu(meta.get("chengyu") or title_idiom)
+        if key in idioms:
+            size = sum(files[r][0] for r in by_folder.get(folder, []))
+            findings.append(Finding("duplicate-idiom", f"episodes/{folder}", size,
+                                    detail=f"{key} already published as {idioms[key]}"))
+        else:
+            idioms[key] = folder
+
+    posts = {ep["folder"] for ep in catalog.load(root)}
+    for folder, rels in sorted(by_folder.items()):
+        if folder not in posts:
+            findings.append(Finding("orphan-folder", f"episodes/{folder}", sum(files[r][0] for r in rels),
+                                    detail=f"{len(rels)} file(s), no post"))
+            continue
+        for rel in sorted(rels):
+            if rel not in referenced:
+                findings.append(Finding("unreferenced", rel, files[rel][0]))
+    for rel in sorted(loose):
+        if rel not in referenced:
+            findings.append(Finding("unreferenced", rel, files[rel][0], detail="not in an episode folder"))
+
+    by_hash: Dict[str, List[str]] = defaultdict(list)
+    for rel, (size, digest) in files.items():
+        if size:
+            by_hash[digest].append(rel)
+    for digest, rels in sorted(by_hash.items()):
+        for rel in sorted(rels)[1:]:
+            findings.append(Finding("duplicate-file", rel, files[rel][0], detail=f"same bytes as {sorted(rels)[0]}"))
+
+    return Report(files=len(files), total_bytes=sum(s for s, _ in files.values()), findings=findings)
+
+def prune(root, report: Report) -> List[Path]:
+    """Delete orphaned/unreferenced assets and fix audio_bytes. Returns the paths changed."""
+    root = Path(root)
+    changed = []
+    for f in report.findings:
+        p = root / f.path
+        if f.kind in ("orphan-folder", "unreferenced"):
+            if p.is_dir() and not p.is_symlink():
+                shutil.rmtree(p)
+            elif p.exists() or p.is_symlink():
+                p.unlink()
+            else:
+                continue  # already gone
+        elif f.kind == "size-mismatch":
+            fm, body = catalog.parse_front_matter(p)
+            audio = root / (_local(fm.get("audio_repo_url")) or _local(fm.get("audio_url")))
+            catalog.write_front_matter(p, dict(fm, **catalog.audio_fields(audio)), body)
+        else:
+            continue
+        changed.append(p)
+    return changed
@@ -0,0 +1,324 @@
+# chengyu/metrics.py
+"""
+Lightweight run instrumentation: where does an episode's time (and money) go?
+
+    with metrics.span("tts", model=model) as sp:
+        audio = ...
+        sp.add(bytes_in=len(audio))
+    metrics.usage(resp.usage)          # API tokens onto the current span
+
+Every span records wall time, CPU time of its own thread, the process' peak RSS
+at exit (and how much it grew during the span), plus free-form counters
+(tokens_in/out, bytes_in/out, ...). Spans nest through contextvars; work handed
+to another thread keeps its parent when submitted via `bind(fn)`. Retries are
+separate spans (one per attempt), so a slow call and a retried call look different.
+
+`write_report(path)` dumps a JSON report (spans + per-name totals) and
+`write_trace(path)` a Chrome trace (chrome://tracing, ui.perfetto.dev); paths
+given to configure() are written at interpreter exit, so a failed run reports too.
+
+Opt-in, per span name (comma-separated fnmatch patterns, "*" for all):
+    CHENGYU_PROFILE=stage:cover,tts    cProfile; <out_dir>/profile/<span>-<id>.prof
+    CHENGYU_TRACEMALLOC=stage:*        tracemalloc peak + largest allocation sites still live at exit
+Python 3.12+ allows one active cProfile at a time; overlapping spans are skipped.
+Without configure(), CHENGYU_METRICS=report.json / CHENGYU_TRACE=trace.json
+do the same for any script.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import fnmatch
+import datetime
+import functools
+import itertools
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource  # POSIX only
+except ImportError:  # pragma: no cover
+    resource = None
+
+_LOCK = threading.Lock()
+_IDS = itertools.count(1)
+_current: contextvars.ContextVar = contextvars.ContextVar("chengyu_span", default=None)
+
+def _rss_mb() -> Optional[float]:
+    """Process peak RSS so far (ru_maxrss: KiB on Linux, bytes on macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+def _patterns(var: str) -> List[str]:
+    return [p.strip() for p in os.getenv(var, "").split(",") if p.strip()]
+
+def _wanted(var: str, name: str) -> bool:
+    return any(fnmatch.fnmatchcase(name, p) for p in _patterns(var))
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.id = next(_IDS)
+        self.name = name
+        self.parent = parent.id if parent else None
+        self.thread = threading.current_thread().name
+        self.tid = threading.get_ident()
+        self.attrs = dict(attrs)
+        self.counters: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        self.wall = self.cpu = None
+        self.rss_mb = self.rss_grew_mb = None
+        self.error: Optional[str] = None
+
+    def add(self, **counters):
+        with _LOCK:
+            for k, v in counters.items():
+                if v:
+                    self.counters[k] = self.counters.get(k, 0) + v
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = {"id": self.id, "name": self.name, "parent": self.parent, "thread": self.thread,
+             "start_s": round(self.start - _rec.t0, 4),
+             "wall_s": None if self.wall is None else round(self.wall, 4),
+             "cpu_s": None if self.cpu is None else round(self.cpu, 4),
+             "rss_peak_mb": self.rss_mb, "rss_grew_mb": self.rss_grew_mb}
+        if self.attrs:
+            d["attrs"] = self.attrs
+        if self.counters:
+            d["counters"] = self.counters
+        if self.error:
+            d["error"] = self.error
+        return d
+
+class _Recorder:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.started = datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        self.spans: List[Span] = []
+        self.events: List[Dict[str, Any]] = []
+        self.meta: Dict[str, Any] = {}
+        self.out_dir: Optional[Path] = None
+        self.report_path = os.getenv("CHENGYU_METRICS") or None
+        self.trace_path = os.getenv("CHENGYU_TRACE") or None
+        self.tracing = 0  # spans currently holding tracemalloc
+
+_rec = _Recorder()
+
+def reset():
+    """Forget everything recorded so far (start of a new run in a long-lived process)."""
+    global _rec
+    _rec = _Recorder()
+
+def configure(out_dir=None, *, report=None, trace=None, **meta):
+    """
+    `out_dir`: where profiles go; `report` / `trace`: files written at exit;
+    `meta`: copied into the report (run id, show, ...).
+    """
+    if out_dir is not None:
+        _rec.out_dir = Path(out_dir)
+    if report is not None:
+        _rec.report_path = str(report)
+    if trace is not None:
+        _rec.trace_path = str(trace)
+    _rec.meta.update(meta)
+
+def current() -> Optional[Span]:
+    return _current.get()
+
+def add(**counters):
+    """Add counters to the current span (no-op outside any span)."""
+    sp = _current.get()
+    if sp is not None:
+        sp.add(**counters)
+
+def usage(u) -> None:
+    """Record API token usage (chat: prompt/completion_tokens; images: input/output_tokens)."""
+    if u is None:
+        return
+    get = u.get if isinstance(u, dict) else (lambda k: getattr(u, k, None))
+    add(tokens_in=get("prompt_tokens") or get("input_tokens") or 0,
+        tokens_out=get("completion_tokens") or get("output_tokens") or 0)
+
+def event(name: str, **attrs):
+    """Instant marker (a gate rejection, a retry decision) inside the current span."""
+    sp = _current.get()
+    with _LOCK:
+        _rec.events.append({"name": name, "t_s": round(time.perf_counter() - _rec.t0, 4),
+                            "span": sp.id if sp else None, "thread": threading.current_thread().name,
+                            "tid": threading.get_ident(), **({"attrs": attrs} if attrs else {})})
+
+def _profile_dir() -> Path:
+    d = (_rec.out_dir or Path(os.getenv("CHENGYU_PROFILE_DIR", "."))) / "profile"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+def _start_profile(sp: Span):
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:  # 3.12+: another profiler is active (overlapping span)
+        sp.set(profile="skipped: profiler busy")
+        return None
+    return prof
+
+def _stop_profile(sp: Span, prof):
+    prof.disable()
+    path = _profile_dir() / f"{sp.name.replace(':', '-').replace('/', '-')}-{sp.id}.prof"
+    prof.dump_stats(str(path))
+    sp.set(profile=str(path))
+
+def _start_tracemalloc() -> bool:
+    import tracemalloc
+    with _LOCK:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        _rec.tracing += 1
+    tracemalloc.reset_peak()
+    return True
+
+def _stop_tracemalloc(sp: Span):
+    import tracemalloc
+    # process-wide: concurrent spans share the peak
+    _, peak = tracemalloc.get_traced_memory()
+    snap = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)])
+    sp.set(py_alloc_peak_mb=round(peak / (1 << 20), 2),
+           live_at_exit=[f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size / (1 << 20):.2f} MB"
+                         for s in snap.statistics("lineno")[:5]])
+    with _LOCK:
+        _rec.tracing -= 1
+        if _rec.tracing == 0:
+            tracemalloc.stop()
+
+@contextmanager
+def span(name: str, **attrs):
+    sp = Span(name, _current.get(), attrs)
+    token = _current.set(sp)
+    prof = _start_profile(sp) if _wanted("CHENGYU_PROFILE", name) else None
+    traced = _wanted("CHENGYU_TRACEMALLOC", name) and _start_tracemalloc()
+    rss0, cpu0 = _rss_mb(), time.thread_time()
+    try:
+        yield sp
+    except BaseException as e:
+        sp.error = repr(e)
+        raise
+    finally:
+        sp.wall = time.perf_counter() - sp.start
+        sp.cpu = time.thread_time() - cpu0
+        sp.rss_mb = _rss_mb()
+        if rss0 is not None:
+            sp.rss_grew_mb = round(sp.rss_mb - rss0, 1)
+        if prof is not None:
+            _stop_profile(sp, prof)
+        if traced:
+            _stop_tracemalloc(sp)
+        _current.reset(token)
+        with _LOCK:
+            _rec.spans.append(sp)
+
+def traced(name: Optional[str] = None, **attrs):
+    """Decorator form of span()."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with span(name or fn.__qualname__, **attrs):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+def bind(fn):
+    """`fn` that runs under the caller's current span, in whatever thread calls it."""
+    ctx = contextvars.copy_context()
+    @functools.wraps(fn)
+    def run(*a, **kw):
+        return ctx.copy().run(fn, *a, **kw)  # a Context can only be entered by one thread at a time
+    return run
+
+# ---------- output ----------
+
+def report() -> Dict[str, Any]:
+    with _LOCK:
+        spans = sorted(_rec.spans, key=lambda s: s.start)
+        events = list(_rec.events)
+    totals: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        t = totals.setdefault(s.name, {"count": 0, "errors": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        t["count"] += 1
+        t["errors"] += bool(s.error)
+        t["wall_s"] = round(t["wall_s"] + (s.wall or 0), 4)
+        t["cpu_s"] = round(t["cpu_s"] + (s.cpu or 0), 4)
+        for k, v in s.counters.items():
+            t[k] = t.get(k, 0) + v
+    return {
+        "started": _rec.started,
+        "meta": _rec.meta,
+        "python": sys.version.split()[0],
+        "wall_s": round(time.perf_counter() - _rec.t0, 3),
+        "cpu_s": round(time.process_time(), 3),
+        "peak_rss_mb": _rss_mb(),
+        "totals": totals,
+        "spans": [s.as_dict() for s in spans],
+        "events": [{k: v for k, v in e.items() if k != "tid"} for e in events],
+    }
+
+def trace_events() -> Dict[str, Any]:
+    """Chrome trace-event JSON: one complete ("X") event per span, instants for events."""
+    with _LOCK:
+        spans, events = list(_rec.spans), list(_rec.events)
+    pid = os.getpid()
+    out, threads = [], {}
+    for s in spans:
+        threads[s.tid] = s.thread
+        args = {**s.attrs, **s.counters, "cpu_ms": round((s.cpu or 0) * 1e3, 1), "rss_peak_mb": s.rss_mb}
+        if s.error:
+            args["error"] = s.error
+        out.append({"name": s.name, "cat": s.name.split(":")[0], "ph": "X", "pid": pid, "tid": s.tid,
+                    "ts": round((s.start - _rec.t0) * 1e6), "dur": round((s.wall or 0) * 1e6), "args": args})
+    for e in events:
+        threads.setdefault(e["tid"], e["thread"])
+        out.append({"name": e["name"], "ph": "i", "s": "t", "pid": pid, "tid": e["tid"],
+                    "ts": round(e["t_s"] * 1e6), "args": e.get("attrs", {})})
+    for tid, tname in threads.items():
+        out.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+def _dump(path, obj) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+def write_report(path) -> Path:
+    return _dump(path, report())
+
+def write_trace(path) -> Path:
+    return _dump(path, trace_events())
+
+def summary(top: int = 8) -> str:
+    """One line per slowest span name, for the log."""
+    rows = sorted(report()["totals"].items(), key=lambda kv: -kv[1]["wall_s"])[:top]
+    return "\n".join(
+        f"  {name:<24} ×{t['count']:<3} {t['wall_s']:8.2f}s wall {t['cpu_s']:7.2f}s cpu"
+        + "".join(f" {k}={v:,}" for k, v in t.items() if k.startswith(("tokens_", "bytes_")))
+        for name, t in rows)
+
+def _at_exit():
+    if _rec.report_path and _rec.spans:
+        print("Run report:", write_report(_rec.report_path))
+        print(summary())
+    if _rec.trace_path and _rec.spans:
+        print("Chrome trace:", write_trace(_rec.trace_path))
+
+atexit.register(_at_exit)
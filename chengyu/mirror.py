@@ -0,0 +1,100 @@
+# chengyu/mirror.py
+"""
+Persistent local mirror of the site repo, shared by dedupe and publish.
+
+Layout under settings.MIRROR_DIR:
+    <owner>__<repo>.git    bare partial clone (--filter=blob:none)
+    <owner>__<repo>.lock   flock() target; one operation at a time per mirror
+
+Each operation runs in its own sparse, detached worktree over the mirror,
+after an incremental fetch of the branch, so steady-state transfer is only
+the new objects (plus blobs for the paths actually checked out). No token
+is stored on disk: credentials are passed per command as an http extraheader.
+"""
+
+import base64
+import fcntl
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .utils import run_git
+from . import metrics
+
+def _auth_args(token: Optional[str]) -> list:
+    if not token:
+        return []
+    basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+    return ["-c", f"http.https://github.com/.extraheader=AUTHORIZATION: basic {basic}"]
+
+def _remote_url(repo: str) -> str:
+    # tests / local setups may point at a path or file:// URL
+    return repo if (repo.startswith(("/", "file:")) or "://" in repo) else f"https://github.com/{repo}.git"
+
+def mirror_path(root, repo: str) -> Path:
+    name = repo.rstrip("/").removesuffix(".git").replace(":", "_").strip("/").replace("/", "__")
+    return Path(root) / f"{name}.git"
+
+@contextmanager
+def _locked(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+@metrics.traced("git:fetch")
+def sync(repo: str, branch: str, root, *, token: Optional[str] = None, timeout: int = 120) -> Path:
+    """Create the mirror on first use, else fetch the branch incrementally. Caller holds the lock."""
+    git_dir = mirror_path(root, repo)
+    auth = _auth_args(token)
+    if not (git_dir / "HEAD").exists():
+        shutil.rmtree(git_dir, ignore_errors=True)
+        run_git([*auth, "clone", "--bare", "--filter=blob:none", "--branch", branch,
+                 _remote_url(repo), str(git_dir)], cwd=None, timeout=timeout)
+    run_git([*auth, "fetch", "--prune", "origin", f"+refs/heads/{branch}:refs/heads/{branch}"],
+            cwd=str(git_dir), timeout=timeout)
+    run_git(["worktree", "prune"], cwd=str(git_dir), timeout=30)
+    return git_dir
+
+@contextmanager
+def worktree(repo: str, branch: str, root, *, paths: Optional[Iterable[str]] = None,
+             token: Optional[str] = None, timeout: int = 120):
+    """
+    Yield a detached worktree at the freshly fetched branch head.
+    `paths`: sparse-checkout patterns (gitignore style, e.g. "/_posts/"); None = full checkout.
+    Files outside the patterns can still be added with `git add --sparse`.
+    """
+    root = Path(root)
+    git_dir = mirror_path(root, repo)
+    with _locked(git_dir.with_suffix(".lock")):
+        sync(repo, branch, root, token=token, timeout=timeout)
+        wt = tempfile.mkdtemp(prefix="chengyu_wt_", dir=str(root))
+        auth = _auth_args(token)
+        try:
+            with metrics.span("git:checkout", mirror=True):
+                run_git(["worktree", "add", "--detach", "--no-checkout", wt, f"refs/heads/{branch}"],
+                        cwd=str(git_dir), timeout=60)
+                if paths is not None:
+                    run_git(["sparse-checkout", "set", "--no-cone", *paths], cwd=wt, timeout=60)
+                # checkout may lazily fetch blobs from the promisor remote
+                run_git([*auth, "checkout", "--detach", f"refs/heads/{branch}"], cwd=wt, timeout=timeout)
+            yield Path(wt)
+        finally:
+            try:
+                run_git(["worktree", "remove", "--force", wt], cwd=str(git_dir), timeout=60)
+            except Exception as e:
+                print("Worktree cleanup failed (pruned on next sync):", e)
+                shutil.rmtree(wt, ignore_errors=True)
+
+def push(wt, branch: str, *, repo: str, token: Optional[str] = None, timeout: int = 240, extra=()):
+    """Push the worktree's HEAD to the branch (detached worktrees have no upstream)."""
+    run_git([*_auth_args(token), *extra, "push", _remote_url(repo), f"HEAD:refs/heads/{branch}"],
+            cwd=str(wt), timeout=timeout)
+
+def pull_rebase(wt, branch: str, *, repo: str, token: Optional[str] = None, timeout: int = 120):
+    run_git([*_auth_args(token), "pull", "--rebase", _remote_url(repo), branch], cwd=str(wt), timeout=timeout)
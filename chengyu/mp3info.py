@@ -0,0 +1,226 @@
+# chengyu/mp3info.py
+# Pure-Python MP3 duration from frame headers (no ffprobe/mutagen needed).
+# Uses the Xing/Info or VBRI frame count when the encoder wrote one; otherwise
+# walks every frame header, which is exact for CBR and VBR alike and takes a few
+# milliseconds for an episode-sized file. audio_frames()/silence() work at the
+# same level to join MP3 segments without re-encoding (tts.tts_episode), and
+# frame_gains() reads Layer III side info for silence trimming (audio_optimize).
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+# bitrate tables (kbps) indexed [version_is_v1][layer][index]; layer: 1=I, 2=II, 3=III
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+# sample rates indexed by version bits: 0=MPEG2.5, 2=MPEG2, 3=MPEG1
+_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+@dataclass
+class Mp3Info:
+    duration: float      # seconds
+    frames: int
+    sample_rate: int
+    channels: int
+    bitrate: int         # average, bits/s
+    vbr: bool
+    audio_offset: int    # first frame (after any ID3v2 tag)
+
+@dataclass
+class _Frame:
+    v1: bool
+    layer: int
+    bitrate: int         # bits/s
+    sample_rate: int
+    channels: int
+    samples: int
+    length: int
+
+def id3v2_size(buf: bytes) -> int:
+    """Total size of a leading ID3v2 tag (header + body + footer), 0 if none."""
+    if len(buf) < 10 or buf[:3] != b"ID3":
+        return 0
+    size = (buf[6] << 21) | (buf[7] << 14) | (buf[8] << 7) | buf[9]
+    return 10 + size + (10 if buf[5] & 0x10 else 0)
+
+def _frame_at(buf: bytes, i: int) -> Optional[_Frame]:
+    if i + 4 > len(buf) or buf[i] != 0xFF or (buf[i + 1] & 0xE0) != 0xE0:
+        return None
+    ver = (buf[i + 1] >> 3) & 3
+    layer = 4 - ((buf[i + 1] >> 1) & 3)
+    br_idx = buf[i + 2] >> 4
+    sr_idx = (buf[i + 2] >> 2) & 3
+    if ver == 1 or layer == 4 or br_idx in (0, 15) or sr_idx == 3:
+        return None  # reserved / free-format: not a usable header
+    v1 = ver == 3
+    pad = (buf[i + 2] >> 1) & 1
+    bitrate = _BITRATES[v1][layer][br_idx] * 1000
+    sr = _RATES[ver][sr_idx]
+    channels = 1 if (buf[i + 3] >> 6) == 3 else 2
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sr + pad) * 4
+    else:
+        samples = 1152 if (v1 or layer == 2) else 576
+        length = samples // 8 * bitrate // sr + pad
+    return _Frame(v1, layer, bitrate, sr, channels, samples, length)
+
+def _vbr_frames(buf: bytes, i: int, f: _Frame) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first frame, if present."""
+    side = (32 if f.channels == 2 else 17) if f.v1 else (17 if f.channels == 2 else 9)
+    x = i + 4 + side
+    if buf[x:x + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(buf[x + 4:x + 8], "big")
+        if flags & 1:
+            return int.from_bytes(buf[x + 8:x + 12], "big")
+    v = i + 4 + 32
+    if buf[v:v + 4] == b"VBRI":
+        return int.from_bytes(buf[v + 14:v + 18], "big")
+    return None
+
+def _sync(buf: bytes, start: int) -> int:
+    """Offset of the first header followed by a second valid header (guards against false syncs)."""
+    i = buf.find(b"\xFF", start)
+    while i != -1 and i + 4 <= len(buf):
+        f = _frame_at(buf, i)
+        if f and (i + f.length >= len(buf) or _frame_at(buf, i + f.length)):
+            return i
+        i = buf.find(b"\xFF", i + 1)
+    return -1
+
+def _read(src: Union[bytes, str, Path]) -> bytes:
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return bytes(src)
+    return Path(src).read_bytes()
+
+def mp3_info(src: Union[bytes, str, Path]) -> Mp3Info:
+    """Parse an MP3 (bytes or path). Raises ValueError if no MPEG audio frames are found."""
+    buf = _read(src)
+    start = _sync(buf, id3v2_size(buf))
+    if start < 0:
+        raise ValueError("no MPEG audio frames found")
+    first = _frame_at(buf, start)
+
+    n = _vbr_frames(buf, start, first)
+    if n:
+        duration = n * first.samples / first.sample_rate
+        audio_bytes = len(buf) - start - first.length
+        return Mp3Info(duration, n, first.sample_rate, first.channels,
+                       int(audio_bytes * 8 / duration) if duration else 0, True, start)
+
+    # walk the frames; stop at trailing tags (ID3v1 "TAG", APE) or garbage
+    frames = samples = 0
+    rates = set()
+    i, end = start, len(buf)
+    while i < end:
+        f = _frame_at(buf, i)
+        if not f:
+            nxt = _sync(buf, i + 1)
+            if nxt < 0:
+                break
+            i = nxt
+            continue
+        frames += 1
+        samples += f.samples
+        rates.add(f.bitrate)
+        i += f.length
+    duration = samples / first.sample_rate
+    return Mp3Info(duration, frames, first.sample_rate, first.channels,
+                   int((i - start) * 8 / duration) if duration else 0, len(rates) > 1, start)
+
+def audio_frames(src: Union[bytes, str, Path]) -> Tuple[bytes, float]:
+    """
+    (frames, seconds): the bare MPEG frames of an MP3, without ID3v2/ID3v1/APE
+    tags or a Xing/Info/VBRI header frame, so that several can be concatenated
+    into one stream. The duration is counted from the frames kept.
+    """
+    buf = _read(src)
+    start = _sync(buf, id3v2_size(buf))
+    if start < 0:
+        raise ValueError("no MPEG audio frames found")
+    first = _frame_at(buf, start)
+    side = (32 if first.channels == 2 else 17) if first.v1 else (17 if first.channels == 2 else 9)
+    if buf[start + 4 + side:start + 8 + side] in (b"Xing", b"Info") or buf[start + 36:start + 40] == b"VBRI":
+        start += first.length  # the header frame decodes as silence of the wrong length; drop it
+    out, samples = bytearray(), 0
+    i = start
+    while i < len(buf):
+        f = _frame_at(buf, i)
+        if not f or i + f.length > len(buf):
+            nxt = _sync(buf, i + 1)
+            if nxt < 0:
+                break
+            i = nxt
+            continue
+        out += buf[i:i + f.length]
+        samples += f.samples
+        i += f.length
+    return bytes(out), samples / first.sample_rate
+
+def _global_gain(buf: bytes, i: int, f: _Frame) -> int:
+    """Loudest global_gain over the frame's granules/channels (Layer III side info); 255 otherwise."""
+    if f.layer != 3:
+        return 255
+    o = i + 4 + (0 if buf[i + 1] & 1 else 2)  # skip the CRC when protected
+    side = int.from_bytes(buf[o:o + 32].ljust(32, b"\0"), "big")
+    if f.v1:  # main_data_begin 9, private bits, scfsi 4/channel; 59-bit granule blocks
+        pos, block, granules = 9 + (5 if f.channels == 1 else 3) + 4 * f.channels, 59, 2
+    else:     # MPEG-2/2.5: main_data_begin 8, private bits; one granule, 63-bit blocks
+        pos, block, granules = 8 + (1 if f.channels == 1 else 2), 63, 1
+    gain = 0
+    for _ in range(granules * f.channels):
+        gain = max(gain, (side >> (256 - pos - 21 - 8)) & 0xFF)  # after part2_3_length(12), big_values(9)
+        pos += block
+    return gain
+
+def frame_gains(src: Union[bytes, str, Path]) -> List[Tuple[int, int, int]]:
+    """
+    (offset, length, global_gain) per frame. global_gain is the quantiser step
+    (1.5 dB units), a loudness proxy that needs no decoding: speech from the
+    TTS sits around 140–160, room tone around 120, generated silence at 0.
+    """
+    buf = _read(src)
+    i = _sync(buf, id3v2_size(buf))
+    out = []
+    while 0 <= i < len(buf):
+        f = _frame_at(buf, i)
+        if not f or i + f.length > len(buf):
+            i = _sync(buf, i + 1)
+            continue
+        out.append((i, f.length, _global_gain(buf, i, f)))
+        i += f.length
+    return out
+
+def silence(like: bytes, seconds: float) -> Tuple[bytes, float]:
+    """
+    (frames, seconds): digital silence in the format of the first frame of
+    `like` (same version, bitrate, rate, channels), as whole frames. Layer III
+    frames with all-zero side info and main data decode to silence, so nothing
+    is encoded.
+    """
+    i = _sync(like, id3v2_size(like))
+    if i < 0 or seconds <= 0:
+        return b"", 0.0
+    head = bytearray(like[i:i + 4])
+    head[1] |= 0x01   # no CRC
+    head[2] &= ~0x02  # no padding
+    f = _frame_at(bytes(head), 0)
+    n = int(round(seconds * f.sample_rate / f.samples))
+    return (bytes(head) + bytes(f.length - 4)) * n, n * f.samples / f.sample_rate
+
+def duration_seconds(src: Union[bytes, str, Path]) -> float:
+    return mp3_info(src).duration
+
+def format_duration(seconds: float) -> str:
+    """HH:MM:SS, the form itunes:duration expects."""
+    s = int(round(seconds))
+    return f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"
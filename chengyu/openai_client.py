@@ -0,0 +1,230 @@
+# chengyu/openai_client.py
+"""
+Shared OpenAI client for gen, tts and the cover modules.
+
+- One OpenAI() per process (one connection pool); the SDK's own retries are
+  off so there is exactly one retry policy.
+- Per-endpoint token buckets (requests/min; tokens/min for chat) that learn the
+  account's limits from x-ratelimit-* response headers and pace callers before
+  they hit 429. Concurrent callers reserve in arrival order.
+- Retries on 429, 5xx, timeouts and connection errors with jittered exponential
+  backoff, honouring retry-after(-ms) and x-ratelimit-reset-*. Quota errors
+  (insufficient_quota) fail at once.
+- Per-call `deadline` (seconds): each attempt's timeout is capped by what's
+  left, and no wait (bucket or backoff) runs past it.
+
+    resp = openai_client.chat(model=..., messages=[...])
+    audio = openai_client.speech(model=..., voice=..., input=text)     # bytes
+    res = openai_client.images_generate(model=..., prompt=..., deadline=300)
+
+Limits can be seeded before the first response with OPENAI_RPM_<ENDPOINT> /
+OPENAI_TPM_<ENDPOINT> (endpoints: CHAT, IMAGES, SPEECH).
+"""
+
+import io
+import os
+import re
+import time
+import random
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import openai
+from openai import OpenAI
+
+try:  # a stream cut mid-body surfaces as a raw transport error, not an APIConnectionError
+    from httpx import TransportError as _TransportError
+except ImportError:  # pragma: no cover
+    _TransportError = openai.APIConnectionError
+
+from . import metrics
+
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))  # on top of the first attempt; 0 = one attempt
+BACKOFF, MAX_SLEEP = 1.0, 60.0
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+class Bucket:
+    """Token bucket refilled at capacity/minute; capacity None = unknown (no pacing yet)."""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.capacity = float(per_minute) if per_minute else None
+        self.level = self.capacity or 0.0
+        self._t = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self._t) * self.capacity / 60)
+        self._t = now
+
+    def reserve(self, n: float) -> float:
+        """Take `n` now (the level may go negative: later callers queue behind); seconds to wait."""
+        with self._lock:
+            if not self.capacity or n <= 0:
+                return 0.0
+            self._refill()
+            self.level -= min(n, self.capacity)  # oversized requests still get through, one at a time
+            return max(0.0, -self.level * 60 / self.capacity)
+
+    def adjust(self, n: float):
+        """Give back (n > 0) or take (n < 0) units once the real cost is known."""
+        with self._lock:
+            if self.capacity:
+                self._refill()
+                self.level = min(self.capacity, self.level + n)
+
+    def observe(self, limit: Optional[str], remaining: Optional[str]):
+        with self._lock:
+            try:
+                limit_f = float(limit) if limit else None
+                remaining_f = float(remaining) if remaining is not None else None
+            except ValueError:
+                return
+            learned = limit_f and not self.capacity
+            if limit_f:
+                self._refill()
+                self.capacity = limit_f
+            if remaining_f is not None and self.capacity:
+                # the server also sees other processes' traffic: only ever tighten
+                self.level = remaining_f if learned else min(self.level, remaining_f)
+
+class _Limits:
+    def __init__(self, endpoint: str):
+        env = endpoint.upper()
+        self.requests = Bucket(os.getenv(f"OPENAI_RPM_{env}"))
+        self.tokens = Bucket(os.getenv(f"OPENAI_TPM_{env}"))
+
+    def observe(self, headers):
+        self.requests.observe(headers.get("x-ratelimit-limit-requests"),
+                              headers.get("x-ratelimit-remaining-requests"))
+        self.tokens.observe(headers.get("x-ratelimit-limit-tokens"),
+                            headers.get("x-ratelimit-remaining-tokens"))
+
+_limits: Dict[str, _Limits] = {name: _Limits(name) for name in ("chat", "images", "speech")}
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
+def client() -> OpenAI:
+    """Process-wide OpenAI client (connection reuse); retries happen in _call."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(max_retries=0)
+        return _client
+
+def _duration(s: Optional[str]) -> Optional[float]:
+    """'6m0s', '1.5s', '20ms' -> seconds."""
+    if not s:
+        return None
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", s)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(v) * scale[u] for v, u in parts)
+
+def _server_delay(headers) -> Optional[float]:
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    resets = [_duration(headers.get(f"x-ratelimit-reset-{k}")) for k in ("requests", "tokens")
+              if headers.get(f"x-ratelimit-remaining-{k}") == "0"]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+def _sleep(seconds: float, end: Optional[float], what: str):
+    if seconds <= 0:
+        return
+    if end is not None and time.monotonic() + seconds > end:
+        raise DeadlineExceeded(f"{what}: deadline reached while waiting {seconds:.1f}s")
+    metrics.add(ratelimit_wait_s=seconds)
+    time.sleep(seconds)
+
+def _call(endpoint: str, send: Callable[[float], Tuple[object, object]], *, tokens: int = 0,
+          timeout: float = 120, deadline: Optional[float] = None, retries: int = MAX_RETRIES):
+    """
+    send(timeout) -> (headers, value) performs one attempt. Returns value.
+    `tokens`: estimated tokens for the tokens/min bucket.
+    `retries`: further attempts after the first (at most retries + 1 sends).
+    """
+    lim = _limits[endpoint]
+    end = time.monotonic() + deadline if deadline else None
+    attempts = max(0, retries) + 1
+    for attempt in range(1, attempts + 1):
+        wait = max(lim.requests.reserve(1), lim.tokens.reserve(tokens))
+        try:
+            _sleep(wait, end, endpoint)
+        except DeadlineExceeded:
+            lim.requests.adjust(1)  # hand the reservation to whoever queued behind us
+            lim.tokens.adjust(tokens)
+            raise
+        left = timeout if end is None else min(timeout, end - time.monotonic())
+        if left <= 0:
+            raise DeadlineExceeded(f"{endpoint}: deadline reached")
+        try:
+            headers, value = send(left)
+            lim.observe(headers)
+            return value
+        except openai.APIStatusError as e:
+            lim.observe(e.response.headers)
+            if e.status_code not in RETRY_STATUS or getattr(e, "code", None) == "insufficient_quota":
+                raise
+            err, delay = e, _server_delay(e.response.headers)
+        except (openai.APIConnectionError, _TransportError) as e:  # includes APITimeoutError
+            err, delay = e, None
+        if attempt == attempts:
+            raise err
+        if delay is None:
+            delay = BACKOFF * 2 ** (attempt - 1) * (0.5 + random.random() / 2)
+        delay = min(MAX_SLEEP, delay)
+        status = getattr(err, "status_code", None) or type(err).__name__
+        metrics.event("openai:retry", endpoint=endpoint, attempt=attempt, status=status, wait_s=round(delay, 2))
+        print(f"OpenAI {endpoint}: {status}; retry {attempt}/{attempts - 1} in {delay:.1f}s")
+        _sleep(delay, end, endpoint)
+
+def _raw(resp) -> Tuple[object, object]:
+    return resp.headers, resp.parse()
+
+def _estimate_chat_tokens(kw: dict) -> int:
+    chars = sum(len(m.get("content") or "") for m in kw.get("messages", []) if isinstance(m.get("content"), str))
+    return chars // 3 + int(kw.get("max_tokens") or kw.get("max_completion_tokens") or 1500)
+
+# ---------- endpoints ----------
+
+def chat(*, deadline: Optional[float] = None, timeout: float = 120, **kw):
+    """client.chat.completions.create(**kw), paced and retried."""
+    est = _estimate_chat_tokens(kw)
+    resp = _call("chat", lambda t: _raw(client().chat.completions.with_raw_response.create(timeout=t, **kw)),
+                 tokens=est, timeout=timeout, deadline=deadline)
+    used = getattr(getattr(resp, "usage", None), "total_tokens", None)
+    if used is not None:
+        _limits["chat"].tokens.adjust(est - used)
+    return resp
+
+def images_generate(*, deadline: Optional[float] = None, timeout: float = 300, **kw):
+    return _call("images", lambda t: _raw(client().images.with_raw_response.generate(timeout=t, **kw)),
+                 timeout=timeout, deadline=deadline)
+
+def images_edit(*, deadline: Optional[float] = None, timeout: float = 300, **kw):
+    return _call("images", lambda t: _raw(client().images.with_raw_response.edit(timeout=t, **kw)),
+                 timeout=timeout, deadline=deadline)
+
+def speech(*, deadline: Optional[float] = None, timeout: float = 300, **kw) -> bytes:
+    """Synthesised audio bytes; the whole body is read inside the attempt, so a cut stream retries."""
+    def send(t):
+        with client().audio.speech.with_streaming_response.create(timeout=t, **kw) as resp:
+            buf = io.BytesIO()
+            for chunk in resp.iter_bytes():
+                buf.write(chunk)
+            return resp.headers, buf.getvalue()
+    return _call("speech", send, timeout=timeout, deadline=deadline)
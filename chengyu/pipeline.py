@@ -0,0 +1,196 @@
+# chengyu/pipeline.py
+"""
+Tiny stage runner for the episode pipeline.
+
+Stages declare their dependencies; every stage whose inputs are ready runs
+concurrently on its own thread (the work is network-bound: image, TTS and chat
+API calls), so wall time is the critical path instead of the sum.
+
+- Per-stage timeout, measured from when the stage actually starts.
+- Fail fast: a fatal error or timeout cancels stages not yet started, sets the
+  shared `cancel` event (stages that accept a `cancel` kwarg can poll it) and
+  raises immediately without waiting for stragglers.
+- Non-fatal stages log the error and yield their `default`.
+- Results come back in declaration order regardless of completion order.
+- Each stage is a metrics span "stage:<name>" under the caller's current span.
+
+    results = run([
+        Stage("cover", make_cover, timeout=480),
+        Stage("audio", make_audio, timeout=300),
+        Stage("derivs", lambda cover: make_derivatives(cover), deps=("cover",)),
+    ])
+"""
+
+import time
+import inspect
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from . import metrics
+
+class StageError(RuntimeError):
+    def __init__(self, stage: str, cause: BaseException):
+        super().__init__(f"stage {stage!r} failed: {cause!r}")
+        self.stage, self.cause = stage, cause
+
+class StageTimeout(StageError):
+    pass
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Any]           # called with dependency results as kwargs (by stage name)
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None  # seconds from stage start
+    fatal: bool = True
+    default: Any = None              # result of a failed non-fatal stage
+
+@dataclass
+class StageStat:
+    name: str
+    status: str = "pending"          # pending | running | ok | restored | failed | timeout | cancelled
+    started: Optional[float] = None
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+@dataclass
+class RunResult:
+    results: Dict[str, Any] = field(default_factory=dict)   # declaration order
+    stats: Dict[str, StageStat] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def __getitem__(self, name: str):
+        return self.results[name]
+
+    def summary(self) -> str:
+        parts = [f"{s.name} {s.status} {s.seconds:.1f}s" if s.seconds is not None else f"{s.name} {s.status}"
+                 for s in self.stats.values()]
+        return f"pipeline {self.seconds:.1f}s: " + ", ".join(parts)
+
+def _accepts(fn, name: str) -> bool:
+    try:
+        params = inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in params or any(p.kind is p.VAR_KEYWORD for p in params.values())
+
+def _check(stages) -> Dict[str, Stage]:
+    by_name: Dict[str, Stage] = {}
+    for st in stages:
+        if st.name in by_name:
+            raise ValueError(f"duplicate stage {st.name!r}")
+        for d in st.deps:
+            if d not in by_name:
+                raise ValueError(f"stage {st.name!r} depends on {d!r}, which is not declared before it")
+        by_name[st.name] = st
+    return by_name
+
+def run(stages: Iterable[Stage], *, max_workers: Optional[int] = None,
+        inputs: Optional[Dict[str, Any]] = None, verbose: bool = True) -> RunResult:
+    """
+    Execute `stages` (dependencies must be declared first). `inputs`: results
+    that are already known (e.g. restored from a checkpoint); those stages are skipped.
+    """
+    stages = list(stages)
+    by_name = _check(stages)
+    out = RunResult(stats={s.name: StageStat(s.name) for s in stages})
+    done: Dict[str, Any] = {}
+    for name, value in (inputs or {}).items():
+        if name in by_name:
+            done[name] = value
+            out.stats[name].status = "restored"
+    cancel = threading.Event()
+    t0 = time.perf_counter()
+
+    limit = max_workers or max(1, len(stages))
+    running = {}  # future -> Stage
+
+    def _call(st: Stage, kwargs: dict):
+        out.stats[st.name].started = time.perf_counter()
+        if _accepts(st.fn, "cancel"):
+            kwargs = {**kwargs, "cancel": cancel}
+        with metrics.span(f"stage:{st.name}"):
+            return st.fn(**kwargs)
+
+    def _spawn(st: Stage, kwargs: dict) -> Future:
+        # daemon threads: a timed-out or abandoned stage must not hold up interpreter exit
+        fut = Future()
+        call = metrics.bind(_call)
+        def target():
+            if not fut.set_running_or_notify_cancel():
+                return
+            try:
+                fut.set_result(call(st, kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+        threading.Thread(target=target, name=f"stage-{st.name}", daemon=True).start()
+        return fut
+
+    def _submit_ready():
+        busy = {s.name for s in running.values()}
+        for st in stages:
+            if len(running) >= limit:
+                return
+            if st.name in done or st.name in busy:
+                continue
+            if all(d in done for d in st.deps):
+                out.stats[st.name].status = "running"
+                running[_spawn(st, {d: done[d] for d in st.deps})] = st
+
+    def _fail(st: Stage, err: BaseException, status: str):
+        stat = out.stats[st.name]
+        stat.status, stat.error = status, repr(err)
+        if stat.started is not None:
+            stat.seconds = time.perf_counter() - stat.started
+        if not st.fatal:
+            if verbose:
+                print(f"[pipeline] {st.name} {status} (non-fatal): {err!r}")
+            done[st.name] = st.default
+            return
+        cancel.set()
+        for s in stages:
+            if out.stats[s.name].status in ("pending", "running") and s is not st:
+                out.stats[s.name].status = "cancelled"
+        out.seconds = time.perf_counter() - t0
+        if verbose:
+            print("[pipeline]", out.summary())
+        cls = StageTimeout if status == "timeout" else StageError
+        raise cls(st.name, err) from err
+
+    _submit_ready()
+    while running:
+        now = time.perf_counter()
+        # nearest per-stage deadline among started stages
+        waits = [st.timeout - (now - out.stats[st.name].started)
+                 for st in running.values()
+                 if st.timeout is not None and out.stats[st.name].started is not None]
+        finished, _ = wait(list(running), timeout=max(0.0, min(waits)) if waits else 1.0,
+                           return_when=FIRST_COMPLETED)
+        for fut in finished:
+            st = running.pop(fut)
+            try:
+                value = fut.result()
+            except BaseException as e:
+                _fail(st, e, "failed")
+                continue
+            stat = out.stats[st.name]
+            stat.status, stat.seconds = "ok", time.perf_counter() - stat.started
+            done[st.name] = value
+            if verbose:
+                print(f"[pipeline] {st.name} ok in {stat.seconds:.1f}s")
+        now = time.perf_counter()
+        for fut, st in list(running.items()):
+            started = out.stats[st.name].started
+            if st.timeout is not None and started is not None and now - started > st.timeout:
+                running.pop(fut)
+                # threads can't be killed: the stage is abandoned and its result ignored
+                _fail(st, TimeoutError(f"{st.name} exceeded {st.timeout:g}s"), "timeout")
+        _submit_ready()
+
+    out.results = {st.name: done[st.name] for st in stages}
+    out.seconds = time.perf_counter() - t0
+    if verbose:
+        print("[pipeline]", out.summary())
+    return out
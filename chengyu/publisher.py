@@ -3,7 +3,8 @@
 Publish a new episode to the GitHub repo.
 
 Features
-- Writes cover + transcript + metadata + _posts/ Markdown.
+- Writes cover + transcript + metadata + _posts/ Markdown; with `audio_cues`
+  (tts.tts_episode) also chapters.json and a timed transcript.vtt.
 - **Dual audio support**:
     * write_audio_to_repo=True  -> commit episodes/<folder>/audio.mp3
     * upload_audio_to_release=True -> upload MP3 as a GitHub Release asset
@@ -13,6 +14,13 @@ Features
     audio_repo_url, audio_release_url
 - Light sanitizer + converts "Characters" tables to simple lines.
 - Safe git (no prompts, low-speed timeouts, retry push).
+- GitHub REST calls go through chengyu.github (pooled session, retry/backoff);
+  the release MP3 is streamed, and `audio_mp3` may be a file path.
+- commit_mode="api": no clone; blobs/tree/commit/ref through the Git Data API.
+- publish_episodes([...]): many episodes, one clone/commit/push (one Pages build);
+  see scripts/publish_episodes.py for the CLI.
+- The release upload runs concurrently with clone/staging; only the post waits for
+  its URL. If the commit/push fails, the release (or our asset on it) is rolled back.
 
 Usage example:
     publish_episode(
@@ -36,16 +44,24 @@ Usage example:
 
 import os
 import re
+import time
 import json
-import yaml
+import base64
 import shutil
 import tempfile
 import subprocess
 import datetime
 from pathlib import Path
 from unicodedata import normalize
-from typing import Optional, Dict, Any
-import requests
+from typing import Optional, Dict, Any, Callable, List, Union
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import run_git as _run_git
+from . import catalog, chapters, github, metrics, mirror, mp3info
+
+# repo-relative path -> content; a Path is copied/streamed instead of held in memory
+FileData = Union[bytes, Path]
 
 # ----------------------- small utils -----------------------
 
@@ -55,23 +71,6 @@ def _slugify(text: str) -> str:
     txt = re.sub(r"[-\s]+", "-", txt)
     return txt or "episode"
 
-def _git_env():
-    """Environment for git: no prompts, stall detection."""
-    env = os.environ.copy()
-    env["GIT_TERMINAL_PROMPT"] = "0"
-    env["GIT_ASKPASS"] = "true"
-    # low-speed settings to fail on long stalls
-    env.setdefault("GIT_HTTP_LOW_SPEED_LIMIT", "1")  # bytes/sec
-    env.setdefault("GIT_HTTP_LOW_SPEED_TIME", "30")  # seconds
-    return env
-
-def _run_git(args, cwd, timeout: int = 180):
-    """Run a git command with low-speed limits and no prompts."""
-    cmd = ["git", "-c", "http.lowSpeedLimit=1", "-c", "http.lowSpeedTime=30", *args]
-    shown = " ".join(("***" if "@" in str(x) else str(x) for x in cmd))
-    print("+", shown)
-    subprocess.run(cmd, cwd=cwd, check=True, timeout=timeout, env=_git_env())
-
 def _git_clone(repo_url: str, branch: str, dest: str, timeout: int = 120):
     """Clone with no interactive prompts and sensible http timeouts."""
     _run_git([
@@ -82,40 +81,33 @@ def _git_clone(repo_url: str, branch: str, dest: str, timeout: int = 120):
         repo_url, dest
     ], cwd=None, timeout=timeout)
 
-def _gh_token() -> str:
-    tok = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
-    if not tok:
-        raise RuntimeError("GITHUB_TOKEN (or GH_TOKEN) not set")
-    return tok
-
-def _gh_headers():
-    return {"Authorization": f"token {_gh_token()}", "Accept": "application/vnd.github+json"}
-
-GITHUB_API = "https://api.github.com"
-
-def _gh_create_or_get_release(repo: str, tag: str, name: str, body: str = "") -> dict:
-    r = requests.post(f"{GITHUB_API}/repos/{repo}/releases",
-                      headers=_gh_headers(),
-                      json={"tag_name": tag, "name": name, "body": body,
-                            "draft": False, "prerelease": False},
-                      timeout=60)
-    if r.status_code in (200, 201):
-        return r.json()
-    if r.status_code == 422 and "already_exists" in r.text:
-        r2 = requests.get(f"{GITHUB_API}/repos/{repo}/releases/tags/{tag}",
-                          headers=_gh_headers(), timeout=30)
-        r2.raise_for_status()
-        return r2.json()
-    raise RuntimeError(f"Create release failed: {r.status_code} {r.text}")
-
-def _gh_upload_asset(upload_url_tmpl: str, filename: str, blob: bytes, content_type: str) -> dict:
-    url = upload_url_tmpl.split("{")[0] + f"?name={filename}"
-    h = _gh_headers()
-    h["Content-Type"] = content_type
-    r = requests.post(url, headers=h, data=blob, timeout=300)
-    if r.status_code not in (200, 201):
-        raise RuntimeError(f"Upload asset failed: {r.status_code} {r.text}")
-    return r.json()
+def _progress_printer(name: str, step: int = 25):
+    """Upload progress callback: one line per `step` percent."""
+    last = [0]
+    def cb(sent: int, total: int):
+        pct = 100 * sent // max(1, total)
+        if pct >= last[0] + step:
+            last[0] = pct - pct % step
+            print(f"  ↑ {name}: {pct}% of {total / 1e6:.1f} MB")
+    return cb
+
+def _rollback_release(repo: str, up: dict):
+    """
+    Undo what this run did on the release side after the commit failed: a release
+    we created goes away with its tag; on a pre-existing release only our asset does.
+    """
+    if up.get("shared"):
+        return
+    gh = github.client()
+    try:
+        if up["created"]:
+            gh.delete_release(repo, up["release"])
+            print(f"↺ Rolled back release {up['release']['tag_name']}.")
+        else:
+            gh.delete_asset(repo, up["asset"]["id"])
+            print(f"↺ Removed asset {up['asset']['name']} from existing release.")
+    except Exception as e:
+        print("Release rollback failed (clean up manually):", e)
 
 # ----------------------- body cleanup / characters lines -----------------------
 
@@ -190,8 +182,466 @@ def _characters_table_to_lines(md: str) -> str:
 
     return md[:m.start()] + simple_block + md[m.end():]
 
+# ----------------------- commit backends -----------------------
+
+BOT_NAME = "Chengyu Publisher Bot"
+BOT_EMAIL = "actions@users.noreply.github.com"
+
+def _push_with_retry(push, pull_rebase):
+    """push(fast=bool); on timeout/rejection: pull --rebase, then push again."""
+    try:
+        push(fast=True)
+    except subprocess.TimeoutExpired:
+        print("Push timed out; attempting pull --rebase then retry…")
+        try:
+            pull_rebase()
+        except Exception as e:
+            print("Rebase pull failed (continuing to retry push):", e)
+        push(fast=False)
+    except subprocess.CalledProcessError as e:
+        print("Initial push failed; attempting pull --rebase then retry…", e)
+        try:
+            pull_rebase()
+        except Exception as e2:
+            print("Rebase pull failed (continuing to retry push):", e2)
+        push(fast=False)
+
+# disable aggressive pack/delta to speed big pushes (optional)
+_FAST_PUSH = ["-c","core.compression=0", "-c","pack.window=0", "-c","pack.depth=0"]
+
+def _write_files(wt, files: Dict[str, FileData]):
+    for rel, blob in files.items():
+        dest = Path(wt) / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(blob, Path):
+            shutil.copyfile(blob, dest)
+        else:
+            dest.write_bytes(blob)
+
+def _stage_and_commit(wt, files: Dict[str, FileData], message: str,
+                      late: Optional[Callable[[], Dict[str, FileData]]] = None):
+    """`late()` supplies files that depend on concurrent work; called after `files` are written."""
+    _run_git(["config", "user.name", BOT_NAME], cwd=wt, timeout=30)
+    _run_git(["config", "user.email", BOT_EMAIL], cwd=wt, timeout=30)
+    with metrics.span("publish:write", files=len(files)):
+        _write_files(wt, files)
+    if late:
+        extra = late()
+        _write_files(wt, extra)
+        files = {**files, **extra}
+    with metrics.span("git:commit"):
+        # --sparse: mirror worktrees only check out _posts/
+        _run_git(["add", "--sparse", "--", *files], cwd=wt, timeout=90)
+        _run_git(["commit", "-m", message], cwd=wt, timeout=90)
+
+def _git_commit_and_push(repo: str, branch: str, files: Dict[str, FileData], message: str,
+                         *, dry_run: bool = False, timeout_clone: int = 120,
+                         mirror_dir: Optional[str] = None,
+                         late: Optional[Callable[[], Dict[str, FileData]]] = None):
+    """
+    Write `files` (repo-relative path -> bytes), commit, push (with retry).
+    With mirror_dir: sparse worktree over the persistent mirror (see chengyu.mirror);
+    otherwise a throwaway shallow clone. `late`: see _stage_and_commit.
+    """
+    token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+    if not token:
+        raise RuntimeError("GITHUB_TOKEN not set")
+
+    if mirror_dir:
+        with mirror.worktree(repo, branch, mirror_dir, paths=["/_posts/"], token=token,
+                             timeout=timeout_clone) as wt:
+            _stage_and_commit(wt, files, message, late)
+            if not dry_run:
+                with metrics.span("git:push"):
+                    _push_with_retry(
+                        lambda fast: mirror.push(wt, branch, repo=repo, token=token,
+                                                 extra=_FAST_PUSH if fast else ()),
+                        lambda: mirror.pull_rebase(wt, branch, repo=repo, token=token),
+                    )
+        return
+
+    tmp = tempfile.mkdtemp(prefix="chengyu_pub_")
+    try:
+        repo_url = f"https://{token}@github.com/{repo}.git"
+        with metrics.span("git:checkout", mirror=False):
+            _git_clone(repo_url, branch, tmp, timeout=timeout_clone)
+        _stage_and_commit(tmp, files, message, late)
+        if not dry_run:
+            with metrics.span("git:push"):
+                _push_with_retry(
+                    lambda fast: _run_git([*(_FAST_PUSH if fast else []), "push", "origin", branch],
+                                          cwd=tmp, timeout=240),
+                    lambda: _run_git(["pull", "--rebase", "origin", branch], cwd=tmp, timeout=120),
+                )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _api_commit(repo: str, branch: str, files: Dict[str, FileData], message: str,
+                *, api_url: Optional[str] = None, retries: int = 5,
+                late: Optional[Callable[[], Dict[str, FileData]]] = None) -> str:
+    """
+    Commit `files` on top of the branch head through the Git Data API
+    (blobs -> tree on base_tree -> commit -> fast-forward ref). No clone; cost is
+    the episode's bytes. A moved head (non-fast-forward) rebuilds tree+commit on
+    the new head and retries. Returns the new commit sha.
+    `late()` supplies files that depend on concurrent work; called after the other blobs exist.
+    """
+    gh = github.client(api_url)
+    git_api = f"repos/{repo}/git"
+
+    # blobs are content-addressed: create once, reuse across retries
+    entries = []
+    @metrics.traced("publish:blobs")
+    def add_blobs(batch: Dict[str, FileData]):
+        for rel, blob in batch.items():
+            if isinstance(blob, Path):
+                blob = blob.read_bytes()  # the blobs API takes base64 JSON; no streaming
+            b = gh.json("POST", f"{git_api}/blobs", f"Create blob {rel}", timeout=120, json={
+                "content": base64.b64encode(blob).decode("ascii"), "encoding": "base64"})
+            entries.append({"path": rel, "mode": "100644", "type": "blob", "sha": b["sha"]})
+    add_blobs(files)
+    if late:
+        add_blobs(late())
+
+    for attempt in range(1, retries + 1):
+        metrics.event("publish:ref-attempt", attempt=attempt)
+        head = gh.json("GET", f"{git_api}/ref/heads/{branch}", "Read ref", timeout=30)["object"]["sha"]
+        base_tree = gh.json("GET", f"{git_api}/commits/{head}", "Read commit", timeout=30)["tree"]["sha"]
+        tree = gh.json("POST", f"{git_api}/trees", "Create tree", timeout=60,
+                       json={"base_tree": base_tree, "tree": entries})
+        commit = gh.json("POST", f"{git_api}/commits", "Create commit", timeout=60, json={
+            "message": message, "tree": tree["sha"], "parents": [head],
+            "author": {"name": BOT_NAME, "email": BOT_EMAIL}})
+        r = gh.request("PATCH", f"{git_api}/refs/heads/{branch}", timeout=30,
+                       json={"sha": commit["sha"], "force": False})
+        if r.status_code == 200:
+            print(f"✔ Committed {commit['sha'][:12]} on {branch} via API ({len(entries)} files).")
+            return commit["sha"]
+        if r.status_code in (409, 422):  # head moved under us: compare-and-swap lost
+            print(f"Ref update rejected (attempt {attempt}/{retries}): {r.status_code}; retrying on new head…")
+            time.sleep(min(8, 2 ** (attempt - 1)))
+            continue
+        raise RuntimeError(f"Update ref failed: {r.status_code} {r.text}")
+    raise RuntimeError(f"Update ref failed after {retries} attempts (branch kept moving)")
+
 # ----------------------- main publisher -----------------------
 
+def _post_time(publish_time_utc: str) -> str:
+    """HH:MM:SS from e.g. "10:00:00 +0000"; used for backdated (non-today) episodes."""
+    m = re.search(r"\b(\d{1,2}):(\d{2})(?::(\d{2}))?\b", publish_time_utc or "")
+    if not m:
+        return "09:00:00"
+    return f"{int(m.group(1)):02d}:{m.group(2)}:{m.group(3) or '00'}"
+
+def _episode_date(value) -> datetime.date:
+    if value is None:
+        return datetime.date.today()
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+@dataclass
+class _Staged:
+    """One episode's files plus what is needed to build its post once release URLs are known."""
+    folder: str
+    date_str: str
+    slug: str
+    files: Dict[str, FileData]
+    post_rel: str
+    fm: Dict[str, Any]
+    body: str
+    audio_size: int
+    audio_meta: Dict[str, Any]  # audio_duration (+ audio_sha256 from the store)
+    repo_audio_url: Optional[str]
+    prefer_release: bool
+    release_job: Optional[Callable[[], dict]] = None
+    upload: Optional[dict] = None  # release_job() result: {"release","created","asset"}
+    release_asset_url: Optional[str] = None
+    chosen_audio_url: Optional[str] = None
+
+    def post_bytes(self) -> bytes:
+        if self.upload:
+            self.release_asset_url = self.upload["url"]
+
+        # choose which URL the post should use
+        if self.audio_size:
+            if self.prefer_release and self.release_asset_url:
+                self.chosen_audio_url = self.release_asset_url
+            elif self.repo_audio_url:
+                self.chosen_audio_url = self.repo_audio_url
+            elif self.release_asset_url:
+                self.chosen_audio_url = self.release_asset_url
+
+        # build post front matter (include both URLs if we have them)
+        fm = dict(self.fm)
+        if self.chosen_audio_url:
+            fm["audio_url"] = self.chosen_audio_url
+            fm["audio_bytes"] = self.audio_size
+            fm.update(self.audio_meta)
+            if self.upload and self.upload.get("sha256"):
+                fm["audio_sha256"] = self.upload["sha256"]
+        if self.repo_audio_url:
+            fm["audio_repo_url"] = self.repo_audio_url
+        if self.release_asset_url:
+            fm["audio_release_url"] = self.release_asset_url
+
+        return catalog.render_post(fm, self.body + "\n").encode("utf-8")
+
+    def result(self) -> Dict[str, Any]:
+        cover = self.fm["cover_image"].lstrip("/")
+        return {
+            "folder": self.folder,
+            "post": self.post_rel,
+            "cover": cover,
+            "audio_repo_url": self.repo_audio_url,
+            "audio_release_url": self.release_asset_url,
+            "audio_url": self.chosen_audio_url,
+        }
+
+@metrics.traced("publish:upload")
+def release_audio(*, repo: str, data: Dict[str, Any], date, audio_mp3: FileData,
+                  audio_store=None) -> dict:
+    """
+    Upload an episode's MP3: to `audio_store` (content-addressed, shared, never
+    rolled back) or to the episode's own release. Returns
+    {"url","release","created","asset"} (+ "sha256","shared" for the store);
+    JSON-able, and accepted back as an episode's `audio_release`.
+    """
+    date_str = _episode_date(date).strftime("%Y-%m-%d")
+    slug = _slugify(data.get("pinyin") or data.get("chengyu") or "episode")
+    audio_release_name = f"{date_str}-{slug}.mp3"
+
+    if audio_store is not None:
+        put = audio_store.put(audio_mp3, progress=_progress_printer(audio_release_name))
+        return {**put, "release": None, "created": False, "shared": True}
+
+    tag = f"v{date_str.replace('-','')}-{slug}"
+    gh = github.client()
+    rel, created = gh.create_or_get_release(
+        repo, tag=tag,
+        name=f"{data['chengyu']} ({data['pinyin']})",
+        body=f"Episode: {data['chengyu']}"
+    )
+    try:
+        asset = gh.upload_asset(
+            rel, audio_mp3,
+            name=audio_release_name,
+            content_type="audio/mpeg",
+            progress=_progress_printer(audio_release_name),
+        )
+    except Exception:
+        if created:  # nothing references it yet
+            _rollback_release(repo, {"release": rel, "created": True})
+        raise
+    return {"release": rel, "created": created, "asset": asset,
+            "url": asset.get("browser_download_url")}
+
+def _stage_episode(ep: Dict[str, Any], *, show_name: str, repo: str, publish_time_utc: str,
+                   upload_audio_to_release: bool, write_audio_to_repo: bool,
+                   audio_url_preference: str, audio_store=None) -> _Staged:
+    data = ep["data"]
+    cover_ext = (ep.get("cover_ext") or "jpg").lower()
+    assert cover_ext in ("jpg", "jpeg", "png")
+
+    # date + slug
+    day = _episode_date(ep.get("date"))
+    date_str = day.strftime("%Y-%m-%d")
+    slug = _slugify(data.get("pinyin") or data.get("chengyu") or "episode")
+    folder = f"{date_str}-{slug}"
+
+    cover_name = f"cover.{'jpeg' if cover_ext in ('jpg','jpeg') else 'png'}"
+    audio_repo_name = "audio.mp3"
+
+    # Front matter — today's episode is backdated 2 minutes to avoid "future" issues;
+    # catch-up episodes get their own day at the configured publish time
+    if day == datetime.date.today():
+        stamp = (datetime.datetime.utcnow() - datetime.timedelta(minutes=2)).strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        stamp = f"{date_str} {_post_time(publish_time_utc)}"
+    fm = {
+        "layout": "post",
+        "title": f"{data['chengyu']} ({data['pinyin']})",
+        "date": stamp,
+        "description": data["gloss"],
+        "cover_image": f"/episodes/{folder}/{cover_name}",
+    }
+    derivs = ep.get("cover_derivatives") or []
+    for dv in derivs:
+        if dv["name"] == "directory":
+            fm["cover_image_large"] = f"/episodes/{folder}/{dv['filename']}"
+    if derivs:
+        fm["cover_srcset"] = [
+            {"src": f"/episodes/{folder}/{dv['filename']}", "width": dv["width"], "type": dv["type"]}
+            for dv in sorted(derivs, key=lambda dv: (dv["width"], dv["type"]))
+        ]
+
+    audio_mp3 = ep.get("audio_mp3")
+    if isinstance(audio_mp3, str):
+        audio_mp3 = Path(audio_mp3)
+    audio_size = (audio_mp3.stat().st_size if isinstance(audio_mp3, Path)
+                  else len(audio_mp3 or b""))
+    audio_meta = {}
+    if audio_size:
+        try:
+            audio_meta["audio_duration"] = round(mp3info.duration_seconds(audio_mp3), 2)
+        except ValueError as e:
+            print("Could not read MP3 duration:", e)
+
+    # Prepare body: sanitize + Characters->lines
+    safe_body = _sanitize_tables_min(ep.get("body_md") or "")
+    safe_body = _characters_table_to_lines(safe_body).strip()
+
+    # --- stage files (repo-relative path -> bytes) ---
+    ep_rel = f"episodes/{folder}"
+    files: Dict[str, FileData] = {}
+
+    # cover / transcript / metadata
+    files[f"{ep_rel}/{cover_name}"] = ep["cover_bytes"]
+    for dv in derivs:
+        if dv["filename"] != cover_name:
+            files[f"{ep_rel}/{dv['filename']}"] = dv["bytes"]
+    files[f"{ep_rel}/transcript.txt"] = data["script"].encode("utf-8")
+    files[f"{ep_rel}/metadata.json"] = json.dumps({
+        "show": show_name,
+        "chengyu": data["chengyu"],
+        "pinyin": data["pinyin"],
+        "gloss": data["gloss"],
+        "teaser": data["teaser"],
+        "script": data["script"],
+    }, ensure_ascii=False, indent=2).encode("utf-8")
+    cues = ep.get("audio_cues")
+    if cues and audio_size:
+        files[f"{ep_rel}/chapters.json"] = chapters.chapters_json(cues, title=fm["title"])
+        files[f"{ep_rel}/transcript.vtt"] = chapters.webvtt(cues)
+
+    # --- repo audio (if requested) ---
+    repo_audio_url = None
+    if audio_size and write_audio_to_repo:
+        files[f"{ep_rel}/{audio_repo_name}"] = audio_mp3
+        repo_audio_url = f"/episodes/{folder}/{audio_repo_name}"
+
+    st = _Staged(folder=folder, date_str=date_str, slug=slug, files=files,
+                 post_rel=f"_posts/{date_str}-{slug}.md", fm=fm, body=safe_body,
+                 audio_size=audio_size, audio_meta=audio_meta, repo_audio_url=repo_audio_url,
+                 prefer_release=audio_url_preference == "release")
+
+    # --- Release asset upload (if requested): a job run while the repo is cloned and staged ---
+    if ep.get("audio_release"):
+        st.upload = ep["audio_release"]  # uploaded earlier (e.g. a checkpointed run): not ours to roll back
+    elif audio_size and (audio_store is not None or upload_audio_to_release):
+        st.release_job = lambda: release_audio(repo=repo, data=data, date=date_str, audio_mp3=audio_mp3,
+                                               audio_store=audio_store)
+    return st
+
+@metrics.traced("publish")
+def publish_episodes(
+    episodes: List[Dict[str, Any]],
+    *,
+    show_name: str,
+    repo: str,
+    branch: str,
+    site_url: str,
+    baseurl: str,
+    publish_time_utc: str = "",
+    upload_audio_to_release: bool = False,
+    write_audio_to_repo: bool = True,
+    audio_url_preference: str = "repo",  # "repo" | "release"
+    dry_run: bool = False,
+    timeout_clone: int = 120,
+    commit_mode: str = "git",
+    mirror_dir: Optional[str] = None,
+    api_url: Optional[str] = None,
+    max_uploads: int = 4,
+    audio_store=None,  # e.g. audiostore.ReleaseStore: audio only in the content-addressed store
+) -> List[Dict[str, Any]]:
+    """
+    Publish several episodes with ONE clone (or API tree), ONE commit and ONE push,
+    so catch-up/backfill costs a single Pages build. Release uploads run
+    concurrently (up to `max_uploads`) while the repo side is staged.
+
+    Each episode is a dict with the per-episode arguments of publish_episode:
+      data, body_md, cover_bytes, cover_ext, audio_mp3, cover_derivatives, audio_cues
+    plus optional `date` (date or "YYYY-MM-DD"; default today) and `audio_release`
+    (a release_audio() result: the MP3 is already uploaded, use that URL).
+
+    All-or-nothing on the repo side: if the commit/push fails, releases created
+    (or assets uploaded) by this call are rolled back. Returns one result dict per
+    episode, in input order (same keys as publish_episode).
+    """
+    if not episodes:
+        return []
+    audio_url_preference = (audio_url_preference or "repo").lower()
+    if audio_url_preference not in ("repo", "release"):
+        audio_url_preference = "repo"
+
+    staged = [
+        _stage_episode(ep, show_name=show_name, repo=repo, publish_time_utc=publish_time_utc,
+                       upload_audio_to_release=upload_audio_to_release,
+                       write_audio_to_repo=write_audio_to_repo,
+                       audio_url_preference=audio_url_preference, audio_store=audio_store)
+        for ep in episodes
+    ]
+    dupes = {st.folder for st in staged if sum(o.folder == st.folder for o in staged) > 1}
+    if dupes:
+        raise ValueError(f"Duplicate episodes in batch: {sorted(dupes)}")
+
+    files: Dict[str, FileData] = {}
+    for st in staged:
+        files.update(st.files)
+
+    jobs = [st for st in staged if st.release_job]
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_uploads, len(jobs))), thread_name_prefix="release")
+    futures = {st.folder: pool.submit(metrics.bind(st.release_job)) for st in jobs}
+
+    def _post_files() -> Dict[str, FileData]:
+        """Posts are the only files that need release URLs: built last, right before commit."""
+        with metrics.span("publish:wait-uploads", uploads=len(jobs)):
+            for st in jobs:
+                st.upload = futures[st.folder].result()
+        return {st.post_rel: st.post_bytes() for st in staged}
+
+    # --- commit + push ---
+    if len(staged) == 1:
+        message = f"Add episode {staged[0].folder}"
+    else:
+        message = f"Add {len(staged)} episodes\n\n" + "\n".join(f"- {st.folder}" for st in staged)
+    try:
+        if commit_mode == "api":
+            if dry_run:
+                _post_files()
+            else:
+                _api_commit(repo, branch, files, message, api_url=api_url, late=_post_files)
+        else:
+            _git_commit_and_push(repo, branch, files, message, dry_run=dry_run, timeout_clone=timeout_clone,
+                                 mirror_dir=mirror_dir, late=_post_files)
+    except BaseException:
+        # the posts never landed: don't leave releases pointing at nothing
+        if not dry_run:
+            for fut in futures.values():
+                try:
+                    up = fut.result()
+                except Exception:
+                    up = None  # that upload failed too; it cleaned up after itself
+                if up:
+                    _rollback_release(repo, up)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+    if not dry_run:
+        print(f"✔ Pushed {len(staged)} episode(s). Pages will rebuild.")
+        base = (baseurl or "").rstrip("/")
+        for st in staged:
+            # canonical page URL
+            y, m, d = st.date_str.split("-")
+            print("Episode page:", f"{site_url.rstrip('/')}{base}/{y}/{m}/{d}/{st.slug}.html")
+    else:
+        print("DRY_RUN=True — not pushed.")
+
+    return [st.result() for st in staged]
+
 def publish_episode(
     *,
     show_name: str,
@@ -204,12 +654,20 @@ def publish_episode(
     body_md: str,
     cover_bytes: bytes,
     cover_ext: str = "jpg",    # "jpg" | "png"
-    audio_mp3: Optional[bytes] = None,
+    audio_mp3: Union[bytes, str, Path, None] = None,  # bytes, or a path (streamed, never loaded whole)
+    cover_derivatives: Optional[list] = None,  # from cover_derivatives.make_cover_derivatives
     upload_audio_to_release: bool = False,
     write_audio_to_repo: bool = True,
     audio_url_preference: str = "repo",  # "repo" | "release"
     dry_run: bool = False,
     timeout_clone: int = 120,
+    commit_mode: str = "git",          # "git" (clone+push) | "api" (Git Data API, no clone)
+    mirror_dir: Optional[str] = None,  # git mode: persistent mirror + worktree instead of a fresh clone
+    api_url: Optional[str] = None,     # API base for commit_mode="api" (tests: local stand-in server)
+    date=None,                         # episode date (default today); see publish_episodes
+    audio_store=None,                  # audiostore.ReleaseStore: offload mode (pair with write_audio_to_repo=False)
+    audio_release: Optional[dict] = None,  # release_audio() result: already uploaded, skip the upload
+    audio_cues: Optional[list] = None,     # tts.tts_episode() cues: chapters.json + transcript.vtt
 ):
     """
     Publish a new episode. Returns paths/URLs used.
@@ -221,161 +679,27 @@ def publish_episode(
           audio_url            -> chosen by `audio_url_preference` if both exist
           audio_repo_url       -> repo URL if present
           audio_release_url    -> release URL if present
-          audio_bytes          -> len(audio_mp3)
-    """
-    audio_url_preference = (audio_url_preference or "repo").lower()
-    if audio_url_preference not in ("repo", "release"):
-        audio_url_preference = "repo"
-
-    cover_ext = (cover_ext or "jpg").lower()
-    assert cover_ext in ("jpg", "jpeg", "png")
-
-    # date + slug
-    today = datetime.date.today()
-    date_str = today.strftime("%Y-%m-%d")
-    slug = _slugify(data.get("pinyin") or data.get("chengyu") or "episode")
-    folder = f"{date_str}-{slug}"
-
-    cover_name = f"cover.{'jpeg' if cover_ext in ('jpg','jpeg') else 'png'}"
-    audio_repo_name = "audio.mp3"
-    audio_release_name = f"{date_str}-{slug}.mp3"
+          audio_bytes          -> size of the MP3
+          audio_duration       -> seconds, from the MP3 frame headers
+      - With audio_store (offload mode) the MP3 goes to the content-addressed
+        store instead of a per-episode release; audio_sha256 is recorded too.
 
-    # Front matter — backdate 2 minutes to avoid "future" issues
-    now_utc = datetime.datetime.utcnow() - datetime.timedelta(minutes=2)
-    fm = {
-        "layout": "post",
-        "title": f"{data['chengyu']} ({data['pinyin']})",
-        "date": now_utc.strftime("%Y-%m-%d %H:%M:%S"),
-        "description": data["gloss"],
-        "cover_image": f"/episodes/{folder}/{cover_name}",
-    }
-
-    # --- Release asset upload (if requested) ---
-    release_asset_url = None
-    if audio_mp3 and upload_audio_to_release:
-        tag = f"v{date_str.replace('-','')}-{slug}"
-        rel = _gh_create_or_get_release(
-            repo, tag=tag,
-            name=f"{data['chengyu']} ({data['pinyin']})",
-            body=f"Episode: {data['chengyu']}"
-        )
-        asset = _gh_upload_asset(
-            rel["upload_url"],
-            filename=audio_release_name,
-            blob=audio_mp3,
-            content_type="audio/mpeg"
-        )
-        release_asset_url = asset.get("browser_download_url")
-
-    # Prepare body: sanitize + Characters->lines
-    safe_body = _sanitize_tables_min(body_md or "")
-    safe_body = _characters_table_to_lines(safe_body).strip()
-
-    # --- clone, write files ---
-    tmp = tempfile.mkdtemp(prefix="chengyu_pub_")
-    try:
-        token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
-        if not token:
-            raise RuntimeError("GITHUB_TOKEN not set")
-        repo_url = f"https://{token}@github.com/{repo}.git"
-
-        _git_clone(repo_url, branch, tmp, timeout=timeout_clone)
-        _run_git(["config", "user.name", "Chengyu Publisher Bot"], cwd=tmp, timeout=30)
-        _run_git(["config", "user.email", "actions@users.noreply.github.com"], cwd=tmp, timeout=30)
-
-        ep_dir = Path(tmp) / "episodes" / folder
-        ep_dir.mkdir(parents=True, exist_ok=True)
-
-        # cover / transcript / metadata
-        (ep_dir / cover_name).write_bytes(cover_bytes)
-        (ep_dir / "transcript.txt").write_text(data["script"], encoding="utf-8")
-        (ep_dir / "metadata.json").write_text(json.dumps({
-            "show": show_name,
-            "chengyu": data["chengyu"],
-            "pinyin": data["pinyin"],
-            "gloss": data["gloss"],
-            "teaser": data["teaser"],
-            "script": data["script"],
-        }, ensure_ascii=False, indent=2), encoding="utf-8")
-
-        # --- repo audio (if requested) ---
-        repo_audio_url = None
-        if audio_mp3 and write_audio_to_repo:
-            (ep_dir / audio_repo_name).write_bytes(audio_mp3)
-            repo_audio_url = f"/episodes/{folder}/{audio_repo_name}"
+    Cover derivatives (optional): every entry is written next to the cover and
+    listed in front matter as `cover_srcset` ({src, width, type}); the 3000 px
+    JPEG is exposed as `cover_image_large` for podcast directories.
 
-        # choose which URL the post should use
-        chosen_audio_url = None
-        if audio_mp3:
-            if audio_url_preference == "release" and release_asset_url:
-                chosen_audio_url = release_asset_url
-            elif repo_audio_url:
-                chosen_audio_url = repo_audio_url
-            elif release_asset_url:
-                chosen_audio_url = release_asset_url
-
-        # build post front matter (include both URLs if we have them)
-        if chosen_audio_url:
-            fm["audio_url"] = chosen_audio_url
-            fm["audio_bytes"] = len(audio_mp3)
-        if repo_audio_url:
-            fm["audio_repo_url"] = repo_audio_url
-        if release_asset_url:
-            fm["audio_release_url"] = release_asset_url
-
-        # write post
-        posts_dir = Path(tmp) / "_posts"
-        posts_dir.mkdir(exist_ok=True)
-        post_path = posts_dir / f"{date_str}-{slug}.md"
-        front = "---\n" + yaml.safe_dump(fm, allow_unicode=True, sort_keys=False) + "---\n\n"
-        post_path.write_text(front + safe_body + "\n", encoding="utf-8")
-
-        # commit
-        _run_git(["add", "."], cwd=tmp, timeout=90)
-        _run_git(["commit", "-m", f"Add episode {folder}"], cwd=tmp, timeout=90)
-
-        # push (with retry)
-        if not dry_run:
-            try:
-                # disable aggressive pack/delta to speed big pushes (optional)
-                _run_git([
-                    "-c","core.compression=0",
-                    "-c","pack.window=0",
-                    "-c","pack.depth=0",
-                    "push","origin",branch
-                ], cwd=tmp, timeout=240)
-            except subprocess.TimeoutExpired:
-                print("Push timed out; attempting pull --rebase then retry…")
-                try:
-                    _run_git(["pull", "--rebase", "origin", branch], cwd=tmp, timeout=120)
-                except Exception as e:
-                    print("Rebase pull failed (continuing to retry push):", e)
-                _run_git(["push","origin",branch], cwd=tmp, timeout=240)
-            except subprocess.CalledProcessError as e:
-                print("Initial push failed; attempting pull --rebase then retry…", e)
-                try:
-                    _run_git(["pull", "--rebase", "origin", branch], cwd=tmp, timeout=120)
-                except Exception as e2:
-                    print("Rebase pull failed (continuing to retry push):", e2)
-                _run_git(["push","origin",branch], cwd=tmp, timeout=240)
-
-            # canonical page URL
-            y, m, d = date_str.split("-")
-            base = (baseurl or "").rstrip("/")
-            page_url = f"{site_url.rstrip('/')}{base}/{y}/{m}/{d}/{slug}.html"
-            print("✔ Pushed. Pages will rebuild.")
-            print("Episode page:", page_url)
-        else:
-            print("DRY_RUN=True — not pushed.")
-
-        return {
-            "folder": folder,
-            "post": str(post_path),
-            "cover": str(ep_dir / cover_name),
-            "audio_repo_url": repo_audio_url,
-            "audio_release_url": release_asset_url,
-            "audio_url": chosen_audio_url,
-        }
-
-    finally:
-        shutil.rmtree(tmp, ignore_errors=True)
+    commit_mode="api" writes the same files through the Git Data API instead of
+    cloning: publish time then depends on the episode's bytes, not the repo's.
+    """
+    return publish_episodes(
+        [{
+            "data": data, "body_md": body_md, "cover_bytes": cover_bytes, "cover_ext": cover_ext,
+            "audio_mp3": audio_mp3, "cover_derivatives": cover_derivatives, "date": date,
+            "audio_release": audio_release, "audio_cues": audio_cues,
+        }],
+        show_name=show_name, repo=repo, branch=branch, site_url=site_url, baseurl=baseurl,
+        publish_time_utc=publish_time_utc,
+        upload_audio_to_release=upload_audio_to_release, write_audio_to_repo=write_audio_to_repo,
+        audio_url_preference=audio_url_preference, dry_run=dry_run, timeout_clone=timeout_clone,
+        commit_mode=commit_mode, mirror_dir=mirror_dir, api_url=api_url, audio_store=audio_store,
+    )[0]
@@ -0,0 +1,219 @@
+# chengyu/releases.py
+"""
+Per-episode GitHub releases in bulk (tag v<YYYYMMDD>-<slug>, asset <folder>.mp3).
+
+    rels = fetch(repo)                          # every release, paginated, ETag-cached
+    ops = plan(catalog.load(root), rels, root=root, prune=True)
+    results = execute(ops, repo=repo, parallel=6)
+    apply(root, results)                        # audio_release_url etc. into front matter
+
+fetch() lists all releases in one pass (100 per page). Each page's ETag and
+body are cached under CACHE_DIR, so an unchanged page comes back as 304 Not
+Modified, which does not count against the rate limit. plan() diffs the
+listing against the catalog:
+
+    create   a repo MP3 has no release yet
+    upload   the release exists but the asset is missing or half-uploaded
+    delete   a v<date>-<slug> release no episode refers to (prune=True), or an
+             episode being removed (remove=[folders])
+
+execute() runs the operations on a thread pool of `parallel` workers. Mutating
+requests are paced to `per_minute`, below GitHub's secondary limit on
+content-creating requests. Retries and rate-limit waits come from
+chengyu.github. The audio store release (chengyu.audiostore) and tags outside
+the episode pattern are never touched.
+"""
+
+import re
+import json
+import time
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from . import catalog, github, metrics
+from .config import settings
+
+TAG_RE = re.compile(r"^v\d{8}-.+$")
+PER_PAGE = 100
+MUTATIONS_PER_MINUTE = 60
+
+def episode_tag(folder: str) -> str:
+    """2025-09-05-yan-er-dao-ling -> v20250905-yan-er-dao-ling"""
+    return f"v{folder[:10].replace('-', '')}-{folder[11:]}"
+
+def asset_name(folder: str) -> str:
+    return f"{folder}.mp3"
+
+# ---------- listing ----------
+
+def _cache_path(repo: str) -> Path:
+    return Path(settings.CACHE_DIR) / "releases" / (repo.replace("/", "__") + ".json")
+
+@metrics.traced("releases:fetch")
+def fetch(repo: str, gh: Optional[github.GitHub] = None, *, cache: bool = True) -> List[dict]:
+    """All releases of `repo`, newest first. Unchanged pages are served from the ETag cache."""
+    gh = gh or github.client()
+    path = _cache_path(repo)
+    try:
+        pages = json.loads(path.read_text(encoding="utf-8")) if cache else {}
+    except (OSError, ValueError):
+        pages = {}
+    fresh, out = {}, []
+    url = f"repos/{repo}/releases?per_page={PER_PAGE}&page=1"
+    while url:
+        cached = pages.get(url)
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        r = gh.request("GET", url, headers=headers, timeout=30)
+        if r.status_code == 304 and cached:
+            fresh[url] = cached
+            metrics.add(cache_hits=1)
+        elif r.status_code == 200:
+            fresh[url] = {"etag": r.headers.get("ETag"), "body": r.json(),
+                          "next": r.links.get("next", {}).get("url")}
+        else:
+            raise github.GitHubError("List releases", r)
+        out += fresh[url]["body"]
+        url = fresh[url]["next"]
+    if cache:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(fresh, ensure_ascii=False), encoding="utf-8")
+    metrics.add(releases=len(out))
+    return out
+
+# ---------- diff ----------
+
+@dataclass
+class Op:
+    kind: str                          # "create" | "upload" | "delete"
+    tag: str
+    folder: Optional[str] = None
+    src: Optional[Path] = None         # MP3 to upload
+    name: str = ""                     # release title for create
+    release: Optional[dict] = None
+    asset: Optional[dict] = None       # existing (stale) asset for upload
+    result: dict = field(default_factory=dict)
+
+    def __str__(self):
+        return f"{self.kind:<7} {self.tag}" + (f"  ← {self.src}" if self.src else "")
+
+def plan(episodes: Iterable[dict], releases: List[dict], *, root: Path = Path("."),
+         create: bool = True, prune: bool = False, remove: Iterable[str] = ()) -> List[Op]:
+    """
+    `episodes`: catalog.load() entries. Episodes in `remove` get their release
+    deleted; with `prune`, so does every episode-pattern release with no post.
+    """
+    by_tag = {r["tag_name"]: r for r in releases}
+    remove = set(remove)
+    ops, wanted = [], set()
+    for ep in episodes:
+        folder, fm = ep["folder"], ep["fm"]
+        tag = episode_tag(folder)
+        if folder in remove:
+            if tag in by_tag:
+                ops.append(Op("delete", tag, folder, release=by_tag[tag]))
+            continue
+        wanted.add(tag)
+        src = catalog.repo_audio_path(root, fm)
+        if not create or src is None:
+            continue
+        rel = by_tag.get(tag)
+        name = str(fm.get("title") or folder)
+        if rel is None:
+            ops.append(Op("create", tag, folder, src=src, name=name))
+            continue
+        asset = next((a for a in rel.get("assets", []) if a["name"] == asset_name(folder)), None)
+        if asset is None or asset.get("state") != "uploaded" or asset.get("size") != src.stat().st_size:
+            ops.append(Op("upload", tag, folder, src=src, release=rel, asset=asset))
+        elif not fm.get("audio_release_url"):  # uploaded earlier but never recorded
+            ops.append(Op("upload", tag, folder, src=src, release=rel, asset=asset))
+    if prune:
+        ops += [Op("delete", tag, release=rel) for tag, rel in by_tag.items()
+                if TAG_RE.match(tag) and tag not in wanted
+                and not any(o.tag == tag for o in ops)]
+    return ops
+
+# ---------- execution ----------
+
+class _Pacer:
+    """At most `per_minute` starts per minute, spread evenly; callers queue in order."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            metrics.add(ratelimit_wait_s=at - now)
+            time.sleep(at - now)
+
+def _run(op: Op, repo: str, gh: github.GitHub, pace: _Pacer) -> Op:
+    with metrics.span(f"release:{op.kind}", tag=op.tag):
+        if op.kind == "delete":
+            gh.delete_release(repo, op.release, pace=pace.wait)  # two requests: release, then tag
+            return op
+        rel, created = op.release, False
+        if rel is None:
+            pace.wait()
+            rel, created = gh.create_or_get_release(repo, op.tag, name=op.name, body=f"Episode: {op.name}")
+        pace.wait()
+        try:
+            # a fresh release has no assets to check; otherwise reuse/replace by name
+            asset = gh.upload_asset(rel, op.src, name=asset_name(op.folder), content_type="audio/mpeg",
+                                    reuse=not created)
+        except Exception:
+            if created:
+                gh.delete_release(repo, rel, pace=pace.wait)
+            raise
+        op.result = {"url": asset.get("browser_download_url"), "release": rel, "asset": asset,
+                     "created": created, **catalog.audio_fields(op.src)}
+        return op
+
+def execute(ops: List[Op], *, repo: str, gh: Optional[github.GitHub] = None, parallel: int = 4,
+            per_minute: float = MUTATIONS_PER_MINUTE, dry_run: bool = False) -> List[Op]:
+    """Run `ops` concurrently; failures are reported per op (op.result["error"]), not raised."""
+    if dry_run or not ops:
+        for op in ops:
+            print(f"  {op}")
+        return ops
+    gh = gh or github.client()
+    pace = _Pacer(per_minute)
+
+    def one(op: Op) -> Op:
+        try:
+            _run(op, repo, gh, pace)
+            print(f"✔ {op.kind} {op.tag}")
+        except Exception as e:
+            op.result = {"error": f"{type(e).__name__}: {e}"}
+            print(f"✘ {op.kind} {op.tag}: {op.result['error']}")
+        return op
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="release") as pool:
+        return list(pool.map(metrics.bind(one), ops))
+
+def apply(root: Path, ops: List[Op], *, prefer: str = "repo") -> List[Path]:
+    """Record successful create/upload results in the posts' front matter. Returns the posts changed."""
+    posts = {ep["folder"]: ep for ep in catalog.load(root)}
+    changed = []
+    for op in ops:
+        ep = posts.get(op.folder)
+        if op.kind == "delete" or ep is None or not op.result.get("url"):
+            continue
+        fm = dict(ep["fm"], audio_release_url=op.result["url"],
+                  audio_repo_url="/" + op.src.resolve().relative_to(Path(root).resolve()).as_posix(),
+                  audio_bytes=op.result["audio_bytes"])
+        if "audio_duration" in op.result:
+            fm["audio_duration"] = op.result["audio_duration"]
+        if prefer == "release":
+            fm["audio_url"] = op.result["url"]
+        if fm != ep["fm"]:
+            catalog.write_front_matter(ep["post"], fm, ep["body"])
+            changed.append(ep["post"])
+    return changed
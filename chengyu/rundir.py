@@ -0,0 +1,201 @@
+# chengyu/rundir.py
+"""
+Durable, resumable run directory for the episode pipeline.
+
+    <RUNS_DIR>/<run_id>/
+        run.json            manifest: date, stages -> {files: {name: sha256}, finished}
+        idiom.json          one file (or a few) per completed stage
+        cover.png
+        audio.mp3
+        ...
+
+A stage counts as done only if its manifest entry exists, every recorded
+file still hashes to what was written, and the upstream stages it was built
+from (`after=`) are unchanged, so a half-written or edited artifact re-runs
+that stage and everything derived from it. Values go through a small codec per stage kind:
+
+    json    JSON-able value            (.json)
+    text    str                        (.md)
+    bytes   bytes; loads back as Path  (.<ext>, streamed by the publisher)
+    audio   {"mp3", "cues"}; mp3 loads back as Path  (.<ext> + .json)
+    image   PIL image                  (.png)
+    derivs  cover_derivatives list     (<name>/<filename> + index.json)
+"""
+
+import io
+import os
+import json
+import uuid
+import hashlib
+import datetime
+import functools
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from . import metrics
+
+def _sha256(p: Path) -> str:
+    h = hashlib.sha256()
+    with open(p, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _atomic_write(p: Path, data: bytes):
+    tmp = p.with_name(p.name + ".part")
+    tmp.write_bytes(data)
+    os.replace(tmp, p)
+
+def new_run_id() -> str:
+    return datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ") + "-" + uuid.uuid4().hex[:6]
+
+class RunDir:
+    def __init__(self, root, run_id: Optional[str] = None, *, resume: bool = False):
+        if resume and not run_id:
+            raise ValueError("resume needs a run_id")
+        self.run_id = run_id or new_run_id()
+        self.path = Path(root) / self.run_id
+        self._lock = threading.Lock()
+        if resume:
+            if not (self.path / "run.json").exists():
+                raise FileNotFoundError(f"no run {self.run_id!r} under {root}")
+            self.manifest = json.loads((self.path / "run.json").read_text(encoding="utf-8"))
+        else:
+            self.path.mkdir(parents=True, exist_ok=False)
+            self.manifest = {"run_id": self.run_id, "date": datetime.date.today().isoformat(), "stages": {}}
+            self._flush()
+
+    @property
+    def date(self) -> str:
+        """Episode date, fixed at run creation so a resume next day keeps the same folder."""
+        return self.manifest["date"]
+
+    def _flush(self):
+        _atomic_write(self.path / "run.json",
+                      json.dumps(self.manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    # ---------- codecs ----------
+
+    def _encode(self, name: str, kind: str, value, ext: str) -> Dict[str, bytes]:
+        if kind == "json":
+            return {f"{name}.json": json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8")}
+        if kind == "text":
+            return {f"{name}.md": value.encode("utf-8")}
+        if kind == "bytes":
+            return {f"{name}.{ext}": Path(value).read_bytes() if isinstance(value, Path) else bytes(value)}
+        if kind == "audio":
+            mp3 = value["mp3"]
+            return {f"{name}.{ext}": mp3.read_bytes() if isinstance(mp3, Path) else bytes(mp3),
+                    f"{name}.json": json.dumps(value.get("cues") or [], ensure_ascii=False, indent=2).encode("utf-8")}
+        if kind == "image":
+            buf = io.BytesIO()
+            value.save(buf, "PNG", compress_level=1)
+            return {f"{name}.png": buf.getvalue()}
+        if kind == "derivs":
+            index = [{k: v for k, v in d.items() if k != "bytes"} for d in value]
+            files = {f"{name}/{d['filename']}": d["bytes"] for d in value}
+            files[f"{name}/index.json"] = json.dumps(index, indent=2).encode("utf-8")
+            return files
+        raise ValueError(f"unknown stage kind {kind!r}")
+
+    def _decode(self, name: str, kind: str, ext: str):
+        p = self.path
+        if kind == "json":
+            return json.loads((p / f"{name}.json").read_text(encoding="utf-8"))
+        if kind == "text":
+            return (p / f"{name}.md").read_text(encoding="utf-8")
+        if kind == "bytes":
+            return p / f"{name}.{ext}"
+        if kind == "audio":
+            return {"mp3": p / f"{name}.{ext}", "cues": json.loads((p / f"{name}.json").read_text(encoding="utf-8"))}
+        if kind == "image":
+            from PIL import Image
+            with Image.open(p / f"{name}.png") as im:
+                return im.convert("RGB")
+        if kind == "derivs":
+            index = json.loads((p / name / "index.json").read_text(encoding="utf-8"))
+            return [{**d, "bytes": (p / name / d["filename"]).read_bytes()} for d in index]
+        raise ValueError(f"unknown stage kind {kind!r}")
+
+    # ---------- stages ----------
+
+    def fingerprint(self, name: str) -> Optional[str]:
+        entry = self.manifest["stages"].get(name)
+        if not entry:
+            return None
+        return hashlib.sha256(json.dumps(entry["files"], sort_keys=True).encode()).hexdigest()
+
+    def done(self, name: str) -> bool:
+        entry = self.manifest["stages"].get(name)
+        if not entry:
+            return False
+        for rel, digest in entry["files"].items():
+            f = self.path / rel
+            if not f.exists() or _sha256(f) != digest:
+                print(f"[run {self.run_id}] {name}: {rel} missing or changed; stage will re-run")
+                return False
+        for dep, fp in entry.get("after", {}).items():
+            if not self.done(dep) or self.fingerprint(dep) != fp:
+                print(f"[run {self.run_id}] {name}: upstream {dep!r} changed; stage will re-run")
+                return False
+        return True
+
+    def load(self, name: str):
+        entry = self.manifest["stages"][name]
+        return self._decode(name, entry["kind"], entry.get("ext", "bin"))
+
+    def save(self, name: str, value, *, kind: str = "json", ext: str = "bin", after: Iterable[str] = ()):
+        with metrics.span("checkpoint:save", stage=name, kind=kind) as sp:
+            files = self._encode(name, kind, value, ext)
+            digests = {}
+            for rel, data in files.items():
+                f = self.path / rel
+                f.parent.mkdir(parents=True, exist_ok=True)
+                _atomic_write(f, data)
+                digests[rel] = hashlib.sha256(data).hexdigest()
+                sp.add(bytes_out=len(data))
+        with self._lock:
+            self.manifest["stages"][name] = {
+                "kind": kind, "ext": ext, "files": digests,
+                "after": {dep: self.fingerprint(dep) for dep in after},
+                "finished": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            }
+            self._flush()
+
+    def discard(self, name: str):
+        """Forget a completed stage; stages built from it (`after=`) stop counting as done too."""
+        with self._lock:
+            if self.manifest["stages"].pop(name, None) is not None:
+                self._flush()
+
+    def stage(self, name: str, fn: Callable[[], Any], *, kind: str = "json", ext: str = "bin",
+              after: Iterable[str] = ()):
+        """Return the checkpointed value, or run `fn`, checkpoint and return its result."""
+        with metrics.span(f"stage:{name}") as sp:
+            if self.done(name):
+                print(f"[run {self.run_id}] {name}: restored from checkpoint")
+                sp.set(restored=True)
+                return self.load(name)
+            value = fn()
+            self.save(name, value, kind=kind, ext=ext, after=after)
+            return value
+
+    def wrap(self, name: str, fn: Callable[..., Any], *, kind: str = "json", ext: str = "bin",
+             after: Iterable[str] = ()):
+        """`fn` with its result checkpointed (for pipeline Stages; pair with restored())."""
+        @functools.wraps(fn)  # keeps fn's signature visible to the pipeline (cancel kwarg)
+        def run(**kw):
+            value = fn(**kw)
+            self.save(name, value, kind=kind, ext=ext, after=after)
+            return value
+        return run
+
+    def restored(self, names: Iterable[str]) -> Dict[str, Any]:
+        """{stage: value} for every completed stage among `names` (pipeline.run inputs=)."""
+        out = {}
+        for name in names:
+            if self.done(name):
+                print(f"[run {self.run_id}] {name}: restored from checkpoint")
+                out[name] = self.load(name)
+        return out
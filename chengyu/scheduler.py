@@ -0,0 +1,135 @@
+# chengyu/scheduler.py
+"""
+Episodes for many shows from one process.
+
+Up to `concurrency` episodes run at once (chengyu.episode.produce_episode, each
+in its own run dir), sharing a bounded pool per resource type:
+
+    llm     chat completions (idiom pick, script, Markdown body)
+    image   cover backgrounds
+    speech  TTS
+    git     dedupe checkout, release upload, commit/push
+
+A step holds one slot of its pool while it runs, and never two at once. When a
+pool is full, the next free slot goes to the waiting show served least so far
+(ties: first come), so a show with a long queue can't starve the others and an
+extra show costs pool time, not another serial job. Idiom dedupe is per target
+repo (dedupe.SeenSets): shows on different repos never block each other, and
+episodes for the same repo claim distinct idioms.
+"""
+
+import time
+import itertools
+import threading
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import metrics
+from .config import POOL_SIZES, settings
+from .dedupe import SeenSets
+from .episode import produce_episode
+from .rundir import RunDir
+from .shows import Show
+
+class FairPool:
+    """Counting semaphore that grants slots least-served-show first."""
+
+    def __init__(self, name: str, size: int):
+        self.name, self.size = name, max(1, size)
+        self._cv = threading.Condition()
+        self._busy = 0
+        self._waiting: List[Tuple[int, str]] = []  # (ticket, show)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._tickets = itertools.count()
+
+    def _next(self) -> Tuple[int, str]:
+        return min(self._waiting, key=lambda w: (self._served[w[1]], w[0]))
+
+    @contextmanager
+    def slot(self, show: str):
+        with metrics.span(f"wait:{self.name}", show=show):
+            with self._cv:
+                me = (next(self._tickets), show)
+                self._waiting.append(me)
+                while self._busy >= self.size or self._next() != me:
+                    self._cv.wait()
+                self._waiting.remove(me)
+                self._busy += 1
+                self._served[show] += 1
+                if self._busy < self.size and self._waiting:
+                    self._cv.notify_all()  # a waiter that woke out of turn may be next now
+        try:
+            yield
+        finally:
+            with self._cv:
+                self._busy -= 1
+                self._cv.notify_all()
+
+class Pools:
+    def __init__(self, **sizes: int):
+        unknown = set(sizes) - set(POOL_SIZES)
+        if unknown:
+            raise ValueError(f"unknown resource pool(s): {sorted(unknown)}")
+        self._pools = {name: FairPool(name, sizes.get(name) or n) for name, n in POOL_SIZES.items()}
+
+    def slot(self, resource: str, show: str):
+        return self._pools[resource].slot(show)
+
+@dataclass
+class Outcome:
+    show: str
+    run_id: str
+    ok: bool
+    seconds: float
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+def interleave(jobs: Dict[str, int]) -> List[str]:
+    """Round-robin order over shows: {"a": 2, "b": 1} -> ["a", "b", "a"]."""
+    queues = {k: n for k, n in jobs.items() if n > 0}
+    order = []
+    while queues:
+        for k in list(queues):
+            order.append(k)
+            queues[k] -= 1
+            if not queues[k]:
+                del queues[k]
+    return order
+
+def run(shows: Iterable[Show], *, episodes: int = 1, concurrency: Optional[int] = None,
+        pools: Optional[Pools] = None, runs_dir=None, resume: Optional[Dict[str, str]] = None,
+        dry_run: Optional[bool] = None) -> List[Outcome]:
+    """
+    `episodes` per show (`resume` {show: run_id} continues that run as one of
+    them). A failed episode doesn't stop the others; its run id is in the outcome.
+    """
+    shows = {s.key: s for s in shows}
+    resume = dict(resume or {})
+    order = interleave({k: episodes for k in shows})
+    pools = pools or Pools()
+    seen = SeenSets(mirror_dir=settings.MIRROR_DIR or None)
+    root = Path(runs_dir or settings.RUNS_DIR)
+
+    def one(key: str, run_id: Optional[str]) -> Outcome:
+        show, t0 = shows[key], time.perf_counter()
+        try:
+            rd = RunDir(root / key, run_id, resume=bool(run_id))
+        except Exception as e:
+            return Outcome(key, run_id or "-", False, 0.0, error=repr(e))
+        try:
+            result = produce_episode(show, rd, pools=pools, seen=seen, dry_run=dry_run)
+            return Outcome(key, rd.run_id, True, time.perf_counter() - t0, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            return Outcome(key, rd.run_id, False, time.perf_counter() - t0, error=repr(e))
+
+    workers = max(1, min(concurrency or len(shows) * 2, len(order)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="episode") as pool:
+        # a resumed run takes the show's first slot
+        futures = [pool.submit(metrics.bind(one), key, resume.pop(key, None)) for key in order]
+        return [f.result() for f in futures]
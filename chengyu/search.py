@@ -0,0 +1,217 @@
+# chengyu/search.py
+"""
+Prebuilt, sharded search index for the static site (written by build_site.py).
+
+Terms per episode, with weights summed into one integer score per (term, doc):
+
+    idiom       the whole chengyu (10) and each of its characters (8)
+    pinyin      syllables and the joined form, toned and toneless (6)
+    gloss       words of the description (3)
+    transcript  words, pinyin and Han characters of transcript.txt (1 per hit, max 3)
+
+Layout under <out>/ (default _site/search/):
+
+    manifest.json    version, doc chunk size, shard names
+    docs-<n>.json    [[id, title, url, date, chengyu, pinyin, gloss], ...]  ids n*DOC_CHUNK..
+    t-<key>.json     {term: [[doc_id, score], ...]}  every term whose shard_key() is <key>
+    state.json       per episode: id, input hash, shards it has postings in
+
+shard_key(): first two letters of the toneless form for Latin terms (so "bù",
+"bu" and "buke" share a shard), "u" + codepoint >> 6 in hex for Han. A browser
+(assets/js/search.js) fetches the manifest, then only the shards of its query
+terms and the doc chunks of the hits.
+
+Incremental: an episode whose inputs (post + transcript) hash the same as in
+state.json is left alone; otherwise its postings are dropped from the shards
+it was in and re-added, and only those shards and its doc chunk are rewritten.
+Doc ids are stable, so adding an episode never renumbers the others.
+"""
+
+import re
+import json
+import hashlib
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+VERSION = 1  # bump when tokenisation or the file layout changes (forces a full rebuild)
+DOC_CHUNK = 256
+
+WEIGHTS = {"idiom": 10, "char": 8, "pinyin": 6, "gloss": 3, "transcript": 1}
+TRANSCRIPT_TF_CAP = 3
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in into is it its of on or
+our she so that the their them then there these they this to was we were which while
+who will with you your i me my not no do does did just than too very can all any
+""".split())
+
+_HAN = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+_BREAK = re.compile(r"\[break\s*[0-9.]+s\]")
+_TITLE = re.compile(r"^\s*(?P<chengyu>[^()（）]+?)\s*[（(](?P<pinyin>[^)）]+)[)）]")
+
+def toneless(s: str) -> str:
+    """'lǜ bù' -> 'lu bu' (combining marks dropped)."""
+    return "".join(c for c in unicodedata.normalize("NFD", s) if not unicodedata.combining(c))
+
+def is_han(c: str) -> bool:
+    return bool(_HAN.match(c))
+
+def shard_key(term: str) -> str:
+    if is_han(term[0]):
+        return f"u{ord(term[0]) >> 6:03x}"
+    head = re.sub(r"[^a-z0-9]", "", toneless(term).lower())[:2]
+    return head.ljust(2, "_") if head else "__"
+
+def idiom_of(fm: dict, meta: Optional[dict] = None) -> Tuple[str, str]:
+    """(chengyu, pinyin) from metadata.json, else from a 'X (pinyin)' title."""
+    meta = meta or {}
+    if meta.get("chengyu"):
+        return meta["chengyu"].strip(), (meta.get("pinyin") or "").strip()
+    m = _TITLE.match(str(fm.get("title") or ""))
+    if m:
+        return m["chengyu"].strip(), m["pinyin"].strip()
+    return str(fm.get("title") or "").strip(), ""
+
+def _latin_words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD.findall(text) if not is_han(w[0])]
+
+def terms_for(chengyu: str, pinyin: str, gloss: str, transcript: str) -> Dict[str, int]:
+    """term -> score for one episode."""
+    score: Dict[str, int] = defaultdict(int)
+
+    def add(term: str, w: int):
+        if term:
+            score[term] += w
+
+    compact = "".join(chengyu.split())
+    add(compact, WEIGHTS["idiom"])
+    for c in set(compact):
+        if is_han(c):
+            add(c, WEIGHTS["char"])
+
+    syllables = [s.lower() for s in _WORD.findall(pinyin)]
+    for form in {*syllables, "".join(syllables)}:
+        add(form, WEIGHTS["pinyin"])
+        if toneless(form) != form:
+            add(toneless(form), WEIGHTS["pinyin"])
+
+    for w in set(_latin_words(gloss)):
+        if len(w) > 1 and w not in STOPWORDS:
+            add(w, WEIGHTS["gloss"])
+            if toneless(w) != w:
+                add(toneless(w), WEIGHTS["gloss"])
+
+    tf: Dict[str, int] = defaultdict(int)
+    text = _BREAK.sub(" ", transcript or "")
+    for w in _latin_words(text):
+        if len(w) > 2 and w not in STOPWORDS:
+            tf[w] += 1
+            if toneless(w) != w:
+                tf[toneless(w)] += 1
+    for c in _HAN.findall(text):
+        tf[c] += 1
+    for term, n in tf.items():
+        add(term, WEIGHTS["transcript"] * min(n, TRANSCRIPT_TF_CAP))
+    return dict(score)
+
+# ---------- index files ----------
+
+def _read_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return default
+
+def _write_json(path: Path, data):
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True),
+                   encoding="utf-8")
+    tmp.replace(path)
+
+def _episode_inputs(root: Path, doc: dict) -> Tuple[dict, str, str]:
+    """(metadata.json, transcript text, input hash) for one catalog entry."""
+    ep = root / "episodes" / doc["folder"]
+    meta = _read_json(ep / "metadata.json", {})
+    tx_path = ep / "transcript.txt"
+    transcript = tx_path.read_text(encoding="utf-8") if tx_path.exists() else (meta.get("script") or doc["body"])
+    h = hashlib.sha256(f"v{VERSION}\0{doc['url']}\0{doc['date']}\0".encode())
+    h.update(json.dumps(doc["fm"], sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    h.update(b"\0" + transcript.encode("utf-8"))
+    return meta, transcript, h.hexdigest()
+
+def update(out: Path, root: Path, docs: Iterable[dict]) -> dict:
+    """
+    Bring the index in `out` up to date with `docs` (folder, url, date, fm, body
+    per episode; url as the browser should use it). Returns counts.
+    """
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    state = _read_json(out / "state.json", {})
+    if state.get("version") != VERSION:
+        for stale in out.glob("*.json"):
+            stale.unlink()
+        state = {}
+    episodes: Dict[str, dict] = state.get("episodes", {})
+    next_id = state.get("next_id", 0)
+
+    docs = {d["folder"]: d for d in docs}
+    changed: Dict[int, Tuple[dict, Dict[str, int], str, list]] = {}  # id -> (doc, terms, hash, doc row)
+    purge_shards = set()
+    for folder in [f for f in episodes if f not in docs]:  # removed
+        old = episodes.pop(folder)
+        changed[old["id"]] = (None, {}, "", None)
+        purge_shards.update(old["shards"])
+    for folder, doc in docs.items():
+        meta, transcript, digest = _episode_inputs(Path(root), doc)
+        old = episodes.get(folder)
+        if old and old["hash"] == digest:
+            continue
+        if old:
+            doc_id = old["id"]
+            purge_shards.update(old["shards"])
+        else:
+            doc_id, next_id = next_id, next_id + 1
+        chengyu, pinyin = idiom_of(doc["fm"], meta)
+        gloss = str(doc["fm"].get("description") or meta.get("gloss") or "")
+        terms = terms_for(chengyu, pinyin, gloss, transcript)
+        row = [doc_id, str(doc["fm"].get("title") or chengyu), doc["url"], str(doc["date"])[:10],
+               chengyu, pinyin, gloss]
+        changed[doc_id] = (doc, terms, digest, row)
+        episodes[folder] = {"id": doc_id, "hash": digest, "shards": sorted({shard_key(t) for t in terms})}
+
+    # postings: drop every changed doc from the shards it was in, then add the new terms
+    added: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))  # shard -> term -> postings
+    for doc_id, (_, terms, _, _) in changed.items():
+        for term, s in terms.items():
+            added[shard_key(term)][term].append([doc_id, s])
+    touched = purge_shards | set(added)
+    ids = set(changed)
+    for key in touched:
+        path = out / f"t-{key}.json"
+        postings = {t: [p for p in ps if p[0] not in ids] for t, ps in _read_json(path, {}).items()}
+        for term, ps in added.get(key, {}).items():
+            postings.setdefault(term, []).extend(ps)
+        postings = {t: sorted(ps, key=lambda p: (-p[1], p[0])) for t, ps in postings.items() if ps}
+        if postings:
+            _write_json(path, postings)
+        elif path.exists():
+            path.unlink()
+
+    for chunk in {doc_id // DOC_CHUNK for doc_id in ids}:
+        path = out / f"docs-{chunk}.json"
+        rows = {r[0]: r for r in _read_json(path, [])}
+        for doc_id, (_, _, _, row) in changed.items():
+            if doc_id // DOC_CHUNK == chunk:
+                rows.pop(doc_id, None)
+                if row:
+                    rows[doc_id] = row
+        _write_json(path, [rows[i] for i in sorted(rows)])
+
+    shards = sorted(p.stem[2:] for p in out.glob("t-*.json"))
+    _write_json(out / "manifest.json", {"version": VERSION, "doc_chunk": DOC_CHUNK,
+                                        "docs": len(episodes), "shards": shards})
+    _write_json(out / "state.json", {"version": VERSION, "next_id": next_id, "episodes": episodes})
+    return {"changed": len(changed), "shards_written": len(touched), "shards": len(shards)}
@@ -0,0 +1,88 @@
+# chengyu/shows.py
+"""
+Show registry: several podcasts (voice, explanation language, target repo)
+produced by one install.
+
+shows.yml (path: settings.SHOWS_FILE):
+
+    shows:
+      bites:                          # key: CLI name (--show bites) and runs subdir
+        name: Chengyu Bites
+        repo: kohlenberg/chengyudaily
+        voice: alloy
+      bocados:
+        name: Bocados de Chengyu
+        repo: someone/bocados
+        site_url: https://someone.github.io
+        baseurl: /bocados
+        voice: nova
+        language: Spanish             # language of the explanations (idiom stays Chinese)
+
+Fields left out fall back to the environment settings (chengyu.config), so a
+missing file means one show, "default", built from the usual env vars.
+"""
+
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+from .config import settings
+
+@dataclass(frozen=True)
+class Show:
+    key: str
+    name: str
+    repo: str
+    branch: str = "main"
+    site_url: str = ""
+    baseurl: str = ""
+    publish_time_utc: str = ""
+    gen_model: str = "gpt-4o-mini"
+    tts_model: str = "gpt-4o-mini-tts"
+    voice: str = "alloy"
+    language: str = "English"
+    audio_mode: str = "repo"      # "repo" | "offload" (see scripts/offload_audio.py)
+    commit_mode: str = "git"      # "git" | "api"
+    audio_bitrate: int = 0        # kbps: trim, re-encode mono and tag the TTS MP3 (chengyu/audio_optimize.py); 0 = off
+
+    @classmethod
+    def from_settings(cls, key: str = "default", s=settings, **overrides) -> "Show":
+        base = dict(
+            key=key, name=s.SHOW_NAME, repo=s.REPO, branch=s.GITHUB_BRANCH,
+            site_url=s.SITE_URL, baseurl=s.BASEURL, publish_time_utc=s.PUBLISH_TIME_UTC,
+            gen_model=s.GEN_MODEL, tts_model=s.TTS_MODEL, voice=s.TTS_VOICE,
+            audio_mode=s.AUDIO_MODE, commit_mode=s.COMMIT_MODE, audio_bitrate=s.AUDIO_BITRATE,
+        )
+        return cls(**{**base, **overrides})
+
+def load(path=None) -> Dict[str, Show]:
+    """{key: Show} in file order; {"default": ...} from the environment when the file is absent."""
+    p = Path(path or settings.SHOWS_FILE)
+    if not p.exists():
+        if path:
+            raise FileNotFoundError(f"show registry {p} not found")
+        return {"default": Show.from_settings()}
+    doc = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+    known = {f.name for f in fields(Show)} - {"key"}
+    out: Dict[str, Show] = {}
+    for key, cfg in (doc.get("shows") or {}).items():
+        cfg = cfg or {}
+        unknown = set(cfg) - known
+        if unknown:
+            raise ValueError(f"show {key!r}: unknown field(s) {sorted(unknown)} in {p}")
+        out[str(key)] = Show.from_settings(str(key), **cfg)
+    if not out:
+        raise ValueError(f"{p} defines no shows")
+    return out
+
+def get(key: Optional[str] = None, path=None) -> Show:
+    """The named show, or the first one in the registry."""
+    registry = load(path)
+    if key is None:
+        return next(iter(registry.values()))
+    try:
+        return registry[key]
+    except KeyError:
+        raise KeyError(f"unknown show {key!r}; registry has {sorted(registry)}") from None
@@ -1,13 +1,47 @@
-import re, io
-from openai import OpenAI
-
-def tts_mp3(script_text: str, model: str, voice: str) -> bytes:
-    client = OpenAI()
-    cleaned = re.sub(r"\[break\s*[0-9.]+s\]", "\n\n", script_text or "")
-    with client.audio.speech.with_streaming_response.create(
-        model=model, voice=voice, input=cleaned
-    ) as resp:
-        buf = io.BytesIO()
-        for chunk in resp.iter_bytes():
-            buf.write(chunk)
-    return buf.getvalue()
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from . import chapters, metrics, mp3info, openai_client
+
+TTS_WORKERS = 4
+TTS_DEADLINE = 540  # s for the whole episode, retries included (inside the 600 s audio stage timeout)
+
+def tts_episode(script_text: str, chengyu: str, model: str, voice: str, workers: int = TTS_WORKERS,
+                slot=None, deadline: float = TTS_DEADLINE) -> dict:
+    """
+    {"mp3": bytes, "cues": [...]}: the script synthesised one [break]-delimited
+    cue at a time (concurrently), joined frame by frame with real silence for
+    each break. Cue start/end times come from the frames, so chapters and the
+    timed transcript (chengyu.chapters) need no decoding afterwards.
+
+    `slot()`: context manager held around each request (the scheduler's speech
+    pool), so the pool, not `workers`, bounds requests in flight. Every cue
+    gets the time left of one `deadline` for the whole episode.
+    """
+    cues = chapters.label_sections(chapters.split_script(script_text), chengyu)
+    if not cues:
+        raise ValueError("empty script")
+    with metrics.span("tts", model=model, voice=voice, segments=len(cues)) as sp:
+        end = time.monotonic() + deadline
+
+        def one(cue):
+            with (slot() if slot else nullcontext()):
+                left = end - time.monotonic()
+                if left <= 0:
+                    raise openai_client.DeadlineExceeded("speech: episode deadline reached")
+                return openai_client.speech(model=model, voice=voice, input=cue["text"], deadline=left)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tts") as pool:
+            parts = list(pool.map(metrics.bind(one), cues))
+        out, t = bytearray(), 0.0
+        for cue, audio in zip(cues, parts):
+            frames, seconds = mp3info.audio_frames(audio)
+            cue["start"] = round(t, 3)
+            out += frames
+            t += seconds
+            cue["end"] = round(t, 3)
+            gap, seconds = mp3info.silence(frames, cue["pause"])
+            out += gap
+            t += seconds
+        sp.add(chars_out=sum(len(c["text"]) for c in cues), bytes_in=sum(len(p) for p in parts))
+    return {"mp3": bytes(out), "cues": cues}
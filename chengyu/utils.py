@@ -1,4 +1,4 @@
-import re, unicodedata, subprocess
+import os, re, unicodedata, subprocess
 
 def slugify(text: str) -> str:
     text = unicodedata.normalize("NFKD", text)
@@ -18,3 +18,22 @@ def run(cmd, cwd=None, hide_token=False):
     display = " ".join(["***" if hide_token and "@" in str(x) else str(x) for x in cmd])
     print("+", display)
     subprocess.check_call(cmd, cwd=cwd)
+
+def git_env():
+    """Environment for git: no prompts, stall detection."""
+    env = os.environ.copy()
+    env["GIT_TERMINAL_PROMPT"] = "0"
+    env["GIT_ASKPASS"] = "true"
+    # low-speed settings to fail on long stalls
+    env.setdefault("GIT_HTTP_LOW_SPEED_LIMIT", "1")  # bytes/sec
+    env.setdefault("GIT_HTTP_LOW_SPEED_TIME", "30")  # seconds
+    return env
+
+def run_git(args, cwd, timeout: int = 180, capture: bool = False):
+    """Run a git command with low-speed limits and no prompts (credentials masked in the log)."""
+    cmd = ["git", "-c", "http.lowSpeedLimit=1", "-c", "http.lowSpeedTime=30", *args]
+    shown = " ".join(("***" if ("@" in str(x) or "extraheader" in str(x).lower()) else str(x) for x in cmd))
+    print("+", shown)
+    res = subprocess.run(cmd, cwd=cwd, check=True, timeout=timeout, env=git_env(),
+                         stdout=subprocess.PIPE if capture else None, text=capture or None)
+    return res.stdout if capture else None
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migrate episode audio out of the repo (run once from a checkout, then set AUDIO_MODE=offload).
+
+For every post whose MP3 is still committed under episodes/<folder>/:
+  - point audio_url at a release URL: the post's existing audio_release_url when
+    it has one, else the content-addressed audio store (<sha256>.mp3; see chengyu.audiostore)
+  - record audio_bytes / audio_duration / audio_sha256 in front matter
+  - drop audio_repo_url and delete the repo copy
+Then commits (and optionally pushes) the rewritten posts + deletions in one commit.
+
+Old blobs stay in history; the publisher, mirror and Pages checkouts are shallow or
+blob-filtered, so they no longer pay for them.
+
+    python scripts/offload_audio.py --dry-run          # report only
+    python scripts/offload_audio.py --commit --push
+"""
+import sys, argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from chengyu import catalog
+from chengyu.audiostore import ReleaseStore
+from chengyu.config import settings
+from chengyu.utils import run_git
+
+def plan(root: Path, rehost: bool) -> list:
+    out = []
+    for ep in catalog.load(root):
+        src = catalog.repo_audio_path(root, ep["fm"])
+        if src is None:
+            continue
+        reuse = None if rehost else ep["fm"].get("audio_release_url")
+        out.append({**ep, "src": src, "reuse": reuse})
+    return out
+
+def migrate(ep: dict, store: ReleaseStore) -> dict:
+    meta = catalog.audio_fields(ep["src"], sha256=True)
+    url = ep["reuse"] or store.put(ep["src"])["url"]
+    fm = dict(ep["fm"])
+    fm.pop("audio_repo_url", None)
+    fm["audio_url"] = url
+    fm["audio_release_url"] = url
+    fm.update(meta)
+    return fm
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--root", type=Path, default=Path.cwd(), help="repo checkout (default: cwd)")
+    ap.add_argument("--repo", default=settings.REPO)
+    ap.add_argument("--rehost", action="store_true",
+                    help="upload to the audio store even when a per-episode release URL exists")
+    ap.add_argument("--keep-files", action="store_true", help="rewrite posts but keep the repo MP3s")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent uploads")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--commit", action="store_true", help="git commit the result")
+    ap.add_argument("--push", action="store_true", help="git push after committing")
+    a = ap.parse_args(argv)
+
+    root = a.root.resolve()
+    todo = plan(root, a.rehost)
+    total = sum(ep["src"].stat().st_size for ep in todo)
+    print(f"{len(todo)} episode(s) with repo audio, {total / 1e6:.1f} MB")
+    for ep in todo:
+        print(f"  {ep['folder']}: {'reuse release URL' if ep['reuse'] else 'upload to store'}")
+    if a.dry_run or not todo:
+        return 0
+
+    store = ReleaseStore(a.repo)
+    with ThreadPoolExecutor(max_workers=max(1, a.workers)) as pool:
+        new_fms = list(pool.map(lambda ep: migrate(ep, store), todo))
+
+    for ep, fm in zip(todo, new_fms):
+        catalog.write_front_matter(ep["post"], fm, ep["body"])
+        if not a.keep_files:
+            ep["src"].unlink()
+        print(f"✔ {ep['folder']} -> {fm['audio_url']}")
+
+    if a.commit:
+        run_git(["add", "-A", "--", "_posts", "episodes"], cwd=str(root))
+        run_git(["commit", "-m", f"Move {len(todo)} episode MP3s to release storage"], cwd=str(root))
+        if a.push:
+            run_git(["push"], cwd=str(root), timeout=600)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
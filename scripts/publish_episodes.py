@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Publish several locally staged episodes in one commit / one push / one Pages build.
+
+Each argument is an episode directory laid out like the repo's episodes/<folder>:
+    <YYYY-MM-DD>-<slug>/
+        metadata.json      {"chengyu","pinyin","gloss","teaser","script"} (as written by the publisher)
+        body.md            optional post body (default: empty)
+        cover.jpeg|cover.jpg|cover.png
+        cover-<px>.<jpg|webp|avif>   optional derivatives (srcset)
+        audio.mp3          optional
+The date comes from the directory name (override with "date" in metadata.json).
+
+    python scripts/publish_episodes.py staged/2025-09-01-* --release --dry-run
+
+Same as `python -m chengyu publish` (chengyu/cli.py).
+"""
+import sys
+
+from chengyu.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["publish", *sys.argv[1:]]))
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Produce episodes for several shows in one process (chengyu/scheduler.py).
+
+Shows come from the registry (SHOWS_FILE, default shows.yml; see chengyu/shows.py).
+Episodes run concurrently and share bounded llm/image/speech/git pools with
+fair, least-served-first scheduling; each episode checkpoints into
+RUNS_DIR/<show>/<run_id>/ like scripts/generate_episode.py.
+
+    python scripts/run_shows.py                         # one episode per show
+    python scripts/run_shows.py --show bites --show bocados --episodes 3 --image 3
+    python scripts/run_shows.py --resume bocados=20261019T090000Z-1a2b3c
+
+Same as `python -m chengyu shows` (chengyu/cli.py).
+"""
+import sys
+
+from chengyu.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main(["shows", *sys.argv[1:]]))